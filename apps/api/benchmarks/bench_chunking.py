@@ -0,0 +1,156 @@
+"""Fixed 900-char windows vs the section-aware token-budgeted chunker.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_chunking --docs 300
+    python -m benchmarks.bench_chunking --docs 100 --real    # EMBEDDINGS_PROVIDER backend
+
+Synthetic resumes are laid out like PyMuPDF output: section banners,
+bullets, and lines hard-wrapped at ~90 characters. Each bullet is a fact;
+the query for a fact is its object, tools and figures. Retrieval runs per
+document, as match retrieval does for one candidate, and counts a hit when
+the top chunk contains the whole fact. Without --real the embedding is a hashed
+bag of words, which is enough to compare chunk boundaries offline.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import textwrap
+import time
+
+import numpy as np
+
+from services.rag.chunking import chunk_document, chunk_text
+from services.rag.tokens import count_tokens
+
+TOOLS = [
+    "Python", "SQL", "Airflow", "dbt", "Spark", "Kafka", "Snowflake", "BigQuery", "Terraform", "Kubernetes",
+    "Docker", "Power BI", "Tableau", "SAS", "Java", "Scala", "FastAPI", "PostgreSQL", "Databricks", "AWS Glue",
+]
+VERBS = ["Built", "Designed", "Migrated", "Automated", "Led", "Optimised", "Maintained", "Delivered", "Introduced"]
+OBJECTS = [
+    "ingestion pipelines for claims data", "Solvabilité 2 QRT reporting", "a feature store for pricing models",
+    "data quality checks on policy tables", "near real-time fraud scoring", "the Pilier 3 regulatory datamart",
+    "customer churn dashboards", "an internal metadata catalogue", "cost monitoring for cloud warehouses",
+]
+HEADINGS = ["PROFIL", "EXPERIENCES PROFESSIONNELLES", "Skills:", "FORMATION", "PROJETS", "Certifications"]
+
+
+def make_resume(rng: random.Random) -> tuple[str, list[str]]:
+    facts, lines = [], ["Jane Doe", "Data Engineer - Paris", "jane.doe@example.com | +33 6 12 34 56 78", ""]
+    for heading in HEADINGS:
+        lines += [heading]
+        if heading == "PROFIL":
+            para = " ".join(
+                f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(TOOLS)} for {rng.randint(2, 9)} years."
+                for _ in range(4)
+            )
+            lines += textwrap.wrap(para, 90)
+        else:
+            for _ in range(rng.randint(4, 9)):
+                fact = (
+                    f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(TOOLS)} and {rng.choice(TOOLS)}, "
+                    f"cutting run time by {rng.randint(10, 90)}% across {rng.randint(2, 40)} business units."
+                )
+                facts.append(fact)
+                wrapped = textwrap.wrap(fact, 90)
+                lines += ["- " + wrapped[0]] + wrapped[1:]
+        lines.append("")
+    return "\n".join(lines), facts
+
+
+def hashed_bow(texts: list[str], dim: int = 512) -> np.ndarray:
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, t in enumerate(texts):
+        for w in re.findall(r"\w+", t.lower()):
+            out[i, int(hashlib.md5(w.encode()).hexdigest(), 16) % dim] += 1
+    out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+    return out
+
+
+def squash(text: str) -> str:
+    return " ".join(text.split())
+
+
+def evaluate(name: str, chunker, docs, queries, embed) -> dict:
+    n_chunks = embedded = source = intact = hits = 0
+    t_chunk = 0.0
+    for (text, facts), doc_queries in zip(docs, queries):
+        t0 = time.perf_counter()
+        chunks = chunker(text)
+        t_chunk += time.perf_counter() - t0
+
+        n_chunks += len(chunks)
+        embedded += sum(count_tokens(c) for c in chunks)
+        source += count_tokens(text)
+        flat = [squash(c) for c in chunks]
+        intact += sum(any(f in c for c in flat) for f in facts)
+
+        vectors = embed(chunks)
+        for fact, query in doc_queries:
+            best = int(np.argmax(vectors @ embed([query])[0]))
+            hits += fact in flat[best]
+
+    n_facts = sum(len(f) for _, f in docs)
+    n_queries = sum(len(q) for q in queries)
+    return {
+        "chunker": name,
+        "chunks_per_doc": round(n_chunks / len(docs), 2),
+        "embedded_tokens_per_doc": round(embedded / len(docs), 1),
+        "duplication": round(embedded / source - 1, 3),
+        "embedding_usd_per_100k_docs": round(embedded / len(docs) * 100_000 * 0.02 / 1e6, 2),
+        "facts_intact": round(intact / n_facts, 3),
+        "fact_hit_at_1": round(hits / n_queries, 3),
+        "chunk_ms_per_doc": round(t_chunk / len(docs) * 1000, 3),
+    }
+
+
+def linearity(chunker, text: str) -> dict:
+    out = {}
+    for mult in (1, 10, 100):
+        big = "\n".join([text] * mult)
+        t0 = time.perf_counter()
+        chunker(big)
+        out[f"x{mult}_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return out
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=300)
+    ap.add_argument("--queries-per-doc", type=int, default=3)
+    ap.add_argument("--real", action="store_true")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    docs = [make_resume(rng) for _ in range(args.docs)]
+    queries = []
+    for _, facts in docs:
+        picked = rng.sample(facts, min(args.queries_per_doc, len(facts)))
+        # what a job requirement would share with the bullet: object, tools, figures; not the boilerplate
+        queries.append([(squash(f), " ".join(re.findall(r"\w+", f)[1:-3])) for f in picked])
+
+    if args.real:
+        from services.embeddings.provider import embed_texts
+        embed = lambda texts: np.asarray(embed_texts(texts), dtype=np.float32)  # noqa: E731
+    else:
+        embed = hashed_bow
+
+    chunkers = [
+        ("chunk_text(900 chars, 150 overlap)", lambda t: chunk_text(t, max_chars=900, overlap=150)),
+        ("chunk_document(default budget)", chunk_document),
+    ]
+    results = []
+    for name, chunker in chunkers:
+        row = evaluate(name, chunker, docs, queries, embed)
+        row["linear_scaling"] = linearity(chunker, docs[0][0])
+        results.append(row)
+    print(json.dumps({"docs": args.docs, "embedding": "real" if args.real else "hashed-bow", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
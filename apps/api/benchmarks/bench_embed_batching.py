@@ -0,0 +1,103 @@
+"""Embedding throughput with and without cross-request micro-batching.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_embed_batching            # simulated model
+    python -m benchmarks.bench_embed_batching --real     # EMBEDDINGS_PROVIDER backend
+
+The simulated model costs a fixed overhead per forward pass plus a small
+per-text cost. By default forward passes are serialized, like a CPU
+SentenceTransformer that already uses every core; pass --parallel to model
+OpenAI round-trips instead. Each caller thread embeds one text at a time,
+like /rag/query, /assistant/answer and /job/match do.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+
+from services.embeddings.batcher import EmbeddingBatcher
+
+
+def simulated_encoder(call_overhead_ms: float, per_text_ms: float, parallel: bool, dim: int = 384):
+    lock = threading.Lock()
+
+    def encode(texts):
+        cost = (call_overhead_ms + per_text_ms * len(texts)) / 1000.0
+        if parallel:
+            time.sleep(cost)
+        else:
+            with lock:
+                time.sleep(cost)
+        return [[0.0] * dim for _ in texts]
+
+    return encode
+
+
+def run(embed, callers: int, calls_per_caller: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(idx: int):
+        local = []
+        for j in range(calls_per_caller):
+            t0 = time.perf_counter()
+            embed([f"caller {idx} query {j}"])
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(callers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    total = callers * calls_per_caller
+    return {
+        "callers": callers,
+        "embeddings_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--real", action="store_true", help="use the configured embedding backend")
+    ap.add_argument("--calls", type=int, default=50, help="sequential calls per caller")
+    ap.add_argument("--max-batch-size", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    ap.add_argument("--call-overhead-ms", type=float, default=15.0)
+    ap.add_argument("--per-text-ms", type=float, default=0.5)
+    ap.add_argument("--parallel", action="store_true", help="simulated forward passes may overlap")
+    args = ap.parse_args()
+
+    if args.real:
+        from services.embeddings.provider import get_backend
+        encode = get_backend().encode
+    else:
+        encode = simulated_encoder(args.call_overhead_ms, args.per_text_ms, args.parallel)
+
+    batcher = EmbeddingBatcher(encode, args.max_batch_size, args.max_wait_ms)
+    results = []
+    for callers in (1, 8, 32):
+        direct = run(encode, callers, args.calls)
+        batched = run(batcher.embed, callers, args.calls)
+        results.append({
+            "callers": callers,
+            "direct": direct,
+            "batched": batched,
+            "speedup": round(batched["embeddings_per_sec"] / direct["embeddings_per_sec"], 2),
+        })
+
+    print(json.dumps({"results": results, "batcher": batcher.stats()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Load benchmark: latency percentiles and throughput per endpoint at fixed concurrency.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_load --concurrency 1,4,16 --duration 30 --out load.json
+    python -m benchmarks.bench_load --mix ingest --baseline load.json    # ratios against an earlier run
+    VECTORSTORE_BACKEND=mmap python -m benchmarks.bench_load --mix "match=1,rag_query=3"
+
+Starts benchmarks.stub_ollama and `uvicorn main:app` as subprocesses, with
+EMBEDDINGS_PROVIDER=fake and every store in a temporary directory, so a run
+needs no model, no GPU and no Ollama, and two runs of the same commit see the
+same data. Other environment variables (VECTORSTORE_BACKEND, RETRIEVAL_MODE,
+OLLAMA_MAX_CONCURRENCY, ...) are passed through to the app. The LLM cache is
+off unless --llm-cache, so every match and apply kit reaches the stub.
+
+Seed resumes and jobs are indexed first; match, apply_kit and rag_query use
+them. Each concurrency level then runs a closed loop: that many clients send
+the next request of the mix as soon as the previous one returns. Uploads add
+new candidates and jobs, so later levels run against a slightly larger
+store. The JSON report carries the commit, the configuration and, per level
+and endpoint, requests, errors, req/s and p50/p95/p99 latency in ms.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_profile import make_resume
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+ENDPOINTS = {
+    "index_resume": ("POST", "/rag/index_resume"),
+    "upload_job": ("POST", "/job/upload_text"),
+    "match": ("POST", "/job/match"),
+    "rag_query": ("POST", "/rag/query"),
+    "apply_kit": ("POST", "/apply/kit"),
+}
+# endpoint -> weight
+MIXES = {
+    "interactive": {"index_resume": 1, "upload_job": 2, "match": 6, "rag_query": 9, "apply_kit": 2},
+    "ingest": {"index_resume": 1, "upload_job": 1},
+    "llm": {"match": 3, "apply_kit": 1},
+}
+
+JOB_TITLES = ["Data Engineer", "Consultant Data Quality Solvabilité 2", "Data Analyst", "Développeur Python", "ML Engineer"]
+JOB_LINES = [
+    "Vous concevez et maintenez les pipelines Airflow et dbt alimentant l'entrepôt Snowflake.",
+    "You will build streaming ingestion with Kafka and Spark Structured Streaming on AWS.",
+    "Maîtrise de SQL et Python indispensable, connaissance de SAS appréciée.",
+    "Experience with Power BI or Tableau dashboards for finance stakeholders.",
+    "Mise en place de contrôles qualité des données et du reporting réglementaire Solvabilité 2.",
+    "Docker, Kubernetes and Terraform are used to deploy the data platform.",
+    "Bonne communication, anglais professionnel, travail en méthode agile Scrum.",
+]
+QUESTIONS = [
+    "Which cloud platforms has the candidate used?",
+    "Expérience avec Airflow ?",
+    "What data quality work has the candidate done?",
+    "Python and SQL experience",
+    "Quels outils de reporting ?",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def make_pdf(text: str) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(36, 36, 560, 806), text, fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_job(rng: random.Random) -> dict:
+    lines = rng.sample(JOB_LINES, rng.randint(3, len(JOB_LINES)))
+    return {
+        "title": rng.choice(JOB_TITLES),
+        "company": rng.choice(["Acme", "Comeetli", "AXA", "Doctolib"]),
+        "location": rng.choice(["Paris", "Lyon", "Remote"]),
+        "description": "Missions\n" + "\n".join(lines * 2) + "\nProfil recherché\nBac+5, 3 ans d'expérience.",
+    }
+
+
+def parse_mix(spec: str) -> dict:
+    if spec in MIXES:
+        return MIXES[spec]
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r} in --mix; use one of {', '.join(ENDPOINTS)} or a named mix")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_revision() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=API_DIR, capture_output=True, text=True)
+        return {"commit": commit.stdout.strip(), "dirty": bool(dirty.stdout.strip())}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def start(cmd: list[str], env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "wb")
+    return subprocess.Popen(cmd, cwd=API_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, proc: subprocess.Popen, log_path: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    tail = pathlib.Path(log_path).read_text(errors="replace")[-3000:]
+    raise SystemExit(f"{url} did not come up:\n{tail}")
+
+
+class Fixtures:
+    def __init__(self, rng: random.Random, pdfs: int):
+        self.pdfs = [make_pdf(make_resume(rng)[0]) for _ in range(pdfs)]
+        self.candidates: list[str] = []
+        self.jobs: list[str] = []
+
+    def request(self, name: str, rng: random.Random) -> dict:
+        if name == "index_resume":
+            return {"files": {"file": ("cv.pdf", rng.choice(self.pdfs), "application/pdf")}}
+        if name == "upload_job":
+            return {"data": make_job(rng)}
+        if name == "rag_query":
+            return {"json": {"question": rng.choice(QUESTIONS), "candidate_id": rng.choice(self.candidates)}}
+        pair = {"job_id": rng.choice(self.jobs), "candidate_id": rng.choice(self.candidates)}
+        return {"json": pair}
+
+
+async def seed(client: httpx.AsyncClient, fixtures: Fixtures, rng: random.Random, resumes: int, jobs: int):
+    sem = asyncio.Semaphore(4)
+
+    async def call(name: str, kw: dict) -> dict:
+        async with sem:
+            method, path = ENDPOINTS[name]
+            r = await client.request(method, path, **kw)
+            r.raise_for_status()
+            return r.json()
+
+    out = await asyncio.gather(*[call("index_resume", {"files": {"file": ("cv.pdf", pdf, "application/pdf")}})
+                                 for pdf in fixtures.pdfs[:resumes]])
+    fixtures.candidates = [o["candidate_id"] for o in out]
+    out = await asyncio.gather(*[call("upload_job", {"data": make_job(rng)}) for _ in range(jobs)])
+    fixtures.jobs = [o["job_id"] for o in out]
+
+
+def summarize(samples: list[tuple[float, bool]], elapsed: float) -> dict:
+    latencies = [ms for ms, ok in samples if ok]
+    out = {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "req_per_s": round(len(latencies) / elapsed, 2),
+    }
+    if latencies:
+        out.update({
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+            "mean_ms": round(sum(latencies) / len(latencies), 1),
+            "max_ms": round(max(latencies), 1),
+        })
+    return out
+
+
+async def run_level(client: httpx.AsyncClient, fixtures: Fixtures, mix: dict, concurrency: int,
+                    duration: float, seed_value: int) -> dict:
+    names, weights = list(mix), list(mix.values())
+    samples: dict[str, list[tuple[float, bool]]] = {n: [] for n in names}
+    errors: dict[str, str] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(i: int):
+        rng = random.Random(f"{seed_value}:{concurrency}:{i}")
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path = ENDPOINTS[name]
+            kw = fixtures.request(name, rng)
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, **kw)
+                ok = r.status_code < 400
+                if not ok:
+                    errors.setdefault(name, f"{r.status_code}: {r.text[:200]}")
+            except httpx.HTTPError as e:
+                ok = False
+                errors.setdefault(name, repr(e))
+            samples[name].append(((time.perf_counter() - t0) * 1000, ok))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - t0
+
+    everything = [s for per in samples.values() for s in per]
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        **summarize(everything, elapsed),
+        "endpoints": {n: summarize(samples[n], elapsed) for n in names if samples[n]},
+        **({"first_errors": errors} if errors else {}),
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Per level and endpoint, this run over the baseline: p95 above 1 is slower, req/s below 1 is slower."""
+    old_levels = {lvl["concurrency"]: lvl for lvl in baseline.get("levels", [])}
+    out = {"commit": baseline.get("commit"), "levels": {}}
+    for lvl in report["levels"]:
+        old = old_levels.get(lvl["concurrency"])
+        if old is None:
+            continue
+        ratios = {}
+        for name, new in lvl["endpoints"].items():
+            prev = old["endpoints"].get(name)
+            if not prev or "p95_ms" not in prev or "p95_ms" not in new:
+                continue
+            ratios[name] = {
+                "p95_ratio": round(new["p95_ms"] / prev["p95_ms"], 3) if prev["p95_ms"] else None,
+                "req_per_s_ratio": round(new["req_per_s"] / prev["req_per_s"], 3) if prev["req_per_s"] else None,
+            }
+        out["levels"][str(lvl["concurrency"])] = ratios
+    return out
+
+
+async def drive(args, app_url: str, stub_url: str) -> tuple[list[dict], dict]:
+    rng = random.Random(args.seed)
+    fixtures = Fixtures(rng, max(args.seed_resumes, 20))
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4, max_keepalive_connections=max(args.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        await seed(client, fixtures, rng, args.seed_resumes, args.seed_jobs)
+        mix = parse_mix(args.mix)
+        levels = []
+        for c in args.concurrency:
+            if args.warmup > 0:
+                await run_level(client, fixtures, mix, c, args.warmup, args.seed + 1)
+            level = await run_level(client, fixtures, mix, c, args.duration, args.seed)
+            print(f"concurrency {c}: {level['req_per_s']} req/s, {level['errors']} errors", file=sys.stderr)
+            levels.append(level)
+        status = (await client.get("/status")).json()
+        stub = httpx.get(f"{stub_url}/api/stats", timeout=5).json()
+    return levels, {"app": status, "stub": stub}
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts, one level each")
+    ap.add_argument("--duration", type=float, default=20, help="seconds per level")
+    ap.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each level")
+    ap.add_argument("--mix", default="interactive", help=f"{', '.join(MIXES)} or e.g. 'match=1,rag_query=3'")
+    ap.add_argument("--seed-resumes", type=int, default=20)
+    ap.add_argument("--seed-jobs", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=300, help="per request")
+    ap.add_argument("--app-workers", type=int, default=1, help="uvicorn --workers")
+    ap.add_argument("--llm-cache", action="store_true", help="keep the LLM result cache on")
+    ap.add_argument("--ttft-ms", type=float, default=300)
+    ap.add_argument("--prompt-ms-per-1k", type=float, default=0)
+    ap.add_argument("--tokens-per-s", type=float, default=40)
+    ap.add_argument("--tokens", type=int, default=200)
+    ap.add_argument("--parallel", type=int, default=4, help="stub Ollama slots, like OLLAMA_NUM_PARALLEL")
+    ap.add_argument("--out", help="also write the report here")
+    ap.add_argument("--baseline", help="an earlier report to compare against")
+    args = ap.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    work = tempfile.mkdtemp(prefix="pathfinder-load-")
+    stub_port, app_port = free_port(), free_port()
+    stub_url, app_url = f"http://127.0.0.1:{stub_port}", f"http://127.0.0.1:{app_port}"
+    env = {
+        "OLLAMA_MAX_CONCURRENCY": str(args.parallel),
+        **os.environ,
+        "EMBEDDINGS_PROVIDER": "fake",
+        "OLLAMA_URL": f"{stub_url}/api/generate",
+        "LLM_CACHE_ENABLED": "1" if args.llm_cache else "0",
+        "CHROMA_DIR": os.path.join(work, "chroma"),
+        "VECTORSTORE_DIR": os.path.join(work, "vectors"),
+        "LEXICAL_INDEX_PATH": os.path.join(work, "lexical.sqlite"),
+        "EMBED_CACHE_PATH": os.path.join(work, "embeddings.sqlite"),
+        "LLM_CACHE_PATH": os.path.join(work, "llm.sqlite"),
+        "TASKS_PATH": os.path.join(work, "tasks.sqlite"),
+        "ANONYMIZED_TELEMETRY": "False",
+    }
+    stub_cmd = [
+        sys.executable, "-m", "benchmarks.stub_ollama", "--port", str(stub_port),
+        "--ttft-ms", str(args.ttft_ms), "--prompt-ms-per-1k", str(args.prompt_ms_per_1k),
+        "--tokens-per-s", str(args.tokens_per_s), "--tokens", str(args.tokens), "--parallel", str(args.parallel),
+    ]
+    app_cmd = [
+        sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+        "--workers", str(args.app_workers), "--log-level", "warning", "--no-access-log",
+    ]
+    stub_log, app_log = os.path.join(work, "stub.log"), os.path.join(work, "app.log")
+    procs = [start(stub_cmd, env, stub_log), start(app_cmd, env, app_log)]
+    try:
+        wait_ready(f"{stub_url}/api/stats", procs[0], stub_log)
+        wait_ready(f"{app_url}/", procs[1], app_log)
+        levels, status = asyncio.run(drive(args, app_url, stub_url))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+    report = {
+        **git_revision(),
+        "config": {
+            "mix": parse_mix(args.mix),
+            "duration_s": args.duration,
+            "seed_resumes": args.seed_resumes,
+            "seed_jobs": args.seed_jobs,
+            "app_workers": args.app_workers,
+            "llm_cache": args.llm_cache,
+            "vectorstore_backend": env.get("VECTORSTORE_BACKEND", "chroma"),
+            "ollama_max_concurrency": env["OLLAMA_MAX_CONCURRENCY"],
+            "stub": {"ttft_ms": args.ttft_ms, "prompt_ms_per_1k": args.prompt_ms_per_1k,
+                     "tokens_per_s": args.tokens_per_s, "tokens": args.tokens, "parallel": args.parallel},
+        },
+        "levels": levels,
+        "embed_batching": (status["app"].get("embeddings", {}).get("backends") or [{}])[0].get("batching"),
+        "stub_requests": status["stub"]["requests"],
+        "logs": work,
+    }
+    if args.baseline:
+        report["vs_baseline"] = compare(report, json.loads(pathlib.Path(args.baseline).read_text()))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        pathlib.Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,105 @@
+"""p99 latency of an unrelated endpoint while PDFs are being parsed.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_pdf_event_loop --pages 30 --uploads 8
+
+The app is driven in-process through httpx's ASGI transport, so it shares
+one event loop with the probe client, exactly like a single uvicorn worker.
+A probe hits GET / every few milliseconds while PDFs are posted to
+/resume/upload, once with inline parsing (PDF_WORKERS=0, the previous
+behaviour) and once with the process pool.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import fitz
+import httpx
+
+import main
+from services.parsing import pdf
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    line = "Data engineer - Python, SQL, Airflow, Spark, dbt, Solvabilité 2 reporting. " * 2
+    for p in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 560, 800), f"Page {p + 1}\n" + (line + "\n") * 40, fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(workers: int, pdf_bytes: bytes, uploads: int, concurrency: int, probe_interval_ms: float) -> dict:
+    pdf.PDF_WORKERS = workers
+    pdf.shutdown_pool()
+    pdf.start_pool()
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(probe_interval_ms / 1000)
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def upload(i: int):
+            async with sem:
+                r = await client.post("/resume/upload", files={"file": (f"cv{i}.pdf", pdf_bytes, "application/pdf")})
+                r.raise_for_status()
+
+        probe_task = asyncio.create_task(probe())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(upload(i) for i in range(uploads)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await probe_task
+
+    return {
+        "pdf_workers": workers,
+        "uploads_per_sec": round(uploads / elapsed, 2),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": round(percentile(probe_latencies, 0.50), 2),
+        "probe_p99_ms": round(percentile(probe_latencies, 0.99), 2),
+        "probe_max_ms": round(max(probe_latencies), 2),
+    }
+
+
+async def main_async(args):
+    pdf_bytes = make_pdf(args.pages)
+    results = [
+        await run(0, pdf_bytes, args.uploads, args.concurrency, args.probe_interval_ms),
+        await run(args.workers, pdf_bytes, args.uploads, args.concurrency, args.probe_interval_ms),
+    ]
+    pdf.shutdown_pool()
+    print(json.dumps({"pages": args.pages, "uploads": args.uploads, "results": results}, indent=2))
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=30)
+    ap.add_argument("--uploads", type=int, default=8)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--probe-interval-ms", type=float, default=5)
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,132 @@
+"""Resume parsing throughput and experience extraction accuracy.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_profile --docs 5000
+    python -m benchmarks.bench_profile --dir /path/to/cv_texts    # also time a folder of extracted .txt resumes
+
+Synthetic resumes mix the layouts seen in PyMuPDF output of French and
+English CVs: "Role chez Company, City" over a date line, "Company | Role |
+City" with dates below, and role, company and dates on one line, with
+bullets hard-wrapped at ~90 characters and a "Technologies :" line. Every
+planted experience is checked field by field against what the parser
+returns, in order. skills_ms is the share of the time spent in the skill
+gazetteer, which is not part of the line pass.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import random
+import textwrap
+import time
+
+from services.parsing.profile_extractor import extract_profile_from_text
+from services.parsing.skills import extract_skills
+
+ROLES = [
+    "Data Engineer", "Ingénieur Data", "Data Analyst", "Développeur Python", "Consultant BI",
+    "Data Scientist", "Chef de projet data", "Stagiaire Data", "Actuaire", "Lead Data Engineer",
+]
+COMPANIES = ["AXA", "BNP Paribas", "Capgemini", "Société Générale", "Acme Corp", "Doctolib", "Allianz", "Covéa"]
+CITIES = ["Paris", "Lyon", "Nantes", "Lille", "Bordeaux", "Remote"]
+MONTHS = ["Janvier", "Mars", "sept.", "Oct", "June", "December", "avril"]
+BULLETS = [
+    "Construction de pipelines Airflow et dbt sur Snowflake pour le reporting Solvabilité 2",
+    "Built near real-time fraud scoring with Kafka and Spark Structured Streaming",
+    "Migration des flux SAS vers Python et PostgreSQL, réduisant le temps de calcul de 60%",
+    "Designed Power BI dashboards for the finance department and trained 40 business users",
+    "Mise en place de contrôles qualité avec Great Expectations et alerting Grafana",
+    "Maintained Terraform modules and Kubernetes deployments for the data platform",
+]
+
+
+def date(rng: random.Random, year: int) -> str:
+    return rng.choice([f"{rng.choice(MONTHS)} {year}", f"{rng.randint(1, 12):02d}/{year}", str(year)])
+
+
+def make_resume(rng: random.Random) -> tuple[str, list[dict]]:
+    lines = [
+        "Jeanne Dupont", "Data Engineer", "jeanne.dupont@example.com | +33 6 12 34 56 78",
+        "linkedin.com/in/jeanne-dupont", "", "PROFIL",
+        *textwrap.wrap(" ".join(rng.sample(BULLETS, 2)) + ".", 90), "",
+        rng.choice(["EXPÉRIENCES PROFESSIONNELLES", "Professional Experience", "Expériences :"]),
+    ]
+    planted, year = [], 2024
+    for k in range(rng.randint(2, 5)):
+        role, company, city = rng.choice(ROLES), rng.choice(COMPANIES), rng.choice(CITIES)
+        start = date(rng, year - rng.randint(1, 3))
+        end = rng.choice(["Aujourd'hui", "Present"]) if k == 0 else date(rng, year)
+        year -= 4
+        layout = rng.randrange(3)
+        if layout == 0:
+            lines += [f"{role} chez {company}, {city}", f"{start} - {end}"]
+        elif layout == 1:
+            lines += [f"{company} | {role} | {city}", f"{start} – {end}"]
+        else:
+            lines += [f"{role} — {company} ({city})    {start} - {end}"]
+        bullets = rng.sample(BULLETS, rng.randint(1, 4))
+        for b in bullets:
+            wrapped = textwrap.wrap(b + ".", 90)
+            lines += [rng.choice(["- ", "• "]) + wrapped[0]] + wrapped[1:]
+        lines.append("Technologies : Python, SQL, Airflow")
+        planted.append({"role": role, "company": company, "location": city, "start": start, "end": end,
+                        "bullets": len(bullets)})
+    lines += ["", "FORMATION", "Master Data Science, Université Paris 1 2014 - 2016", "", "Compétences", "Python, SQL"]
+    return "\n".join(lines), planted
+
+
+def accuracy(docs: list[tuple[str, list[dict]]], parsed) -> dict:
+    fields = ["role", "company", "location", "start", "end", "bullets"]
+    right = dict.fromkeys(fields, 0)
+    count_ok = total = 0
+    for (_, planted), profile in zip(docs, parsed):
+        count_ok += len(profile.experiences) == len(planted)
+        for want, got in zip(planted, profile.experiences):
+            got = {**got.model_dump(), "bullets": len(got.bullets)}
+            for f in fields:
+                right[f] += got[f] == want[f]
+        total += len(planted)
+    return {"experience_count": round(count_ok / len(docs), 4), **{f: round(right[f] / total, 4) for f in fields}}
+
+
+def throughput(texts: list[str]) -> dict:
+    t0 = time.perf_counter()
+    parsed = [extract_profile_from_text(t) for t in texts]
+    elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for t in texts:
+        extract_skills(t)
+    skills = time.perf_counter() - t0
+    return {
+        "resumes": len(texts),
+        "resumes_per_s": round(len(texts) / elapsed, 1),
+        "ms_per_resume": round(elapsed / len(texts) * 1000, 3),
+        "skills_ms_per_resume": round(skills / len(texts) * 1000, 3),
+        "experiences_per_resume": round(sum(len(p.experiences) for p in parsed) / len(texts), 2),
+    }, parsed
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=5000)
+    ap.add_argument("--dir", help="folder of .txt resumes")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    docs = [make_resume(rng) for _ in range(args.docs)]
+    extract_skills("warm up")  # the gazetteer is compiled on first use
+
+    synthetic, parsed = throughput([text for text, _ in docs])
+    synthetic["accuracy"] = accuracy(docs, parsed)
+    report = {"synthetic": synthetic}
+    if args.dir:
+        texts = [p.read_text(encoding="utf-8", errors="ignore") for p in sorted(pathlib.Path(args.dir).glob("*.txt"))]
+        if texts:
+            report["dir"] = throughput(texts)[0]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
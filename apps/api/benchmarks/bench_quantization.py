@@ -0,0 +1,87 @@
+"""Memory per chunk and recall@k of quantized mmap storage against float32.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_quantization --chunks 100000 --dim 384
+
+Vectors are drawn around a few hundred cluster centres so that, like real
+embeddings of job postings, near neighbours are close to each other and
+quantization error actually competes with the gaps between them. Every
+configuration answers the same queries; recall@k is measured against the
+exact float32 ranking. "scanned" bytes are what a query streams through
+(and what must stay resident for predictable latency); "on disk" adds the
+float32 copy kept for re-scoring and get(include=embeddings).
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from services.rag import mmap_store
+from benchmarks.bench_vectorstore import clustered_vectors, percentile
+
+CONFIGS = [
+    ("float32", 0),
+    ("float16", 0),
+    ("float16", 4),
+    ("int8", 0),
+    ("int8", 4),
+]
+
+
+def run(path: str, dtype: str, rescore: int, vectors, queries, k: int, exact: list[set]) -> dict:
+    mmap_store.MMAP_VECTOR_DTYPE = dtype
+    mmap_store.MMAP_RESCORE_FACTOR = rescore
+    col = mmap_store.MmapClient(path).get_or_create_collection(f"{dtype}_{rescore}")
+
+    ids = [str(i) for i in range(len(vectors))]
+    for i in range(0, len(ids), 5000):
+        col.upsert(ids=ids[i:i + 5000], embeddings=vectors[i:i + 5000], documents=[""] * len(ids[i:i + 5000]))
+
+    latencies, recall = [], []
+    for qi, q in enumerate(queries):
+        t0 = time.perf_counter()
+        res = col.query(query_embeddings=[q], n_results=k, include=[])
+        latencies.append((time.perf_counter() - t0) * 1000)
+        recall.append(len(exact[qi] & set(res["ids"][0])) / k)
+
+    files = {os.path.splitext(p)[1]: os.path.getsize(p) for p in glob.glob(os.path.join(path, col.name + ".*"))}
+    files.pop(".sqlite", None)
+    scanned = files[".norms"] + (files[".f32"] if dtype == "float32" else files.get(".f16", 0) + files.get(".i8", 0) + files.get(".scales", 0))
+
+    return {
+        "dtype": dtype,
+        "rescore_factor": rescore,
+        "scanned_bytes_per_chunk": round(scanned / len(ids), 1),
+        "on_disk_bytes_per_chunk": round(sum(files.values()) / len(ids), 1),
+        f"recall_at_{k}": round(sum(recall) / len(recall), 4),
+        "query_p50_ms": round(percentile(latencies, 0.50), 2),
+        "query_p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=100000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("-k", type=int, default=10)
+    args = ap.parse_args()
+
+    vectors, queries = clustered_vectors(args.chunks, args.dim, args.queries)
+    exact = [set(str(j) for j in np.argsort(-(vectors @ q))[:args.k]) for q in queries]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run(tmp, dtype, rescore, vectors, queries, args.k, exact) for dtype, rescore in CONFIGS]
+
+    print(json.dumps({"chunks": args.chunks, "dim": args.dim, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
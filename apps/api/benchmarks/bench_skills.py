@@ -0,0 +1,144 @@
+"""Skill tagging: one regex alternation over every alias vs the token Aho-Corasick gazetteer.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_skills --docs 10000
+    python -m benchmarks.bench_skills --store      # also tag every job stored in VECTORSTORE_BACKEND
+
+Synthetic documents are job postings and resumes (French and English filler)
+with aliases of random gazetteer entries planted in them, written the way
+people write them: any case, hyphenated or run together. Recall is the share
+of planted skills found. The alternation is the previous matcher (longest
+alias first, token boundaries as lookarounds) built over the same aliases;
+agreement is the share of documents where both return the same skills.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+
+from services.parsing.skills import get_gazetteer, load_entries, SKILLS_GAZETTEER, SkillGazetteer, tokenize
+
+FILLER = [
+    "Vous rejoindrez une équipe de huit personnes au sein de la direction technique.",
+    "Nous recherchons un profil autonome, rigoureux et curieux, à l'aise avec les métiers.",
+    "You will work closely with product owners and the business to deliver reliable services.",
+    "Participation aux rituels de l'équipe et à l'amélioration continue des pratiques.",
+    "Led the redesign of the reporting stack, cutting monthly close by three days.",
+    "Mise en place du monitoring et rédaction de la documentation fonctionnelle.",
+    "Strong communication skills and a taste for clean, well-tested code are expected.",
+    "Télétravail partiel possible, mutuelle prise en charge à 100%, tickets restaurant.",
+    "Mentored two junior engineers and ran the weekly architecture review.",
+    "Expérience significative en environnement bancaire ou assurance appréciée.",
+]
+HEADINGS = ["PROFIL", "EXPÉRIENCES PROFESSIONNELLES", "Missions", "Profil recherché", "Skills:", "FORMATION"]
+
+
+def spell(name: str, rng: random.Random) -> str:
+    name = rng.choice([name, name.lower(), name.upper(), name.title()])
+    if " " in name and rng.random() < 0.3:
+        name = name.replace(" ", rng.choice(["-", ""]))
+    return name
+
+
+def make_doc(entries: list[tuple[str, list[str]]], rng: random.Random) -> tuple[str, set[str]]:
+    planted, lines = set(), []
+    for heading in rng.sample(HEADINGS, 4):
+        lines.append(heading)
+        for _ in range(rng.randint(3, 8)):
+            canonical, names = rng.choice(entries)
+            alias = rng.choice(names)
+            planted.add(canonical)
+            sentence = rng.choice(FILLER)
+            cut = sentence.rfind(" ", 0, rng.randint(10, len(sentence) - 1))
+            lines.append(f"- {sentence[:cut]} ({spell(alias, rng)}){sentence[cut:]}")
+        lines.append("")
+    return "\n".join(lines), planted
+
+
+def alternation_matcher(gazetteer: SkillGazetteer):
+    names = {" ".join(tokens): canonical for tokens, canonical in gazetteer.aliases.items()}
+    alternation = "|".join(re.escape(a) for a in sorted(names, key=len, reverse=True))
+    pattern = re.compile(rf"(?<![a-z0-9+#.])(?:{alternation})(?![a-z0-9+#])")
+
+    def extract(text: str) -> list[str]:
+        # same tokens as the gazetteer, re-joined by single spaces, so both see identical input
+        return list(dict.fromkeys(names[m.group()] for m in pattern.finditer(" ".join(tokenize(text)))))
+
+    return extract
+
+
+def run(name: str, extract, docs: list[tuple[str, set[str]]], build_ms: float) -> tuple[dict, list[list[str]]]:
+    t0 = time.perf_counter()
+    found = [extract(text) for text, _ in docs]
+    elapsed = time.perf_counter() - t0
+    planted = sum(len(p) for _, p in docs)
+    megabytes = sum(len(text.encode("utf-8")) for text, _ in docs) / 1e6
+    return {
+        "matcher": name,
+        "build_ms": round(build_ms, 1),
+        "docs_per_s": round(len(docs) / elapsed, 1),
+        "mb_per_s": round(megabytes / elapsed, 2),
+        "ms_per_doc": round(elapsed / len(docs) * 1000, 3),
+        "planted_recall": round(sum(len(p & set(f)) for (_, p), f in zip(docs, found)) / planted, 4),
+        "skills_per_doc": round(sum(len(f) for f in found) / len(docs), 2),
+    }, found
+
+
+def tag_store() -> dict:
+    from services.rag.retrieval import JOB_COLLECTION
+    from services.rag.vectorstore import get_documents
+
+    res = get_documents(JOB_COLLECTION, where={"is_main": True}, include=["documents"])
+    texts = res.get("documents") or []
+    t0 = time.perf_counter()
+    tagged = [get_gazetteer().extract(t) for t in texts]
+    elapsed = time.perf_counter() - t0
+    return {
+        "jobs": len(texts),
+        "tag_ms": round(elapsed * 1000, 1),
+        "skills_per_job": round(sum(len(t) for t in tagged) / max(len(texts), 1), 2),
+    }
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=10000)
+    ap.add_argument("--alternation-docs", type=int, default=1000, help="the alternation is slow; time it on a prefix")
+    ap.add_argument("--store", action="store_true")
+    args = ap.parse_args()
+
+    entries = [(c, names) for c, names in load_entries(SKILLS_GAZETTEER) if names]
+    rng = random.Random(0)
+    docs = [make_doc(entries, rng) for _ in range(args.docs)]
+
+    t0 = time.perf_counter()
+    gazetteer = SkillGazetteer(load_entries(SKILLS_GAZETTEER))
+    automaton_row, automaton_found = run("aho-corasick", gazetteer.extract, docs, (time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    alternation = alternation_matcher(gazetteer)
+    alternation("warm up")  # re compiles lazily on first use
+    prefix = docs[: args.alternation_docs]
+    alternation_row, alternation_found = run("regex alternation", alternation, prefix, (time.perf_counter() - t0) * 1000)
+    alternation_row["docs"] = len(prefix)
+    alternation_row["agreement"] = round(
+        sum(set(a) == set(b) for a, b in zip(automaton_found, alternation_found)) / len(prefix), 4
+    )
+
+    report = {
+        "docs": args.docs,
+        "skills": len(gazetteer.skills),
+        "aliases": gazetteer.size,
+        "results": [automaton_row, alternation_row],
+    }
+    if args.store:
+        report["store"] = tag_store()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,141 @@
+"""Chroma vs the memory-mapped backend: ingest, cold start, query latency, recall.
+
+Run from apps/api:
+
+    python -m benchmarks.bench_vectorstore --chunks 50000 --dim 384
+
+Both backends get the same unit vectors (with job_id / is_main metadata
+shaped like the jobs collection) and the same queries. Vectors are drawn
+around --clusters centres, as in bench_quantization: isotropic random
+vectors in 384 dimensions are all nearly equidistant, which makes any
+approximate index look far worse than it is on real embeddings. Cold start
+is measured in a fresh interpreter: open the store and answer one query.
+Recall@k is against exact brute force, so the mmap backend is 1.0 by
+construction and Chroma's number is its HNSW approximation.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+COLLECTION = "bench"
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def open_collection(backend: str, path: str):
+    if backend == "chroma":
+        import chromadb
+        return chromadb.PersistentClient(path=path).get_or_create_collection(COLLECTION)
+    from services.rag.mmap_store import MmapClient
+    return MmapClient(path).get_or_create_collection(COLLECTION)
+
+
+def clustered_vectors(chunks: int, dim: int, queries: int, clusters: int = 300, seed: int = 0):
+    """Unit vectors and queries drawn around shared centres, so near neighbours stand out like real embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, chunks)] + 0.35 * rng.normal(size=(chunks, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = centres[rng.integers(0, clusters, queries)] + 0.35 * rng.normal(size=(queries, dim)).astype(np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    return vectors, q
+
+
+def make_data(chunks: int, dim: int, queries: int, clusters: int):
+    vectors, q = clustered_vectors(chunks, dim, queries, clusters)
+    ids = [f"job{i // 8}::chunk::{i % 8}" for i in range(chunks)]
+    metas = [{"job_id": f"job{i // 8}", "is_main": False, "chunk_index": i % 8} for i in range(chunks)]
+    return vectors, q, ids, metas
+
+
+def run(backend: str, path: str, vectors, queries, ids, metas, batch: int, k: int, exact: list[set]) -> dict:
+    col = open_collection(backend, path)
+
+    t0 = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        col.upsert(
+            ids=ids[i:i + batch],
+            embeddings=vectors[i:i + batch].tolist() if backend == "chroma" else vectors[i:i + batch],
+            documents=[""] * len(ids[i:i + batch]),
+            metadatas=metas[i:i + batch],
+        )
+    ingest = time.perf_counter() - t0
+
+    latencies, filtered, recall = [], [], []
+    for qi, q in enumerate(queries):
+        t0 = time.perf_counter()
+        res = col.query(query_embeddings=[q.tolist()], n_results=k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        recall.append(len(exact[qi] & set(res["ids"][0])) / k)
+
+        t0 = time.perf_counter()
+        col.query(query_embeddings=[q.tolist()], n_results=k, where={"job_id": f"job{qi % (len(ids) // 8)}"})
+        filtered.append((time.perf_counter() - t0) * 1000)
+
+    cold = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_vectorstore", "--cold", backend, path, "--dim", str(vectors.shape[1])],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, "ANONYMIZED_TELEMETRY": "False"},
+    )
+
+    return {
+        "backend": backend,
+        "ingest_chunks_per_sec": round(len(ids) / ingest, 1),
+        "query_p50_ms": round(percentile(latencies, 0.50), 2),
+        "query_p99_ms": round(percentile(latencies, 0.99), 2),
+        "filtered_query_p50_ms": round(percentile(filtered, 0.50), 2),
+        "filtered_query_p99_ms": round(percentile(filtered, 0.99), 2),
+        f"recall_at_{k}": round(sum(recall) / len(recall), 4),
+        **json.loads(cold.stdout.strip().splitlines()[-1]),
+    }
+
+
+def cold_start(backend: str, path: str, dim: int):
+    # runs in a fresh interpreter: import + open + first query, as a new uvicorn worker would
+    t0 = time.perf_counter()
+    col = open_collection(backend, path)
+    col.query(query_embeddings=[[1.0] + [0.0] * (dim - 1)], n_results=5)
+    print(json.dumps({"cold_start_ms": round((time.perf_counter() - t0) * 1000, 1)}))
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=50000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--clusters", type=int, default=300)
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("-k", type=int, default=10)
+    ap.add_argument("--backends", default="chroma,mmap")
+    ap.add_argument("--cold", nargs=2, metavar=("BACKEND", "PATH"))
+    args = ap.parse_args()
+
+    if args.cold:
+        cold_start(args.cold[0], args.cold[1], args.dim)
+        return
+
+    vectors, queries, ids, metas = make_data(args.chunks, args.dim, args.queries, args.clusters)
+    exact = [set(ids[j] for j in np.argsort(-(vectors @ q))[:args.k]) for q in queries]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends.split(","):
+            path = os.path.join(tmp, backend)
+            results.append(run(backend, path, vectors, queries, ids, metas, args.batch, args.k, exact))
+
+    print(json.dumps({"chunks": args.chunks, "dim": args.dim, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
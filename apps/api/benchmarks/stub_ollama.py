@@ -0,0 +1,156 @@
+"""Stand-in for Ollama's /api/generate with a fixed latency and token rate.
+
+Run from apps/api:
+
+    python -m benchmarks.stub_ollama --port 11435 --ttft-ms 300 --tokens-per-s 40 --tokens 200 --parallel 4
+    OLLAMA_URL=http://127.0.0.1:11435/api/generate python -m uvicorn main:app --port 8000
+
+The reply is valid JSON for the match and apply-kit prompts (told apart by
+their output schema) and plain text for everything else, padded to --tokens
+tokens. Prompts wait for one of --parallel slots like OLLAMA_NUM_PARALLEL,
+then --ttft-ms plus --prompt-ms-per-1k per 1000 prompt tokens before the
+first token. Non-streamed replies carry prompt_eval_duration and eval_count
+in nanoseconds, as Ollama does.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from services.rag.tokens import count_tokens
+
+MATCH_REPLY = {
+    "match_score": 72,
+    "strong_matches": ["Python", "SQL", "Airflow"],
+    "missing_skills": ["Kubernetes"],
+    "recommended_actions": ["Mention the Airflow pipelines in the summary"],
+    "evidence": {"job": ["JOB_MAIN"], "resume": ["RESUME_CHUNK 1", "RESUME_CHUNK 2"]},
+}
+APPLY_KIT_REPLY = {
+    "cv_bullets": ["Built Airflow pipelines on Snowflake"],
+    "why_me_summary": "Data engineer with five years of Python and SQL.",
+    "linkedin_message": "Hello, I would be glad to talk about the data engineer role.",
+    "interview_questions": [{"question": "Describe a pipeline you built.", "suggested_answer": "Airflow and dbt."}],
+    "upskilling_plan_7_days": ["Day 1: Kubernetes basics"],
+    "evidence_used": ["RESUME_CHUNK 1"],
+}
+FILLER = "the candidate has relevant experience with data pipelines and reporting"
+
+config = argparse.Namespace(ttft_ms=300.0, prompt_ms_per_1k=0.0, tokens_per_s=40.0, tokens=200, parallel=4)
+stats = {"requests": 0, "streamed": 0, "busy": 0, "max_busy": 0}
+_slots: asyncio.Semaphore | None = None
+
+app = FastAPI(title="stub-ollama")
+
+
+def reply_tokens(prompt: str, n: int) -> list[str]:
+    """The reply split into n word tokens; the padding goes in a free-text field so the JSON stays valid."""
+    if '"match_score"' in prompt:
+        reply, field = dict(MATCH_REPLY), "notes"
+    elif '"cover_letter_short"' in prompt:
+        reply, field = dict(APPLY_KIT_REPLY), "cover_letter_short"
+    else:
+        reply, field = None, None
+
+    base = (json.dumps({**reply, field: ""}) if reply else "").split(" ")
+    words = FILLER.split(" ")
+    pad = [words[i % len(words)] for i in range(max(n - len(base), 1))]
+    if reply is None:
+        return [w + " " for w in pad]
+    text = json.dumps({**reply, field: " ".join(pad)}, ensure_ascii=False)
+    return [w + " " for w in text.split(" ")]
+
+
+def _slots_sem() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(config.parallel)
+    return _slots
+
+
+async def _generate(prompt: str):
+    """Yield (token, prompt_eval_seconds) while holding a slot, paced at tokens_per_s."""
+    async with _slots_sem():
+        stats["busy"] += 1
+        stats["max_busy"] = max(stats["max_busy"], stats["busy"])
+        try:
+            prompt_eval = (config.ttft_ms + config.prompt_ms_per_1k * count_tokens(prompt) / 1000) / 1000
+            await asyncio.sleep(prompt_eval)
+            t0 = time.perf_counter()
+            for i, token in enumerate(reply_tokens(prompt, config.tokens)):
+                # sleep to the schedule rather than per token, so event loop jitter does not add up
+                delay = t0 + i / config.tokens_per_s - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield token, prompt_eval
+        finally:
+            stats["busy"] -= 1
+
+
+def _done(prompt: str, prompt_eval: float, count: int, started: float) -> dict:
+    return {
+        "model": "stub",
+        "done": True,
+        "total_duration": int((time.perf_counter() - started) * 1e9),
+        "load_duration": 0,
+        "prompt_eval_count": count_tokens(prompt),
+        "prompt_eval_duration": int(prompt_eval * 1e9),
+        "eval_count": count,
+    }
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    body = await request.json()
+    prompt = body.get("prompt", "")
+    started = time.perf_counter()
+    stats["requests"] += 1
+
+    if not body.get("stream", True):
+        tokens, prompt_eval = [], 0.0
+        async for token, prompt_eval in _generate(prompt):
+            tokens.append(token)
+        return JSONResponse({**_done(prompt, prompt_eval, len(tokens), started), "response": "".join(tokens)})
+
+    stats["streamed"] += 1
+
+    async def lines():
+        count, prompt_eval = 0, 0.0
+        async for token, prompt_eval in _generate(prompt):
+            count += 1
+            yield json.dumps({"model": "stub", "response": token, "done": False}) + "\n"
+        yield json.dumps({**_done(prompt, prompt_eval, count, started), "response": ""}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/stats")
+def get_stats():
+    return {**stats, "config": vars(config)}
+
+
+def cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--ttft-ms", type=float, default=config.ttft_ms, help="delay before the first token")
+    ap.add_argument("--prompt-ms-per-1k", type=float, default=config.prompt_ms_per_1k,
+                    help="extra first-token delay per 1000 prompt tokens")
+    ap.add_argument("--tokens-per-s", type=float, default=config.tokens_per_s)
+    ap.add_argument("--tokens", type=int, default=config.tokens, help="tokens per reply")
+    ap.add_argument("--parallel", type=int, default=config.parallel, help="concurrent generations, like OLLAMA_NUM_PARALLEL")
+    args = ap.parse_args()
+    for k in vars(config):
+        setattr(config, k, getattr(args, k))
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    cli()
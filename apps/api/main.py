@@ -1,18 +1,52 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from routers.resume import router as resume_router
 from routers.rag import router as rag_router
 from dotenv import load_dotenv
 from routers.assistant import router as assistant_router
 from routers.job import router as job_router
 from routers.apply import router as apply_router
+from routers.tasks import router as tasks_router
 from fastapi.middleware.cors import CORSMiddleware
+from services.embeddings.provider import warmup as warmup_embeddings, embedding_stats
+from services.llm.ollama_client import close_client as close_ollama_client
+from services.llm.cache import get_llm_cache
+from services.observability.metrics import ServerTimingMiddleware, render_metrics
+from services.parsing.pdf import start_pool as start_pdf_pool, shutdown_pool as shutdown_pdf_pool
+from services.tasks.queue import get_task_queue, start_task_queue, stop_task_queue
 
 load_dotenv()
 
+logger = logging.getLogger("pathfinder")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("EMBEDDINGS_WARMUP", "1") == "1":
+        try:
+            stats = await run_in_threadpool(warmup_embeddings)
+            logger.info("Embedding backend ready: %s", stats)
+        except Exception as e:
+            # the API stays up; the first embedding call will retry the load
+            logger.warning("Embedding warm-up failed: %s", e)
+    await run_in_threadpool(start_pdf_pool)
+    start_task_queue()
+    yield
+    await stop_task_queue()
+    await close_ollama_client()
+    shutdown_pdf_pool()
+
+
 app = FastAPI(
     title="PathFinder",
     description="AI-powered Career Intelligence Platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -24,7 +58,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lets the web client read per-stage timings
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(ServerTimingMiddleware)
 
 
 app.include_router(resume_router)
@@ -32,8 +69,24 @@ app.include_router(rag_router)
 app.include_router(assistant_router)
 app.include_router(job_router)
 app.include_router(apply_router)
+app.include_router(tasks_router)
 
 
 @app.get("/")
 def health():
-    return {"status": "ok", "service": "api"}
\ No newline at end of file
+    return {"status": "ok", "service": "api"}
+
+
+@app.get("/status")
+def status():
+    llm_cache = get_llm_cache()
+    return {
+        "embeddings": embedding_stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "tasks": get_task_queue().stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
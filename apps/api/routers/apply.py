@@ -1,83 +1,43 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-import requests
-import os
-import json
-import re
 
-from services.llm.ollama_client import ollama_generate
+from services.llm.cache import stream_cached
+from services.llm.prompts import is_json_reply
+from services.llm.sse import sse_event, sse_response, stream_llm
+from services.matching.pipeline import prepare_match, apply_kit_prompt, finish_apply_kit, llm_cache_tags, run_apply_kit
 
 router = APIRouter(prefix="/apply", tags=["Apply"])
 
 class ApplyKitRequest(BaseModel):
     job_id: str
+    candidate_id: str
     top_k_resume: int = Field(default=6, ge=1, le=12)
     tone: str = Field(default="professional")
+    # also return the /job/match analysis, generated concurrently from the same retrieval
+    include_match: bool = False
 
 @router.post("/kit")
-def apply_kit(req: ApplyKitRequest):
-    # Call your own API /job/match to reuse existing retrieval logic
-    api_base = os.getenv("API_BASE", "http://127.0.0.1:8000")
-
-    try:
-        r = requests.post(
-            f"{api_base}/job/match",
-            json={"job_id": req.job_id, "top_k_resume": req.top_k_resume},
-            timeout=300
-        )
-        r.raise_for_status()
-        match_payload = r.json()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to call /job/match: {str(e)}")
-
-    job_ctx = match_payload.get("job_context_used", "")
-    resume_ctx = match_payload.get("resume_context_used", [])
-
-    if not job_ctx or not resume_ctx:
-        raise HTTPException(status_code=400, detail="Missing context. Ensure job is uploaded and resume is indexed.")
-
-    prompt = f"""
-You are a senior recruiter + career coach.
-
-TASK:
-Generate an "Apply Kit" tailored to this job, using ONLY the resume evidence provided.
-If something is missing, DO NOT invent it. Propose how to close the gap.
-
-Return STRICT JSON ONLY with this exact schema:
-
-{{
-  "cv_bullets": ["..."],
-  "why_me_summary": "string",
-  "cover_letter_short": "string",
-  "linkedin_message": "string",
-  "interview_questions": [{{"question":"...", "suggested_answer":"..."}}],
-  "upskilling_plan_7_days": ["..."],
-  "evidence_used": ["RESUME_CHUNK 1", "RESUME_CHUNK 2"]
-}}
-
-TONE: {req.tone}
-
-JOB CONTEXT:
-{job_ctx}
-
-RESUME CONTEXT:
-{chr(10).join(resume_ctx)}
-""".strip()
-
-    llm_out = ollama_generate(prompt)
-
-    match = re.search(r"\{.*\}", llm_out, re.DOTALL)
-    if not match:
-        return {"job_id": req.job_id, "raw_llm": llm_out, "error": "LLM did not return JSON."}
-
-    try:
-        data = json.loads(match.group(0))
-    except Exception:
-        return {"job_id": req.job_id, "raw_llm": llm_out, "error": "Failed to parse JSON."}
-
-    return {
-        "job_id": req.job_id,
-        "result": data,
-        "job_context_used": job_ctx,
-        "resume_context_used": resume_ctx
-    }
+async def apply_kit(req: ApplyKitRequest):
+    return await run_apply_kit(req.job_id, req.top_k_resume, req.candidate_id, req.tone, include_match=req.include_match)
+
+@router.post("/kit/stream")
+async def apply_kit_stream(req: ApplyKitRequest):
+    ctx = await run_in_threadpool(prepare_match, req.job_id, req.top_k_resume, req.candidate_id)
+
+    async def events():
+        yield sse_event("evidence", {
+            "job_id": ctx["job_id"],
+            "candidate_id": ctx["candidate_id"],
+            "job_context_used": ctx["job_context_used"],
+            "resume_context_used": ctx["resume_context_used"],
+        })
+        state = {}
+        prompt = apply_kit_prompt(ctx, req.tone)
+        async for event in stream_llm(
+            stream_cached(prompt, tags=llm_cache_tags(ctx), state=state, validate=is_json_reply),
+            lambda llm_out: finish_apply_kit(ctx, llm_out, state["cached"], prompt),
+        ):
+            yield event
+
+    return sse_response(events())
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from services.embeddings.provider import embed_texts
-from services.rag.vectorstore import query_collection
-from services.llm.ollama_client import ollama_generate
+from services.rag.retrieval import candidate_where, search_chunks
+from services.llm.ollama_client import ollama_generate, ollama_generate_stream
+from services.llm.sse import sse_event, sse_response, stream_llm
+from services.llm.prompts import build_answer_prompt
+from services.rag.context import PROMPT_ANSWER_TOKENS, pack_chunks
+from services.rag.tokens import count_tokens
 
 router = APIRouter(prefix="/assistant", tags=["Assistant"])
 COLLECTION = "resumes"
@@ -11,43 +16,55 @@ COLLECTION = "resumes"
 class AnswerRequest(BaseModel):
     question: str
     top_k: int = 5
+    candidate_id: str | None = None
 
-@router.post("/answer")
-def answer(req: AnswerRequest):
+def _retrieve_context(req: AnswerRequest):
     if not req.question.strip():
         raise HTTPException(status_code=400, detail="Empty question.")
 
     q_emb = embed_texts([req.question])[0]
-    res = query_collection(COLLECTION, q_emb, top_k=req.top_k)
-
-    docs = res.get("documents", [[]])[0]
-    metas = res.get("metadatas", [[]])[0]
+    hits = search_chunks(COLLECTION, req.question, q_emb, req.top_k, where=candidate_where(req.candidate_id))
 
+    packed, _ = pack_chunks([h["document"] for h in hits], PROMPT_ANSWER_TOKENS)
     context_blocks = []
-    for i, (doc, meta) in enumerate(zip(docs, metas), start=1):
-        context_blocks.append(f"[CHUNK {i} | {meta}] \n{doc}")
+    for n, (k, text) in enumerate(packed, start=1):
+        # without a candidate filter the chunks may come from several resumes
+        owner = "" if req.candidate_id else f" | candidate {hits[k]['metadata'].get('candidate_id')}"
+        context_blocks.append(f"[CHUNK {n}{owner}]\n{text}")
 
     context = "\n\n".join(context_blocks)
 
-    prompt = f"""
-You are a career assistant. Answer the user's question using ONLY the information in the context.
-If the context does not contain enough information, say so.
-
-Return:
-1) Answer (concise)
-2) Evidence: cite the chunk numbers you used (e.g., CHUNK 1, CHUNK 3)
-
-QUESTION:
-{req.question}
+    prompt = build_answer_prompt(req.question, context)
 
-CONTEXT:
-{context}
-""".strip()
+    return prompt, context_blocks
 
-    response = ollama_generate(prompt)
+@router.post("/answer")
+async def answer(req: AnswerRequest):
+    prompt, context_blocks = await run_in_threadpool(_retrieve_context, req)
+    response = await ollama_generate(prompt)
 
     return {
         "question": req.question,
         "answer": response,
-        "chunks_used": context_blocks
+        "chunks_used": context_blocks,
+        "prompt_tokens": count_tokens(prompt),
     }
+
+@router.post("/answer/stream")
+async def answer_stream(req: AnswerRequest):
+    prompt, context_blocks = await run_in_threadpool(_retrieve_context, req)
+
+    async def events():
+        yield sse_event("evidence", {"question": req.question, "chunks_used": context_blocks})
+        async for event in stream_llm(
+            ollama_generate_stream(prompt),
+            lambda response: {
+                "question": req.question,
+                "answer": response,
+                "chunks_used": context_blocks,
+                "prompt_tokens": count_tokens(prompt),
+            },
+        ):
+            yield event
+
+    return sse_response(events())
@@ -1,24 +1,47 @@
 from __future__ import annotations
 
+import os
 import uuid
+import asyncio
 import json
-import re
-
-from fastapi import APIRouter, HTTPException, Form
-from pydantic import BaseModel
-
-from services.rag.chunking import chunk_text
-from services.embeddings.provider import embed_texts
-from services.rag.vectorstore import upsert_documents, query_collection
-from services.llm.ollama_client import ollama_generate
+import logging
+import time
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Form, Request
+from starlette.requests import ClientDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from services.rag.chunking import chunk_document
+from services.rag.indexing import apply_sync, chunk_ids, content_hash, plan_sync
+from services.rag.retrieval import (
+    JOB_COLLECTION,
+    clean_candidate_id,
+    load_job,
+    load_job_chunk_embeddings,
+    load_resume_embeddings,
+)
+from services.llm.cache import stream_cached, invalidate as invalidate_llm_cache
+from services.llm.prompts import is_json_reply
+from services.llm.sse import sse_event, sse_response, stream_llm
+from services.matching.fast import fast_match
+from services.matching.pipeline import prepare_match, finish_match, llm_cache_tags, run_match
+from services.matching.ranking import rank_jobs_for_vectors, rank_candidates_for_vectors
+from services.tasks.queue import QueueFull, get_task_queue
 
 router = APIRouter(prefix="/job", tags=["Job"])
+logger = logging.getLogger("pathfinder")
 
-JOB_COLLECTION = "jobs"
-RESUME_COLLECTION = "resumes"
+# texts (main descriptions + chunks) embedded and upserted per round-trip in /job/bulk
+JOB_BULK_EMBED_BATCH = int(os.getenv("JOB_BULK_EMBED_BATCH", "256"))
+JOB_BULK_MAX_LINE_BYTES = int(os.getenv("JOB_BULK_MAX_LINE_BYTES", str(1024 * 1024)))
 
 
 class JobUploadRequest(BaseModel):
+    # set to re-upload an existing job: only changed chunks are re-embedded
+    job_id: str | None = None
     title: str
     company: str | None = None
     location: str | None = None
@@ -26,93 +49,114 @@ class JobUploadRequest(BaseModel):
 
 class MatchRequest(BaseModel):
     job_id: str
+    candidate_id: str
+    top_k_resume: int = 6
+    # fast: deterministic skill overlap + embedding coverage, no LLM call
+    mode: Literal["llm", "fast"] = "llm"
+    # with mode=fast, queue the LLM analysis as a background task so a later mode=llm call is a cache hit
+    warm_llm: bool = False
+
+class RankRequest(BaseModel):
+    candidate_id: str
+    top_n: int = Field(default=50, ge=1, le=1000)
+    location: str | None = None
+    company: str | None = None
+    # run the LLM match only for the best few jobs
+    explain_top_n: int = Field(default=0, ge=0, le=10)
     top_k_resume: int = 6
 
+class CandidatesRequest(BaseModel):
+    job_id: str
+    top_n: int = Field(default=50, ge=1, le=1000)
+    # restrict ranking to a shortlist; all indexed candidates otherwise
+    candidate_ids: list[str] | None = None
+    explain_top_n: int = Field(default=0, ge=0, le=10)
+    top_k_resume: int = 6
 
 
-def _store_job_main(job_id: str, title: str, company: str | None, location: str | None, description: str):
 
-    main_id = f"{job_id}::main"
-    main_meta = {
-        "job_id": job_id,
-        "is_main": True,
-        "title": title,
-        "company": company,
-        "location": location,
-    }
-    upsert_documents(
-        collection_name=JOB_COLLECTION,
-        ids=[main_id],
-        documents=[description],
-        embeddings=embed_texts([description]),
-        metadatas=[main_meta],
-    )
+def _clean_job_fields(title: str | None, description: str | None) -> tuple[str, str]:
+    title = (title or "").strip()
+    description = (description or "").strip()
+
+    if not title:
+        raise HTTPException(status_code=400, detail="Job title is required.")
+    if not description:
+        raise HTTPException(status_code=400, detail="Job description is required.")
+    return title, description
 
-def _store_job_chunks(job_id: str, title: str, company: str | None, location: str | None, description: str):
-    chunks = chunk_text(description, max_chars=900, overlap=150)
+def _clean_job_id(job_id: str | None) -> tuple[str, bool]:
+    """(job_id, is_reupload); a new uuid when no id is given."""
+    if job_id is None:
+        return str(uuid.uuid4()), False
+    job_id = job_id.strip()
+    if not job_id:
+        raise HTTPException(status_code=400, detail="job_id must not be empty.")
+    if "::" in job_id:
+        raise HTTPException(status_code=400, detail="job_id must not contain '::'.")
+    return job_id, True
+
+def _build_job_documents(job_id: str, title: str, company: str | None, location: str | None, description: str):
+    chunks = chunk_document(description)
     if not chunks:
         raise HTTPException(status_code=422, detail="Chunking produced no text.")
 
-    embeddings = embed_texts(chunks)
-    ids = [f"{job_id}::chunk::{i}" for i in range(len(chunks))]
-    metadatas = [
-        {
-            "job_id": job_id,
-            "is_main": False,
-            "chunk_index": i,
-            "title": title,
-            "company": company,
-            "location": location,
-        }
-        for i in range(len(chunks))
+    # Chroma rejects None metadata values
+    base_meta = {k: v for k, v in {"job_id": job_id, "title": title, "company": company, "location": location}.items() if v is not None}
+    chunk_id_list, hashes = chunk_ids(job_id, chunks)
+    # the main document carries the embedding of the full description, reused by /job/match;
+    # chunk ids are content hashes, so the main document lists them in order
+    ids = [f"{job_id}::main"] + chunk_id_list
+    documents = [description] + chunks
+    metadatas = [{
+        **base_meta,
+        "is_main": True,
+        "chunk_count": len(chunks),
+        "chunk_ids": json.dumps(chunk_id_list),
+        "content_hash": content_hash(description),
+    }] + [
+        {**base_meta, "is_main": False, "chunk_index": i, "content_hash": h}
+        for i, h in enumerate(hashes)
     ]
+    return ids, documents, metadatas
 
-    upsert_documents(
-        collection_name=JOB_COLLECTION,
-        ids=ids,
-        documents=chunks,
-        embeddings=embeddings,
-        metadatas=metadatas,
-    )
-    return len(chunks)
-
-def _load_job_main(job_id: str) -> str | None:
-    q_emb = embed_texts([f"MAIN JOB DESCRIPTION {job_id}"])[0]
-    res = query_collection(JOB_COLLECTION, q_emb, top_k=15)
-    docs = res.get("documents", [[]])[0]
-    metas = res.get("metadatas", [[]])[0]
+def _store_jobs(jobs: list[tuple[tuple[list, list, list], bool]]) -> list[dict]:
+    """Index (documents, is_reupload) pairs; re-uploads are diffed against the stored job.
 
-    for d, m in zip(docs, metas):
-        if m and m.get("job_id") == job_id and m.get("is_main") is True:
-            return d
-    return None
+    One embedding call and one upsert cover every new or changed document of
+    every job in the batch. Counts include the main description.
+    """
+    plans = [
+        plan_sync(JOB_COLLECTION, *docs, where={"job_id": docs[2][0]["job_id"]} if reupload else None)
+        for docs, reupload in jobs
+    ]
+    stats = apply_sync(JOB_COLLECTION, plans)
 
-def _parse_json_from_llm(text: str):
-    try:
-        match = re.search(r"\{[\s\S]*\}", text)
-        if not match:
-            return None
-        return json.loads(match.group(0))
-    except Exception:
-        return None
+    for (docs, _), s in zip(jobs, stats):
+        if s["changed"]:
+            invalidate_llm_cache(f"job:{docs[2][0]['job_id']}")
+    return [
+        {
+            "chunks_indexed": len(docs[0]) - 1,
+            "chunks_embedded": s["embedded"],
+            "chunks_deleted": s["deleted"],
+        }
+        for (docs, _), s in zip(jobs, stats)
+    ]
 
+def _store_job(job_id: str, reupload: bool, title: str, company: str | None, location: str | None, description: str) -> dict:
+    job = _build_job_documents(job_id, title, company, location, description)
+    return _store_jobs([(job, reupload)])[0]
 
 @router.post("/upload")
 def upload_job(req: JobUploadRequest):
-    title = (req.title or "").strip()
-    description = (req.description or "").strip()
-
-    if not title:
-        raise HTTPException(status_code=400, detail="Job title is required.")
-    if not description:
-        raise HTTPException(status_code=400, detail="Job description is required.")
+    title, description = _clean_job_fields(req.title, req.description)
 
-    job_id = str(uuid.uuid4())
+    job_id, reupload = _clean_job_id(req.job_id)
 
-    _store_job_main(job_id, title, req.company, req.location, description)
-    chunks_indexed = _store_job_chunks(job_id, title, req.company, req.location, description)
+    stats = _store_job(job_id, reupload, title, req.company, req.location, description)
 
-    return {"job_id": job_id, "chunks_indexed": chunks_indexed}
+    return {"job_id": job_id, **stats}
 
 
 @router.post("/upload_text")
@@ -121,85 +165,264 @@ def upload_job_text(
     company: str | None = Form(None),
     location: str | None = Form(None),
     description: str = Form(...),
+    job_id: str | None = Form(None),
 ):
-    title = (title or "").strip()
-    description = (description or "").strip()
+    title, description = _clean_job_fields(title, description)
+
+    job_id, reupload = _clean_job_id(job_id)
+
+    stats = _store_job(job_id, reupload, title, company, location, description)
+
+    return {"job_id": job_id, **stats}
 
-    if not title:
-        raise HTTPException(status_code=400, detail="Job title is required.")
-    if not description:
-        raise HTTPException(status_code=400, detail="Job description is required.")
 
-    job_id = str(uuid.uuid4())
+class _UploadStreamingResponse(StreamingResponse):
+    """StreamingResponse whose generator reads the request body while the response is sent.
 
-    _store_job_main(job_id, title, company, location, description)
-    chunks_indexed = _store_job_chunks(job_id, title, company, location, description)
+    Starlette's disconnect listener shares receive() with request.stream() and
+    would swallow body messages, so it only starts once the body is consumed.
+    """
 
-    return {"job_id": job_id, "chunks_indexed": chunks_indexed}
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive):
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+
+async def _iter_ndjson_lines(chunks):
+    """Yield raw lines as body chunks arrive; None marks a line over JOB_BULK_MAX_LINE_BYTES."""
+    buf = bytearray()
+    skipping = False
+    async for part in chunks:
+        buf += part
+        start = 0
+        while (end := buf.find(b"\n", start)) >= 0:
+            line = bytes(buf[start:end + 1])
+            start = end + 1
+            if skipping:
+                # the tail of an oversized line, already reported
+                skipping = False
+            else:
+                yield None if len(line) > JOB_BULK_MAX_LINE_BYTES else line
+        del buf[:start]
+        if len(buf) > JOB_BULK_MAX_LINE_BYTES:
+            # discard the rest of the oversized line without buffering it
+            if not skipping:
+                skipping = True
+                yield None
+            buf.clear()
+    if buf and not skipping:
+        yield bytes(buf)
+
+
+def _ndjson(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _flush_bulk(pending: list, stats: dict):
+    try:
+        stored = await run_in_threadpool(_store_jobs, [(job, reupload) for _, _, job, reupload in pending])
+    except Exception as e:
+        for line_no, job_id, _, _ in pending:
+            stats["errors"] += 1
+            yield _ndjson({"event": "error", "line": line_no, "job_id": job_id, "detail": f"Indexing failed: {str(e)}"})
+    else:
+        for (line_no, job_id, _, _), job_stats in zip(pending, stored):
+            stats["jobs_indexed"] += 1
+            stats["chunks_indexed"] += job_stats["chunks_indexed"]
+            stats["chunks_embedded"] += job_stats["chunks_embedded"]
+            yield _ndjson({"event": "job", "line": line_no, "job_id": job_id, **job_stats})
+    pending.clear()
+    yield _ndjson({"event": "progress", **stats})
+
+
+@router.post("/bulk")
+async def bulk_upload_jobs(request: Request):
+    """Index a JSONL/NDJSON stream of jobs (one JobUploadRequest object per line).
+
+    Lines are processed as the body arrives, and jobs are embedded and
+    upserted in batches of about JOB_BULK_EMBED_BATCH texts, so memory stays
+    bounded by one batch and results start before the upload ends. The
+    response is NDJSON as well: a "job" or "error" event per input line, a
+    "progress" event after every batch and a final "done" event.
+    """
+    body_read = asyncio.Event()
+
+    async def body():
+        try:
+            async for part in request.stream():
+                yield part
+        finally:
+            body_read.set()
+
+    async def results():
+        stats = {"lines": 0, "jobs_indexed": 0, "chunks_indexed": 0, "chunks_embedded": 0, "errors": 0}
+        pending = []
+        pending_texts = 0
+
+        async for raw in _iter_ndjson_lines(body()):
+            if raw is not None and not raw.strip():
+                continue
+            stats["lines"] += 1
+            line_no = stats["lines"]
+
+            try:
+                if raw is None:
+                    raise ValueError(f"Line exceeds {JOB_BULK_MAX_LINE_BYTES} bytes.")
+                req = JobUploadRequest.model_validate(json.loads(raw))
+                title, description = _clean_job_fields(req.title, req.description)
+                job_id, reupload = _clean_job_id(req.job_id)
+                job = _build_job_documents(job_id, title, req.company, req.location, description)
+            except HTTPException as e:
+                stats["errors"] += 1
+                yield _ndjson({"event": "error", "line": line_no, "detail": e.detail})
+                continue
+            except ValueError as e:
+                stats["errors"] += 1
+                yield _ndjson({"event": "error", "line": line_no, "detail": str(e)})
+                continue
+
+            if reupload and any(p[1] == job_id for p in pending):
+                # a job listed twice is diffed against its first version, so that one must be stored first
+                async for out in _flush_bulk(pending, stats):
+                    yield out
+                pending_texts = 0
+            pending.append((line_no, job_id, job, reupload))
+            pending_texts += len(job[1])
+            if pending_texts >= JOB_BULK_EMBED_BATCH:
+                async for out in _flush_bulk(pending, stats):
+                    yield out
+                pending_texts = 0
+
+        if pending:
+            async for out in _flush_bulk(pending, stats):
+                yield out
+        yield _ndjson({"event": "done", **stats})
+
+    async def guarded():
+        try:
+            async for out in results():
+                yield out
+        except ClientDisconnect:
+            # the client went away mid-upload; batches already flushed stay indexed
+            logger.info("Bulk upload aborted by the client")
+
+    return _UploadStreamingResponse(guarded(), body_read, media_type="application/x-ndjson")
 
 
 @router.post("/match")
-def match_job(req: MatchRequest):
-    job_id = (req.job_id or "").strip()
-    if not job_id:
-        raise HTTPException(status_code=400, detail="job_id is required.")
-
-    job_full = _load_job_main(job_id)
-    if not job_full:
-        raise HTTPException(status_code=404, detail="Job not found. Upload the job first via /job/upload_text or /job/upload.")
-
-    resume_q_emb = embed_texts([job_full])[0]
-    resume_res = query_collection(RESUME_COLLECTION, resume_q_emb, top_k=req.top_k_resume)
-
-    resume_docs = resume_res.get("documents", [[]])[0]
-    resume_metas = resume_res.get("metadatas", [[]])[0]
-
-    if not resume_docs:
-        raise HTTPException(status_code=400, detail="No resume indexed. Please index a resume first using /rag/index_resume.")
-    
-    job_block = f"[JOB_MAIN]\n{job_full}"
-
-    resume_blocks = []
-    for i, (doc, meta) in enumerate(zip(resume_docs, resume_metas), start=1):
-        resume_blocks.append(f"[RESUME_CHUNK {i} | {meta}]\n{doc}")
-
-    prompt = f"""
-You are a career matching assistant.
-You MUST base your analysis ONLY on the provided JOB context and RESUME context.
-If something is missing, say it clearly.
-
-IMPORTANT RULES:
-- Do NOT put a skill in "missing_skills" if it appears in RESUME context.
-- Evidence must cite chunk labels only (e.g., "RESUME_CHUNK 2"), not raw text.
-- Return STRICT JSON only. No markdown, no explanations outside JSON.
-
-Return:
-{{
-  "match_score": 0-100,
-  "strong_matches": [strings],
-  "missing_skills": [strings],
-  "recommended_actions": [strings],
-  "evidence": {{
-     "job": ["JOB_MAIN"],
-     "resume": ["RESUME_CHUNK 2", "RESUME_CHUNK 4"]
-  }},
-  "notes": "short explanation"
-}}
-
-JOB CONTEXT:
-{job_block}
-
-RESUME CONTEXT:
-{chr(10).join(resume_blocks)}
-""".strip()
-
-    llm_out = ollama_generate(prompt)
-    parsed = _parse_json_from_llm(llm_out)
-
-    return {
-        "job_id": job_id,
-        "result": parsed,
-        "raw_llm": llm_out,
-        "job_context_used": job_block[:1500],
-        "resume_context_used": resume_blocks,
-    }
+async def match_job(req: MatchRequest):
+    if req.mode == "llm":
+        return await run_match(req.job_id, req.top_k_resume, req.candidate_id)
+
+    out = await run_in_threadpool(fast_match, req.job_id, req.candidate_id)
+    out["llm_pending"] = False
+    if req.warm_llm:
+        # below interactive tasks; the result lands in the LLM cache and on GET /tasks/{llm_task_id}
+        params = {"job_id": out["job_id"], "candidate_id": out["candidate_id"], "top_k_resume": req.top_k_resume}
+        try:
+            task, _ = await get_task_queue().submit("match", params, priority=-1)
+            out["llm_pending"] = True
+            out["llm_task_id"] = task["task_id"]
+        except QueueFull as e:
+            logger.warning("LLM warm-up for job %s not queued: %s", out["job_id"], e)
+    return out
+
+
+@router.post("/match/stream")
+async def match_job_stream(req: MatchRequest):
+    if req.mode != "llm":
+        raise HTTPException(status_code=400, detail="Only mode=llm is streamed; use /job/match for mode=fast.")
+    ctx = await run_in_threadpool(prepare_match, req.job_id, req.top_k_resume, req.candidate_id)
+
+    async def events():
+        yield sse_event("evidence", {
+            "job_id": ctx["job_id"],
+            "candidate_id": ctx["candidate_id"],
+            "job_context_used": ctx["job_context_used"],
+            "resume_context_used": ctx["resume_context_used"],
+        })
+        t0 = time.perf_counter()
+        state = {}
+        async for event in stream_llm(
+            stream_cached(ctx["prompt"], tags=llm_cache_tags(ctx), state=state, validate=is_json_reply),
+            lambda llm_out: finish_match(ctx, llm_out, t0, state["cached"]),
+        ):
+            yield event
+
+    return sse_response(events())
+
+
+async def _explain(results: list[dict], matches) -> None:
+    # matches: one run_match coroutine per result, in order
+    explanations = await asyncio.gather(*matches, return_exceptions=True)
+    for r, out in zip(results, explanations):
+        if isinstance(out, Exception):
+            r["explanation_error"] = getattr(out, "detail", None) or str(out)
+        else:
+            r["explanation"] = out["result"]
+            r["explanation_cached"] = out["cached"]
+
+
+def _rank_jobs(req: RankRequest) -> dict:
+    candidate_id = clean_candidate_id(req.candidate_id)
+    resume_vectors = load_resume_embeddings({"candidate_id": candidate_id})
+    if not len(resume_vectors):
+        raise HTTPException(status_code=404, detail="Resume not indexed. Index it first using /rag/index_resume.")
+
+    ranked = rank_jobs_for_vectors(
+        resume_vectors,
+        req.top_n,
+        filters={"location": req.location, "company": req.company},
+    )
+    return {"candidate_id": candidate_id, **ranked}
+
+
+@router.post("/rank")
+async def rank_jobs(req: RankRequest):
+    ranked = await run_in_threadpool(_rank_jobs, req)
+
+    if req.explain_top_n:
+        top = ranked["results"][:req.explain_top_n]
+        await _explain(top, (run_match(r["job_id"], req.top_k_resume, ranked["candidate_id"]) for r in top))
+
+    return ranked
+
+
+def _rank_candidates(req: CandidatesRequest) -> dict:
+    job = load_job((req.job_id or "").strip(), with_embedding=True)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    # each requirement chunk should be covered by some part of the resume
+    job_vectors = load_job_chunk_embeddings(job)
+    if not len(job_vectors) and job.get("embedding") is not None:
+        job_vectors = [job["embedding"]]
+    if not len(job_vectors):
+        raise HTTPException(status_code=400, detail="Job has no embeddings. Re-upload it using /job/upload.")
+
+    candidate_ids = [clean_candidate_id(c) for c in req.candidate_ids] if req.candidate_ids else None
+    ranked = rank_candidates_for_vectors(job_vectors, req.top_n, candidate_ids)
+    return {"job_id": job["job_id"], **ranked}
+
+
+@router.post("/candidates")
+async def rank_candidates(req: CandidatesRequest):
+    ranked = await run_in_threadpool(_rank_candidates, req)
+
+    if req.explain_top_n:
+        top = ranked["results"][:req.explain_top_n]
+        await _explain(top, (run_match(ranked["job_id"], req.top_k_resume, r["candidate_id"]) for r in top))
+
+    return ranked
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = load_job(job_id.strip())
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import uuid
+
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import fitz
 
-from services.rag.chunking import chunk_text
+from services.rag.chunking import chunk_document
+from services.parsing.pdf import extract_upload_text
 from services.embeddings.provider import embed_texts
-from services.rag.vectorstore import upsert_documents, query_collection
+from services.rag.indexing import apply_sync, chunk_ids, plan_sync
+from services.rag.retrieval import clean_candidate_id, candidate_where, search_chunks
+from services.llm.cache import invalidate as invalidate_llm_cache
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
@@ -13,43 +18,41 @@ COLLECTION = "resumes"
 class QueryRequest(BaseModel):
     question: str
     top_k: int = 5
+    candidate_id: str | None = None
 
-@router.post("/index_resume")
-async def index_resume(file: UploadFile = File(...)):
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Please upload a PDF file.")
-
-    pdf_bytes = await file.read()
-    if not pdf_bytes:
-        raise HTTPException(status_code=400, detail="Empty file.")
-
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = "\n".join([page.get_text("text") for page in doc]).strip()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF parsing failed: {str(e)}")
-
-    if not text:
-        raise HTTPException(status_code=422, detail="No extractable text found in the PDF.")
-
-    chunks = chunk_text(text, max_chars=900, overlap=150)
+def _index_text(candidate_id: str, filename: str, text: str) -> dict:
+    chunks = chunk_document(text)
     if not chunks:
         raise HTTPException(status_code=422, detail="Chunking produced no text.")
 
-    embeddings = embed_texts(chunks)
-
-    ids = [f"{file.filename}::chunk::{i}" for i in range(len(chunks))]
-    metadatas = [{"filename": file.filename, "chunk_index": i} for i in range(len(chunks))]
+    # one namespace per candidate; ids are content hashes, so re-indexing an edited
+    # resume embeds only the chunks that changed and deletes the ones that are gone
+    ids, hashes = chunk_ids(candidate_id, chunks)
+    metadatas = [
+        {"candidate_id": candidate_id, "filename": filename, "chunk_index": i, "content_hash": h}
+        for i, h in enumerate(hashes)
+    ]
+    plan = plan_sync(COLLECTION, ids, chunks, metadatas, where=candidate_where(candidate_id))
+    stats = apply_sync(COLLECTION, [plan])[0]
+
+    if stats["embedded"] or stats["deleted"]:
+        # match / apply-kit results were generated from the previous resume chunks
+        invalidate_llm_cache(f"candidate:{candidate_id}")
+    return {
+        "chunks_indexed": len(chunks),
+        "chunks_embedded": stats["embedded"],
+        "chunks_unchanged": stats["unchanged"],
+        "chunks_deleted": stats["deleted"],
+    }
 
-    upsert_documents(
-        collection_name=COLLECTION,
-        ids=ids,
-        documents=chunks,
-        embeddings=embeddings,
-        metadatas=metadatas,
-    )
+@router.post("/index_resume")
+async def index_resume(file: UploadFile = File(...), candidate_id: str | None = Form(None)):
+    candidate_id = clean_candidate_id(candidate_id) if candidate_id is not None else uuid.uuid4().hex
+    text = await extract_upload_text(file)
+    # embedding + upsert are blocking too; keep them off the event loop
+    stats = await run_in_threadpool(_index_text, candidate_id, file.filename, text)
 
-    return {"filename": file.filename, "chunks_indexed": len(chunks)}
+    return {"candidate_id": candidate_id, "filename": file.filename, **stats}
 
 @router.post("/query")
 def rag_query(req: QueryRequest):
@@ -57,18 +60,17 @@ def rag_query(req: QueryRequest):
         raise HTTPException(status_code=400, detail="Empty question.")
 
     q_emb = embed_texts([req.question])[0]
-    res = query_collection(COLLECTION, q_emb, top_k=req.top_k)
-
-    docs = res.get("documents", [[]])[0]
-    metas = res.get("metadatas", [[]])[0]
-    dists = res.get("distances", [[]])[0]
+    hits = search_chunks(COLLECTION, req.question, q_emb, req.top_k, where=candidate_where(req.candidate_id))
 
     results = []
-    for doc, meta, dist in zip(docs, metas, dists):
+    for h in hits:
         results.append({
-            "text": doc,
-            "meta": meta,
-            "distance": dist
+            "text": h["document"],
+            "meta": h["metadata"],
+            "distance": h["distance"],
+            "score": h.get("score"),
+            "vector_rank": h.get("vector_rank"),
+            "lexical_rank": h.get("lexical_rank"),
         })
 
-    return {"question": req.question, "results": results}
+    return {"question": req.question, "candidate_id": req.candidate_id, "results": results}
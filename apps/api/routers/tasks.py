@@ -0,0 +1,121 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+from services.llm.sse import sse_event, sse_response
+from services.matching.pipeline import run_apply_kit, run_match
+from services.tasks.queue import FINISHED, QueueFull, get_task_queue, register_handler
+
+router = APIRouter(prefix="/tasks", tags=["Tasks"])
+
+# how long an SSE subscriber waits for a status change before sending a keep-alive
+KEEPALIVE_SECONDS = 15
+
+
+class MatchTaskRequest(BaseModel):
+    job_id: str
+    candidate_id: str
+    top_k_resume: int = 6
+    # higher runs first; /job/match?warm_llm=true queues at -1
+    priority: int = Field(default=0, ge=-10, le=10)
+
+class ApplyKitTaskRequest(BaseModel):
+    job_id: str
+    candidate_id: str
+    top_k_resume: int = Field(default=6, ge=1, le=12)
+    tone: str = Field(default="professional")
+    include_match: bool = False
+    priority: int = Field(default=0, ge=-10, le=10)
+
+
+@register_handler("match")
+async def _run_match(params: dict) -> dict:
+    return await run_match(params["job_id"], params["top_k_resume"], params["candidate_id"])
+
+
+@register_handler("apply_kit")
+async def _run_apply_kit(params: dict) -> dict:
+    return await run_apply_kit(
+        params["job_id"], params["top_k_resume"], params["candidate_id"], params["tone"],
+        include_match=params["include_match"],
+    )
+
+
+async def submit_task(kind: str, params: dict, priority: int) -> dict:
+    try:
+        task, created = await get_task_queue().submit(kind, params, priority)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Task queue is full: {e}")
+    return {**task, "deduplicated": not created}
+
+
+async def _get_or_404(task_id: str) -> dict:
+    task = await run_in_threadpool(get_task_queue().get, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found.")
+    return task
+
+
+@router.post("/match", status_code=202)
+async def submit_match(req: MatchTaskRequest):
+    return await submit_task("match", req.model_dump(exclude={"priority"}), req.priority)
+
+
+@router.post("/apply_kit", status_code=202)
+async def submit_apply_kit(req: ApplyKitTaskRequest):
+    return await submit_task("apply_kit", req.model_dump(exclude={"priority"}), req.priority)
+
+
+@router.get("")
+def list_tasks(
+    status: Literal["queued", "running", "done", "failed", "cancelled"] | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    queue = get_task_queue()
+    return {"stats": queue.stats(), "tasks": queue.recent(status, limit)}
+
+
+@router.get("/{task_id}")
+async def get_task(task_id: str, wait: float = Query(default=0, ge=0, le=60)):
+    """Task status, and its result once done; with wait, long-poll until the status changes."""
+    task = await _get_or_404(task_id)
+    if wait and task["status"] not in FINISHED:
+        task = await get_task_queue().wait(task_id, wait) or task
+    return task
+
+
+@router.get("/{task_id}/events")
+async def task_events(task_id: str):
+    """SSE: a `status` event on every change, then `result` or `error` and the stream ends."""
+    task = await _get_or_404(task_id)
+
+    async def events():
+        current = task
+        while True:
+            if current["status"] == "done":
+                yield sse_event("result", current["result"])
+                return
+            if current["status"] in FINISHED:
+                yield sse_event("error", {"status": current["status"], "detail": current.get("error")})
+                return
+            yield sse_event("status", current)
+            status = current["status"]
+            while current is not None and current["status"] == status:
+                current = await get_task_queue().wait(task_id, KEEPALIVE_SECONDS)
+                if current is not None and current["status"] == status:
+                    yield ": keep-alive\n\n"
+            if current is None:
+                yield sse_event("error", {"status": "missing", "detail": "Task not found."})
+                return
+
+    return sse_response(events())
+
+
+@router.delete("/{task_id}")
+async def cancel_task(task_id: str):
+    task = await get_task_queue().cancel(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found.")
+    return task
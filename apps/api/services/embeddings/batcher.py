@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+EncodeFn = Callable[[List[str]], List[List[float]]]
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode calls into one batched forward pass.
+
+    Callers block on their own future and get back only their slice of the
+    batch. Requests that are already a full batch skip the queue. With
+    max_wait_ms=0 batching is purely greedy: whatever queued up while the
+    previous batch was encoding goes into the next one.
+    """
+
+    def __init__(self, encode: EncodeFn, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.batches = 0
+        self.items = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._carry = None
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if len(texts) >= self.max_batch_size:
+            return self.encode(texts)
+
+        fut: Future = Future()
+        self._queue.put((texts, fut))
+        return fut.result()
+
+    def _next_batch(self) -> list:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            try:
+                vectors = self.encode(texts)
+            except BaseException as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            start = 0
+            for item_texts, fut in batch:
+                end = start + len(item_texts)
+                fut.set_result(vectors[start:end])
+                start = end
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+        }
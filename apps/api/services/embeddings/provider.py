@@ -1,27 +1,182 @@
+import hashlib
 import os
+import re
+import threading
+import time
 from typing import List
 
+from services.embeddings.batcher import EmbeddingBatcher
+from services.embeddings.cache import cache_key, get_cache
+from services.observability.metrics import observe, timed
+
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+# EMBEDDINGS_PROVIDER=fake: hashed bag of words, for benchmarks and offline runs
+FAKE_EMBED_DIM = int(os.getenv("FAKE_EMBED_DIM", "384"))
+
+_WORD_RE = re.compile(r"\w+")
+
+_backends = {}
+_lock = threading.Lock()
+
+
 def get_provider() -> str:
     return os.getenv("EMBEDDINGS_PROVIDER", "openai").lower()
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    provider = get_provider()
 
+def get_model_name(provider: str | None = None) -> str:
+    provider = provider or get_provider()
     if provider == "openai":
-        from openai import OpenAI
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+    if provider == "local":
+        return os.getenv("LOCAL_EMBED_MODEL", "all-MiniLM-L6-v2")
+    if provider == "fake":
+        return f"fake-hash-{FAKE_EMBED_DIM}"
+    raise ValueError(f"Unknown EMBEDDINGS_PROVIDER: {provider}")
+
+
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except (ImportError, OSError):
+        return None
 
-        model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
 
-        resp = client.embeddings.create(model=model, input=texts)
-        return [d.embedding for d in resp.data]
+def fake_embedding(text: str, dim: int = FAKE_EMBED_DIM) -> List[float]:
+    """Deterministic unit vector: each word adds ±1 to a hashed dimension, so shared words mean similarity."""
+    vec = [0.0] * dim
+    for word in _WORD_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % dim] += 1.0 if (h >> 63) else -1.0
+    norm = sum(v * v for v in vec) ** 0.5
+    return [v / norm for v in vec] if norm else vec
 
-    elif provider == "local":
-        from sentence_transformers import SentenceTransformer
-        model_name = os.getenv("LOCAL_EMBED_MODEL", "all-MiniLM-L6-v2")
-        model = SentenceTransformer(model_name)
-        vectors = model.encode(texts, normalize_embeddings=True)
+
+class EmbeddingBackend:
+    def __init__(self, provider: str, model_name: str):
+        self.provider = provider
+        self.model_name = model_name
+        self.load_seconds = 0.0
+        self.rss_delta_mb = None
+        self.batcher = None
+        self._model = None
+
+    def load(self):
+        rss_before = _rss_mb()
+        t0 = time.perf_counter()
+
+        if self.provider == "openai":
+            from openai import OpenAI
+            self._model = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        elif self.provider == "local":
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        elif self.provider == "fake":
+            self._model = fake_embedding
+        else:
+            raise ValueError(f"Unknown EMBEDDINGS_PROVIDER: {self.provider}")
+
+        self.load_seconds = time.perf_counter() - t0
+        rss_after = _rss_mb()
+        if rss_before is not None and rss_after is not None:
+            self.rss_delta_mb = rss_after - rss_before
+
+        if EMBED_BATCHING:
+            self.batcher = EmbeddingBatcher(self.encode, EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS)
+        return self
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        observe("pathfinder_embed_batch_size", len(texts))
+        if self.provider == "openai":
+            resp = self._model.embeddings.create(model=self.model_name, input=texts)
+            return [d.embedding for d in resp.data]
+        if self.provider == "fake":
+            return [self._model(t) for t in texts]
+
+        vectors = self._model.encode(texts, normalize_embeddings=True)
         return vectors.tolist()
 
-    else:
-        raise ValueError(f"Unknown EMBEDDINGS_PROVIDER: {provider}")
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        with timed("embed"):
+            if self.batcher is not None:
+                return self.batcher.embed(texts)
+            return self.encode(texts)
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider,
+            "model": self.model_name,
+            "load_seconds": round(self.load_seconds, 3),
+            "rss_delta_mb": None if self.rss_delta_mb is None else round(self.rss_delta_mb, 1),
+            "batching": self.batcher.stats() if self.batcher else None,
+        }
+
+
+def get_backend(provider: str | None = None) -> EmbeddingBackend:
+    provider = provider or get_provider()
+    model_name = get_model_name(provider)
+    key = (provider, model_name)
+
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+
+    # sync routers run in the threadpool: make sure only one thread loads the weights
+    with _lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = EmbeddingBackend(provider, model_name).load()
+            _backends[key] = backend
+    return backend
+
+
+def warmup() -> dict:
+    backend = get_backend()
+    if backend.provider == "local":
+        # first forward pass allocates the inference buffers
+        backend.encode(["warmup"])
+    return backend.stats()
+
+
+def embedding_stats() -> dict:
+    rss = _rss_mb()
+    cache = get_cache()
+    return {
+        "backends": [b.stats() for b in _backends.values()],
+        "rss_mb": None if rss is None else round(rss, 1),
+        "cache": cache.stats() if cache else None,
+    }
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    backend = get_backend()
+    cache = get_cache()
+    if cache is None or not texts:
+        return backend.embed(texts)
+
+    keys = [cache_key(backend.provider, backend.model_name, t) for t in texts]
+    found = cache.get_many(keys)
+
+    missing = {}
+    for k, t in zip(keys, texts):
+        if k not in found and k not in missing:
+            missing[k] = t
+
+    if missing:
+        vectors = backend.embed(list(missing.values()))
+        computed = dict(zip(missing.keys(), vectors))
+        cache.put_many(computed)
+        found.update(computed)
+
+    return [found[k] for k in keys]
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from services.llm.ollama_client import OLLAMA_MODEL, OLLAMA_OPTIONS, ollama_generate, ollama_generate_stream
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CACHE_DISK = os.getenv("LLM_CACHE_DISK", "0") == "1"
+LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "20000"))
+# the disk tier drops expired rows and trims to its cap once per this many writes
+LLM_CACHE_PRUNE_EVERY = 64
+LLM_CACHE_PATH = os.path.abspath(os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", ".cache", "llm.sqlite"),
+))
+
+_cache = None
+
+
+def generation_key(prompt: str, model: str = OLLAMA_MODEL, options: dict | None = None) -> str:
+    raw = json.dumps(
+        {"model": model, "options": options if options is not None else OLLAMA_OPTIONS, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """In-memory LRU of LLM outputs with an optional SQLite tier behind it.
+
+    Entries carry tags (e.g. "job:<id>", "candidate:<id>") so re-indexing can drop
+    every result that was generated from the old content.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, disk_path: str | None = None, disk_max_entries: int = 0):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._writes = 0
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[float, str, tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS result_tags (tag TEXT NOT NULL, key TEXT NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS result_tags_tag ON result_tags(tag)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS result_tags_key ON result_tags(key)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results(created_at)")
+            with self._lock:
+                self._prune_disk()
+
+    @property
+    def disk(self) -> bool:
+        return self._conn is not None
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if self._conn is not None:
+                row = self._conn.execute("SELECT text, created_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row and not self._expired(row[1]):
+                    tags = tuple(t for (t,) in self._conn.execute("SELECT tag FROM result_tags WHERE key = ?", (key,)))
+                    self._remember(key, row[1], row[0], tags)
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str, tags=()):
+        now = time.time()
+        tags = tuple(tags)
+        with self._lock:
+            self._remember(key, now, text, tags)
+            if self._conn is not None:
+                self._conn.execute("BEGIN")
+                self._conn.execute("INSERT OR REPLACE INTO results (key, text, created_at) VALUES (?, ?, ?)", (key, text, now))
+                self._conn.execute("DELETE FROM result_tags WHERE key = ?", (key,))
+                self._conn.executemany("INSERT INTO result_tags (tag, key) VALUES (?, ?)", [(t, key) for t in tags])
+                self._conn.execute("COMMIT")
+                self._writes += 1
+                if self._writes % LLM_CACHE_PRUNE_EVERY == 0:
+                    self._prune_disk()
+
+    def _remember(self, key: str, created_at: float, text: str, tags: tuple):
+        self._memory[key] = (created_at, text, tags)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def invalidate(self, tag: str) -> int:
+        with self._lock:
+            stale = [k for k, (_, _, tags) in self._memory.items() if tag in tags]
+            for k in stale:
+                del self._memory[k]
+            removed = len(stale)
+
+            if self._conn is not None:
+                keys = [k for (k,) in self._conn.execute("SELECT key FROM result_tags WHERE tag = ?", (tag,))]
+                self._delete_disk(keys)
+                removed = max(removed, len(keys))
+            return removed
+
+    def _delete_disk(self, keys: list[str]):
+        self._conn.execute("BEGIN")
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            marks = ",".join("?" * len(part))
+            self._conn.execute(f"DELETE FROM results WHERE key IN ({marks})", part)
+            self._conn.execute(f"DELETE FROM result_tags WHERE key IN ({marks})", part)
+        self._conn.execute("COMMIT")
+
+    def _prune_disk(self):
+        """Drop expired rows, then the oldest ones beyond disk_max_entries. Called with the lock held."""
+        cutoff = time.time() - self.ttl if self.ttl > 0 else 0.0
+        stale = [k for (k,) in self._conn.execute("SELECT key FROM results WHERE created_at < ?", (cutoff,))]
+        if self.disk_max_entries > 0:
+            live = self._conn.execute("SELECT COUNT(*) FROM results WHERE created_at >= ?", (cutoff,)).fetchone()[0]
+            if live > self.disk_max_entries:
+                stale += [k for (k,) in self._conn.execute(
+                    "SELECT key FROM results WHERE created_at >= ? ORDER BY created_at LIMIT ?",
+                    (cutoff, live - self.disk_max_entries),
+                )]
+        if stale:
+            self._delete_disk(stale)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "disk": self.disk,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+def get_llm_cache() -> LLMResultCache | None:
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = LLMResultCache(
+            LLM_CACHE_MAX_ENTRIES,
+            LLM_CACHE_TTL_SECONDS,
+            LLM_CACHE_PATH if LLM_CACHE_DISK else None,
+            LLM_CACHE_DISK_MAX_ENTRIES,
+        )
+    return _cache
+
+
+async def _open_cache() -> LLMResultCache | None:
+    # the first call opens and prunes the SQLite tier
+    if _cache is None and LLM_CACHE_ENABLED and LLM_CACHE_DISK:
+        return await run_in_threadpool(get_llm_cache)
+    return get_llm_cache()
+
+
+async def _cache_get(cache: LLMResultCache, key: str) -> str | None:
+    # a miss in memory reads SQLite: keep that off the event loop, a memory-only cache answers inline
+    return await run_in_threadpool(cache.get, key) if cache.disk else cache.get(key)
+
+
+async def _cache_put(cache: LLMResultCache, key: str, text: str, tags):
+    if cache.disk:
+        await run_in_threadpool(cache.put, key, text, tags)
+    else:
+        cache.put(key, text, tags)
+
+
+def invalidate(tag: str) -> int:
+    cache = get_llm_cache()
+    return cache.invalidate(tag) if cache else 0
+
+
+async def generate_cached(prompt: str, tags=(), validate: Callable[[str], bool] | None = None) -> tuple[str, bool]:
+    """(text, cached); with validate, output it rejects is returned but not cached, so a retry can recover."""
+    cache = await _open_cache()
+    if cache is None:
+        return await ollama_generate(prompt), False
+
+    key = generation_key(prompt)
+    text = await _cache_get(cache, key)
+    if text is not None:
+        return text, True
+
+    text = await ollama_generate(prompt)
+    if validate is None or validate(text):
+        await _cache_put(cache, key, text, tags)
+    return text, False
+
+
+async def stream_cached(prompt: str, tags=(), state: dict | None = None, validate: Callable[[str], bool] | None = None):
+    """Like ollama_generate_stream, but a cache hit is yielded as a single token.
+
+    state["cached"] tells the caller which path was taken. Output that validate
+    rejects is not cached.
+    """
+    state = state if state is not None else {}
+    cache = await _open_cache()
+    key = generation_key(prompt)
+
+    text = await _cache_get(cache, key) if cache else None
+    state["cached"] = text is not None
+    if text is not None:
+        yield text
+        return
+
+    parts = []
+    async for token in ollama_generate_stream(prompt):
+        parts.append(token)
+        yield token
+    text = "".join(parts).strip()
+    if cache and (validate is None or validate(text)):
+        await _cache_put(cache, key, text, tags)
@@ -1,25 +1,156 @@
 import os
-import requests
+import json
+import random
+import asyncio
+import time
+
+import httpx
+
+from services.observability.metrics import observe, record
+from services.rag.tokens import count_tokens
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:8b")  
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
 OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "300"))  # 5 minutes
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "10"))
+# match OLLAMA_NUM_PARALLEL on the Ollama server; extra calls wait here instead of in Ollama's queue
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "2"))
+OLLAMA_RETRY_BASE_DELAY = float(os.getenv("OLLAMA_RETRY_BASE_DELAY", "0.5"))
+
+OLLAMA_OPTIONS = {
+    "temperature": 0.2,
+    "num_predict": 350,   # limit output length
+    # explicit, so a prompt over the model default is not silently cut from the front
+    "num_ctx": int(os.getenv("OLLAMA_NUM_CTX", "4096")),
+}
+
+_RETRY_STATUS = {429, 502, 503, 504}
+
+_client: httpx.AsyncClient | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+class OllamaRetryableError(Exception):
+    pass
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONCURRENCY,
+                max_keepalive_connections=OLLAMA_MAX_CONCURRENCY,
+            ),
+        )
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def close_client():
+    global _client, _semaphore
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _semaphore = None
+
 
-def ollama_generate(prompt: str) -> str:
-    payload = {
+def _payload(prompt: str, stream: bool) -> dict:
+    return {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0.2,
-            "num_predict": 350,   # limit output length 
-        }
+        "stream": stream,
+        "options": OLLAMA_OPTIONS,
     }
 
-    r = requests.post(
-        OLLAMA_URL,
-        json=payload,
-        timeout=OLLAMA_TIMEOUT
-    )
+
+def _timeout(timeout: float | None):
+    if timeout is None:
+        return httpx.USE_CLIENT_DEFAULT
+    return httpx.Timeout(timeout, connect=OLLAMA_CONNECT_TIMEOUT)
+
+
+def _check_status(r: httpx.Response):
+    if r.status_code in _RETRY_STATUS:
+        raise OllamaRetryableError(f"Ollama returned HTTP {r.status_code}")
     r.raise_for_status()
-    return r.json().get("response", "").strip()
+
+
+async def _backoff(attempt: int):
+    # full jitter: spread retries from concurrent callers instead of retrying in lockstep
+    await asyncio.sleep(random.uniform(0, OLLAMA_RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _is_transient(e: Exception) -> bool:
+    # a read timeout after OLLAMA_TIMEOUT seconds is not worth repeating
+    return isinstance(e, (OllamaRetryableError, httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+
+def _start_generation(prompt: str, queued_at: float) -> float:
+    observe("pathfinder_prompt_tokens", count_tokens(prompt))
+    now = time.perf_counter()
+    record("llm_queue", now - queued_at)
+    return now
+
+
+async def ollama_generate(prompt: str, timeout: float | None = None) -> str:
+    queued_at = time.perf_counter()
+    async with _get_semaphore():
+        t0 = _start_generation(prompt, queued_at)
+        for attempt in range(OLLAMA_MAX_RETRIES + 1):
+            try:
+                r = await get_client().post(OLLAMA_URL, json=_payload(prompt, stream=False), timeout=_timeout(timeout))
+                _check_status(r)
+                body = r.json()
+                # without streaming, the first token is only visible in Ollama's own timings (nanoseconds)
+                if "prompt_eval_duration" in body:
+                    record("llm_ttft", (body.get("load_duration", 0) + body["prompt_eval_duration"]) / 1e9)
+                record("llm_generation", time.perf_counter() - t0)
+                return body.get("response", "").strip()
+            except Exception as e:
+                if attempt >= OLLAMA_MAX_RETRIES or not _is_transient(e):
+                    raise
+            await _backoff(attempt)
+
+
+async def ollama_generate_stream(prompt: str, timeout: float | None = None):
+    # Ollama streams one JSON object per line: {"response": "<token>", "done": false}
+    queued_at = time.perf_counter()
+    async with _get_semaphore():
+        t0 = _start_generation(prompt, queued_at)
+        for attempt in range(OLLAMA_MAX_RETRIES + 1):
+            yielded = False
+            try:
+                async with get_client().stream(
+                    "POST", OLLAMA_URL, json=_payload(prompt, stream=True), timeout=_timeout(timeout)
+                ) as r:
+                    _check_status(r)
+                    async for line in r.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise RuntimeError(chunk["error"])
+                        token = chunk.get("response", "")
+                        if token:
+                            if not yielded:
+                                record("llm_ttft", time.perf_counter() - t0)
+                            yielded = True
+                            yield token
+                        if chunk.get("done"):
+                            break
+                record("llm_generation", time.perf_counter() - t0)
+                return
+            except Exception as e:
+                # once tokens reached the client a retry would duplicate them
+                if yielded or attempt >= OLLAMA_MAX_RETRIES or not _is_transient(e):
+                    raise
+            await _backoff(attempt)
@@ -0,0 +1,96 @@
+import json
+import re
+
+
+def build_match_prompt(job_block: str, resume_blocks: list[str]) -> str:
+    return f"""
+You are a career matching assistant.
+You MUST base your analysis ONLY on the provided JOB context and RESUME context.
+If something is missing, say it clearly.
+
+IMPORTANT RULES:
+- Do NOT put a skill in "missing_skills" if it appears in RESUME context.
+- Evidence must cite chunk labels only (e.g., "JOB_CHUNK 3", "RESUME_CHUNK 2"), not raw text.
+- Return STRICT JSON only. No markdown, no explanations outside JSON.
+
+Return:
+{{
+  "match_score": 0-100,
+  "strong_matches": [strings],
+  "missing_skills": [strings],
+  "recommended_actions": [strings],
+  "evidence": {{
+     "job": ["JOB_MAIN"],
+     "resume": ["RESUME_CHUNK 2", "RESUME_CHUNK 4"]
+  }},
+  "notes": "short explanation"
+}}
+
+JOB CONTEXT:
+{job_block}
+
+RESUME CONTEXT:
+{chr(10).join(resume_blocks)}
+""".strip()
+
+
+def build_apply_kit_prompt(tone: str, job_ctx: str, resume_ctx: list[str]) -> str:
+    return f"""
+You are a senior recruiter + career coach.
+
+TASK:
+Generate an "Apply Kit" tailored to this job, using ONLY the resume evidence provided.
+If something is missing, DO NOT invent it. Propose how to close the gap.
+
+Return STRICT JSON ONLY with this exact schema:
+
+{{
+  "cv_bullets": ["..."],
+  "why_me_summary": "string",
+  "cover_letter_short": "string",
+  "linkedin_message": "string",
+  "interview_questions": [{{"question":"...", "suggested_answer":"..."}}],
+  "upskilling_plan_7_days": ["..."],
+  "evidence_used": ["RESUME_CHUNK 1", "RESUME_CHUNK 2"]
+}}
+
+TONE: {tone}
+
+JOB CONTEXT:
+{job_ctx}
+
+RESUME CONTEXT:
+{chr(10).join(resume_ctx)}
+""".strip()
+
+
+def build_answer_prompt(question: str, context: str) -> str:
+    return f"""
+You are a career assistant. Answer the user's question using ONLY the information in the context.
+If the context does not contain enough information, say so.
+
+Return:
+1) Answer (concise)
+2) Evidence: cite the chunk numbers you used (e.g., CHUNK 1, CHUNK 3)
+
+QUESTION:
+{question}
+
+CONTEXT:
+{context}
+""".strip()
+
+
+def parse_json_from_llm(text: str):
+    try:
+        match = re.search(r"\{[\s\S]*\}", text)
+        if not match:
+            return None
+        return json.loads(match.group(0))
+    except Exception:
+        return None
+
+
+def is_json_reply(text: str) -> bool:
+    """Whether text holds the JSON object the match and apply-kit prompts ask for; only those are cached."""
+    return isinstance(parse_json_from_llm(text), dict)
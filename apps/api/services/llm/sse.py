@@ -0,0 +1,29 @@
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # keep reverse proxies from buffering the token stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def stream_llm(tokens, on_done):
+    """Forward LLM tokens as `token` events, then emit on_done(full_text) as `result`."""
+    parts = []
+    try:
+        async for token in tokens:
+            parts.append(token)
+            yield sse_event("token", {"text": token})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"LLM generation failed: {str(e)}"})
+        return
+    yield sse_event("result", on_done("".join(parts).strip()))
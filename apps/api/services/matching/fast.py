@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.parsing.profile_extractor import extract_profile_from_text
+from services.parsing.skills import canonical_skill, extract_skills
+from services.rag.retrieval import (
+    candidate_where,
+    clean_candidate_id,
+    load_job,
+    load_job_chunks,
+    load_resume_chunks,
+    ms_since,
+)
+
+# share of the score from skill overlap; the rest is embedding coverage of the job's chunks
+FAST_MATCH_SKILL_WEIGHT = float(os.getenv("FAST_MATCH_SKILL_WEIGHT", "0.6"))
+# cosine similarity mapped to 0 / 1 coverage; below the floor is unrelated text
+FAST_MATCH_SIM_FLOOR = float(os.getenv("FAST_MATCH_SIM_FLOOR", "0.2"))
+FAST_MATCH_SIM_CEIL = float(os.getenv("FAST_MATCH_SIM_CEIL", "0.7"))
+
+
+def _unit(m) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    return m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-9)
+
+
+def _resume_skills(resume_text: str, job_text: str) -> tuple[set[str], list[str]]:
+    """Canonical skills of the resume, and its other "Technologies:" entries that the posting names verbatim."""
+    profile = extract_profile_from_text(resume_text)
+    skills, extra = set(profile.skills), []
+    for tech in profile.technologies:
+        name = canonical_skill(tech)
+        if name:
+            skills.add(name)
+        elif tech not in extra and re.search(rf"(?<!\w){re.escape(tech)}(?!\w)", job_text, flags=re.IGNORECASE):
+            extra.append(tech)
+    return skills, extra
+
+
+def fast_match(job_id: str, candidate_id: str) -> dict:
+    """Deterministic match: skill overlap with the posting plus embedding coverage of its chunks.
+
+    Reads only what is already stored (no embedding or LLM call), so it is
+    reproducible and answers in milliseconds; same shape as run_match's
+    result for the fields it fills.
+    """
+    job_id = (job_id or "").strip()
+    if not job_id:
+        raise HTTPException(status_code=400, detail="job_id is required.")
+    candidate_id = clean_candidate_id(candidate_id)
+    t_total = time.perf_counter()
+    timings = {}
+
+    t0 = time.perf_counter()
+    job = load_job(job_id, with_embedding=True)
+    if not job or not job["description"]:
+        raise HTTPException(status_code=404, detail="Job not found. Upload the job first via /job/upload_text or /job/upload.")
+    _, job_vectors = load_job_chunks(job)
+    if not len(job_vectors) and job.get("embedding") is not None:
+        job_vectors = [job["embedding"]]
+    resume_docs, resume_vectors = load_resume_chunks(candidate_where(candidate_id))
+    if not resume_docs:
+        raise HTTPException(status_code=400, detail="No resume indexed for this candidate. Please index a resume first using /rag/index_resume.")
+    timings["load_ms"] = ms_since(t0)
+
+    t0 = time.perf_counter()
+    job_text = job["description"]
+    job_skills = extract_skills(job_text)
+    resume_skills, extra = _resume_skills("\n".join(resume_docs), job_text)
+    strong = [s for s in job_skills if s in resume_skills] + extra
+    missing = [s for s in job_skills if s not in resume_skills]
+    timings["skills_ms"] = ms_since(t0)
+
+    t0 = time.perf_counter()
+    coverage = None
+    if len(job_vectors):
+        best = (_unit(job_vectors) @ _unit(resume_vectors).T).max(axis=1)
+        scaled = (best - FAST_MATCH_SIM_FLOOR) / (FAST_MATCH_SIM_CEIL - FAST_MATCH_SIM_FLOOR)
+        coverage = float(np.clip(scaled, 0.0, 1.0).mean())
+    timings["similarity_ms"] = ms_since(t0)
+
+    overlap = len(strong) / (len(strong) + len(missing)) if strong or missing else None
+    if overlap is None and coverage is None:
+        score = 0.0
+    elif overlap is None or coverage is None:
+        score = overlap if coverage is None else coverage
+    else:
+        score = FAST_MATCH_SKILL_WEIGHT * overlap + (1 - FAST_MATCH_SKILL_WEIGHT) * coverage
+    timings["total_ms"] = ms_since(t_total)
+
+    return {
+        "job_id": job_id,
+        "candidate_id": candidate_id,
+        "mode": "fast",
+        "result": {
+            "match_score": round(100 * score),
+            "strong_matches": strong,
+            "missing_skills": missing,
+            "skill_overlap": None if overlap is None else round(overlap, 3),
+            "semantic_coverage": None if coverage is None else round(coverage, 3),
+        },
+        "timings": timings,
+        "cached": False,
+    }
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from services.rag.retrieval import retrieve_match_context, ms_since
+from services.llm.prompts import build_match_prompt, build_apply_kit_prompt, is_json_reply, parse_json_from_llm
+from services.llm.cache import generate_cached
+from services.rag.tokens import count_tokens
+
+
+def llm_cache_tags(ctx: dict) -> list[str]:
+    return [f"job:{ctx['job_id']}", f"candidate:{ctx['candidate_id']}"]
+
+
+def prepare_match(job_id: str, top_k_resume: int, candidate_id: str) -> dict:
+    ctx = retrieve_match_context(job_id, top_k_resume, candidate_id)
+    # job_block and resume_blocks are already within the PROMPT_*_TOKENS budgets
+    ctx["job_context_used"] = ctx["job_block"]
+    ctx["resume_context_used"] = ctx["resume_blocks"]
+    ctx["prompt"] = build_match_prompt(ctx["job_block"], ctx["resume_blocks"])
+    ctx["prompt_tokens"] = prompt_tokens(ctx, ctx["prompt"])
+    return ctx
+
+
+def prompt_tokens(ctx: dict, prompt: str) -> dict:
+    # prompt evaluation time, and so time to first token, grows with these
+    return {**ctx["context_tokens"], "total": count_tokens(prompt)}
+
+
+def finish_match(ctx: dict, llm_out: str, llm_started_at: float, cached: bool) -> dict:
+    timings = dict(ctx["timings"])
+    timings["llm_ms"] = ms_since(llm_started_at)
+    timings["total_ms"] = ms_since(ctx["started_at"])
+
+    return {
+        "job_id": ctx["job_id"],
+        "candidate_id": ctx["candidate_id"],
+        "result": parse_json_from_llm(llm_out),
+        "raw_llm": llm_out,
+        "job_context_used": ctx["job_context_used"],
+        "resume_context_used": ctx["resume_context_used"],
+        "prompt_tokens": ctx["prompt_tokens"],
+        "timings": timings,
+        "cached": cached,
+    }
+
+
+def apply_kit_prompt(ctx: dict, tone: str) -> str:
+    return build_apply_kit_prompt(tone, ctx["job_context_used"], ctx["resume_context_used"])
+
+
+def finish_apply_kit(ctx: dict, llm_out: str, cached: bool, prompt: str) -> dict:
+    ids = {"job_id": ctx["job_id"], "candidate_id": ctx["candidate_id"], "prompt_tokens": prompt_tokens(ctx, prompt)}
+    match = re.search(r"\{.*\}", llm_out, re.DOTALL)
+    if not match:
+        return {**ids, "raw_llm": llm_out, "error": "LLM did not return JSON.", "cached": cached}
+
+    try:
+        data = json.loads(match.group(0))
+    except Exception:
+        return {**ids, "raw_llm": llm_out, "error": "Failed to parse JSON.", "cached": cached}
+
+    return {
+        **ids,
+        "result": data,
+        "job_context_used": ctx["job_context_used"],
+        "resume_context_used": ctx["resume_context_used"],
+        "cached": cached,
+    }
+
+
+async def _generate_match(ctx: dict) -> dict:
+    t0 = time.perf_counter()
+    llm_out, cached = await generate_cached(ctx["prompt"], tags=llm_cache_tags(ctx), validate=is_json_reply)
+    return finish_match(ctx, llm_out, t0, cached)
+
+
+async def _generate_apply_kit(ctx: dict, tone: str) -> dict:
+    prompt = apply_kit_prompt(ctx, tone)
+    llm_out, cached = await generate_cached(prompt, tags=llm_cache_tags(ctx), validate=is_json_reply)
+    return finish_apply_kit(ctx, llm_out, cached, prompt)
+
+
+async def run_match(job_id: str, top_k_resume: int, candidate_id: str) -> dict:
+    ctx = await run_in_threadpool(prepare_match, job_id, top_k_resume, candidate_id)
+    return await _generate_match(ctx)
+
+
+async def run_apply_kit(job_id: str, top_k_resume: int, candidate_id: str, tone: str, include_match: bool = False) -> dict:
+    # retrieval runs once; with include_match both generations share it and run concurrently
+    ctx = await run_in_threadpool(prepare_match, job_id, top_k_resume, candidate_id)
+    if not include_match:
+        return await _generate_apply_kit(ctx, tone)
+
+    kit, match = await asyncio.gather(_generate_apply_kit(ctx, tone), _generate_match(ctx))
+    kit["match"] = match
+    return kit
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+
+from services.rag.retrieval import JOB_COLLECTION, RESUME_COLLECTION, ms_since
+from services.rag.vectorstore import get_changelog, get_documents
+
+# rows scored per matrix multiply; bounds the temporary (rows x resume chunks) similarity block
+SCORE_BLOCK_ROWS = 65536
+# changed ids read back from the store per get() when replaying the change log
+REPLAY_BATCH = 2000
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class GroupedEmbeddingIndex:
+    """Chunk embeddings of one collection as a float32 matrix, updated in place as the collection changes.
+
+    Rows stay in arrival order and row_group maps each to its group (job_id,
+    candidate_id, ...); per-group reductions go through np.bincount and
+    np.maximum.reduceat. Deleted rows are tombstoned (group -1) and squeezed out by
+    compact() once they pass a quarter of the matrix.
+    """
+
+    def __init__(self, collection_name: str, group_field: str, where: dict | None = None):
+        self.collection_name = collection_name
+        self.group_field = group_field
+        self.where = where or {}
+
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.row_group = np.zeros(0, dtype=np.int64)
+        self.row_ids: list[str | None] = []
+        self.count = 0  # rows in use, tombstones included
+        self.dead = 0
+        self._row_of: dict[str, int] = {}
+
+        self.groups: list[str] = []
+        self.group_meta: list[dict] = []
+        self._group_rows = np.zeros(0, dtype=np.int64)  # live rows per group, with spare capacity
+        self._group_of: dict[str, int] = {}
+
+        res = get_documents(collection_name, where=where, include=["embeddings", "metadatas"])
+        self.upsert(res["ids"], res.get("embeddings"), res.get("metadatas"))
+
+    def _group(self, key: str, meta: dict) -> int:
+        g = self._group_of.get(key)
+        if g is None:
+            g = self._group_of[key] = len(self.groups)
+            self.groups.append(key)
+            self.group_meta.append(meta)
+            if g == len(self._group_rows):
+                self._group_rows = np.concatenate([self._group_rows, np.zeros(max(g, 1024), dtype=np.int64)])
+        else:
+            self.group_meta[g] = meta
+        return g
+
+    def _reserve(self, rows: int, dim: int):
+        if self.matrix.shape[1] != dim and self.count == 0:
+            self.matrix = np.zeros((0, dim), dtype=np.float32)
+        if rows > len(self.matrix):
+            capacity = max(rows, 2 * len(self.matrix), 1024)
+            matrix = np.zeros((capacity, dim), dtype=np.float32)
+            matrix[:self.count] = self.matrix[:self.count]
+            row_group = np.full(capacity, -1, dtype=np.int64)
+            row_group[:self.count] = self.row_group[:self.count]
+            self.matrix, self.row_group = matrix, row_group
+
+    def upsert(self, ids: list[str], embeddings, metadatas: list[dict] | None):
+        """Add or replace rows; ids whose metadata no longer matches where are removed instead."""
+        if not ids:
+            return
+        metadatas = metadatas or [{}] * len(ids)
+        keep = [i for i, m in enumerate(metadatas) if all((m or {}).get(k) == v for k, v in self.where.items())]
+        if len(keep) < len(ids):
+            kept = set(keep)
+            self.delete([id_ for i, id_ in enumerate(ids) if i not in kept])
+        if not keep:
+            return
+
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32)[keep])
+        self._reserve(self.count + len(keep), vectors.shape[1])
+        rows = np.empty(len(keep), dtype=np.int64)
+        for j, i in enumerate(keep):
+            meta = metadatas[i] or {}
+            g = self._group(meta.get(self.group_field) or "", meta)
+            r = self._row_of.get(ids[i])
+            if r is None:
+                r = self._row_of[ids[i]] = self.count
+                self.row_ids.append(ids[i])
+                self.count += 1
+            else:
+                self._group_rows[self.row_group[r]] -= 1
+            self.row_group[r] = g
+            self._group_rows[g] += 1
+            rows[j] = r
+        self.matrix[rows] = vectors
+
+    def delete(self, ids: list[str]):
+        for id_ in ids:
+            r = self._row_of.pop(id_, None)
+            if r is None:
+                continue
+            self._group_rows[self.row_group[r]] -= 1
+            self.row_group[r] = -1
+            self.matrix[r] = 0.0
+            self.row_ids[r] = None
+            self.dead += 1
+        if self.dead > max(1024, self.count // 4):
+            self.compact()
+
+    def compact(self):
+        """Drop tombstoned rows and groups left without rows."""
+        live = np.flatnonzero(self.row_group[:self.count] >= 0)
+        kept_groups = np.flatnonzero(self.group_rows > 0)
+        remap = np.full(len(self.groups) + 1, -1, dtype=np.int64)
+        remap[kept_groups] = np.arange(len(kept_groups))
+
+        self.matrix = self.matrix[live].copy()
+        self.row_group = remap[self.row_group[live]]
+        self.row_ids = [self.row_ids[r] for r in live]
+        self._row_of = {id_: r for r, id_ in enumerate(self.row_ids)}
+        self.count, self.dead = len(live), 0
+
+        self._group_rows = self.group_rows[kept_groups]
+        self.groups = [self.groups[g] for g in kept_groups]
+        self.group_meta = [self.group_meta[g] for g in kept_groups]
+        self._group_of = {key: g for g, key in enumerate(self.groups)}
+
+    @property
+    def group_rows(self) -> np.ndarray:
+        return self._group_rows[:len(self.groups)]
+
+    def _live_groups(self, group_mask: np.ndarray | None) -> np.ndarray:
+        keep = self.group_rows > 0
+        return keep if group_mask is None else keep & group_mask
+
+    def _live_rows(self, keep: np.ndarray) -> np.ndarray:
+        # the appended False makes tombstones (group -1) drop out
+        return np.append(keep, False)[self.row_group[:self.count]]
+
+    def group_mask(self, filters: dict) -> np.ndarray:
+        """Boolean mask over groups whose metadata equals every filter value (case-insensitive)."""
+        mask = np.ones(len(self.groups), dtype=bool)
+        for field, value in filters.items():
+            if value is None:
+                continue
+            want = str(value).strip().lower()
+            mask &= np.fromiter(
+                (str(m.get(field) or "").strip().lower() == want for m in self.group_meta),
+                dtype=bool,
+                count=len(self.groups),
+            )
+        return mask
+
+    def maxsim_scores(self, query: np.ndarray, group_mask: np.ndarray | None = None) -> np.ndarray:
+        """Per group: mean over its chunks of the best cosine similarity to any query vector.
+
+        Groups excluded by group_mask, or without rows, get -inf.
+        """
+        scores = np.full(len(self.groups), -np.inf, dtype=np.float32)
+        if self.count == 0 or len(query) == 0:
+            return scores
+
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        keep = self._live_groups(group_mask)
+        rows = self._live_rows(keep)
+        best = np.zeros(self.count, dtype=np.float32)
+
+        for start in range(0, self.count, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, self.count)
+            if rows[start:end].any():
+                best[start:end] = (self.matrix[start:end] @ query.T).max(axis=1)
+
+        sums = np.bincount(self.row_group[:self.count][rows], weights=best[rows], minlength=len(self.groups))
+        scores[keep] = sums[keep] / self.group_rows[keep]
+        return scores
+
+    def coverage_scores(self, query: np.ndarray, group_mask: np.ndarray | None = None) -> np.ndarray:
+        """Per group: mean over the query vectors of the best cosine similarity among the group's chunks.
+
+        The transpose of maxsim_scores: how much of the query (e.g. a job's
+        requirements) the group (a candidate's resume) covers.
+        """
+        scores = np.full(len(self.groups), -np.inf, dtype=np.float32)
+        if self.count == 0 or len(query) == 0:
+            return scores
+
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        keep = self._live_groups(group_mask)
+        rows = self._live_rows(keep)
+        best = np.full((len(self.groups), len(query)), -np.inf, dtype=np.float32)
+
+        for start in range(0, self.count, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, self.count)
+            block = np.flatnonzero(rows[start:end])
+            if not len(block):
+                continue
+            sims = self.matrix[start:end] @ query.T
+            # rows sorted by group so each group's best is one reduceat segment
+            g = self.row_group[start:end][block]
+            order = np.argsort(g, kind="stable")
+            block, g = block[order], g[order]
+            starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+            seg = np.maximum.reduceat(sims[block], starts, axis=0)
+            best[g[starts]] = np.maximum(best[g[starts]], seg)
+
+        scores[keep] = best[keep].mean(axis=1)
+        return scores
+
+    def top(self, scores: np.ndarray, n: int) -> list[int]:
+        n = min(n, int(np.isfinite(scores).sum()))
+        if n <= 0:
+            return []
+        idx = np.argpartition(-scores, n - 1)[:n]
+        return idx[np.argsort(-scores[idx])].tolist()
+
+
+class _IndexHolder:
+    """Lazily built GroupedEmbeddingIndex, kept current by replaying the vector store change log.
+
+    The log is shared by every worker, so writes made elsewhere are seen too;
+    only the ids that changed are read back from the store.
+    """
+
+    def __init__(self, collection_name: str, group_field: str, where: dict | None = None):
+        self.collection_name = collection_name
+        self.group_field = group_field
+        self.where = where
+        self._index: GroupedEmbeddingIndex | None = None
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _replay(self, changes: list[tuple[int, str, list[str]]]):
+        # last operation per id wins
+        final: dict[str, str] = {}
+        for _, op, ids in changes:
+            for id_ in ids:
+                final[id_] = op
+        self._index.delete([i for i, op in final.items() if op == "delete"])
+        upserted = [i for i, op in final.items() if op == "upsert"]
+        for start in range(0, len(upserted), REPLAY_BATCH):
+            part = upserted[start:start + REPLAY_BATCH]
+            res = get_documents(self.collection_name, ids=part, include=["embeddings", "metadatas"])
+            self._index.upsert(res["ids"], res.get("embeddings"), res.get("metadatas"))
+            # upserted, then deleted by a write the log has not shown us yet
+            self._index.delete(sorted(set(part) - set(res["ids"])))
+
+    def get(self) -> tuple[GroupedEmbeddingIndex, str | None]:
+        """The index and how it was refreshed: "rebuilt", "updated" or None."""
+        with self._lock:
+            log = get_changelog()
+            seq = log.latest(self.collection_name)
+            if self._index is not None and seq == self._seq:
+                return self._index, None
+            changes = log.since(self.collection_name, self._seq) if self._index is not None else None
+            if changes is None:
+                # read the seq first: a write racing the full load is replayed again next time, which is harmless
+                self._index = GroupedEmbeddingIndex(self.collection_name, self.group_field, where=self.where)
+                self._seq = seq
+                return self._index, "rebuilt"
+            self._replay(changes)
+            self._seq = max([seq] + [c[0] for c in changes])
+            return self._index, "updated"
+
+
+_indexes = {
+    "jobs": _IndexHolder(JOB_COLLECTION, "job_id", where={"is_main": False}),
+    # resumes indexed before candidate namespaces land in the "" group, which ranking skips
+    "resumes": _IndexHolder(RESUME_COLLECTION, "candidate_id"),
+}
+
+
+def get_job_index() -> tuple[GroupedEmbeddingIndex, str | None]:
+    """The in-memory job chunk index, brought up to date with the vector store."""
+    return _indexes["jobs"].get()
+
+
+def get_resume_index() -> tuple[GroupedEmbeddingIndex, str | None]:
+    """The in-memory resume chunk index, grouped by candidate_id."""
+    return _indexes["resumes"].get()
+
+
+def rank_jobs_for_vectors(resume_vectors, top_n: int, filters: dict | None = None) -> dict:
+    timings = {}
+    t0 = time.perf_counter()
+    index, refresh = get_job_index()
+    timings["index_ms"] = ms_since(t0)
+    timings["index_refresh"] = refresh
+
+    t0 = time.perf_counter()
+    mask = index.group_mask(filters or {})
+    scores = index.maxsim_scores(np.asarray(resume_vectors, dtype=np.float32), mask)
+    top = index.top(scores, top_n)
+    timings["score_ms"] = ms_since(t0)
+
+    results = []
+    for i in top:
+        meta = index.group_meta[i]
+        results.append({
+            "job_id": index.groups[i],
+            "score": round(float(scores[i]) * 100, 1),
+            "title": meta.get("title"),
+            "company": meta.get("company"),
+            "location": meta.get("location"),
+        })
+    return {"jobs_scored": int(mask.sum()), "results": results, "timings": timings}
+
+
+def rank_candidates_for_vectors(job_vectors, top_n: int, candidate_ids: list[str] | None = None) -> dict:
+    timings = {}
+    t0 = time.perf_counter()
+    index, refresh = get_resume_index()
+    timings["index_ms"] = ms_since(t0)
+    timings["index_refresh"] = refresh
+
+    t0 = time.perf_counter()
+    wanted = set(candidate_ids or ())
+    mask = np.fromiter(
+        (bool(g) and (not wanted or g in wanted) for g in index.groups),
+        dtype=bool,
+        count=len(index.groups),
+    )
+    scores = index.coverage_scores(np.asarray(job_vectors, dtype=np.float32), mask)
+    top = index.top(scores, top_n)
+    timings["score_ms"] = ms_since(t0)
+
+    results = []
+    for i in top:
+        meta = index.group_meta[i]
+        results.append({
+            "candidate_id": index.groups[i],
+            "score": round(float(scores[i]) * 100, 1),
+            "filename": meta.get("filename"),
+        })
+    return {"candidates_scored": int(mask.sum()), "results": results, "timings": timings}
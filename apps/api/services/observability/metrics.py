@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+TOKEN_BUCKETS = (256, 512, 1024, 1536, 2048, 3072, 4096, 6144, 8192)
+
+# name -> (help, buckets); stages recorded with record()/timed() are pathfinder_<stage>_seconds
+METRICS = {
+    "pathfinder_http_request_seconds": ("HTTP request latency, until the last body chunk is sent.", SECONDS_BUCKETS),
+    "pathfinder_pdf_parse_seconds": ("PDF text extraction.", SECONDS_BUCKETS),
+    "pathfinder_chunking_seconds": ("Section-aware chunking of one document.", SECONDS_BUCKETS),
+    "pathfinder_embed_seconds": ("Embedding of cache misses, including the batching wait.", SECONDS_BUCKETS),
+    "pathfinder_embed_batch_size": ("Texts per embedding model call.", SIZE_BUCKETS),
+    "pathfinder_vector_upsert_seconds": ("Vector store upsert, lexical index included.", SECONDS_BUCKETS),
+    "pathfinder_vector_query_seconds": ("Vector store nearest-neighbour query.", SECONDS_BUCKETS),
+    "pathfinder_prompt_tokens": ("Estimated tokens of each prompt sent to the LLM.", TOKEN_BUCKETS),
+    "pathfinder_llm_queue_seconds": ("Wait for a free Ollama slot (OLLAMA_MAX_CONCURRENCY).", SECONDS_BUCKETS),
+    "pathfinder_llm_ttft_seconds": ("LLM time to first token: model load plus prompt evaluation.", SECONDS_BUCKETS),
+    "pathfinder_llm_generation_seconds": ("Whole LLM generation, retries included.", SECONDS_BUCKETS),
+}
+
+# stage -> seconds for the request being handled, read by ServerTimingMiddleware
+_request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_series: dict[tuple[str, tuple], Histogram] = {}
+_lock = threading.Lock()
+
+
+def observe(name: str, value: float, labels: tuple = ()):
+    """Add value to the histogram name{labels}; labels is a tuple of (name, value) pairs."""
+    if not METRICS_ENABLED:
+        return
+    key = (name, labels)
+    with _lock:
+        h = _series.get(key)
+        if h is None:
+            h = _series[key] = Histogram(METRICS[name][1])
+        h.observe(value)
+
+
+def record(stage: str, seconds: float, **labels):
+    """Observe pathfinder_<stage>_seconds and add the time to the current request's Server-Timing."""
+    observe(f"pathfinder_{stage}_seconds", seconds, tuple(labels.items()))
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - t0, **labels)
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")  # noqa: E731
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def render_metrics() -> str:
+    """Every histogram in the Prometheus text exposition format."""
+    with _lock:
+        series = sorted(
+            ((name, labels, list(h.counts), h.sum, h.count) for (name, labels), h in _series.items()),
+            key=lambda s: (s[0], s[1]),
+        )
+    lines, last = [], None
+    for name, labels, counts, total, count in series:
+        if name != last:
+            lines += [f"# HELP {name} {METRICS[name][0]}", f"# TYPE {name} histogram"]
+            last = name
+        cumulative = 0
+        for bound, n in zip(METRICS[name][1] + ("+Inf",), counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {total}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: dict) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware: a Server-Timing header per response and the request latency histogram.
+
+    The header goes out with the response start, so a streamed response
+    (SSE, NDJSON) reports the stages that ran before its first byte; "app" is
+    the time to that point. Stages recorded from threadpool calls are
+    included, since the threadpool runs them in a copy of the request context.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict[str, float] = {}
+        token = _request_timings.set(timings)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings["app"] = time.perf_counter() - t0
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing(timings).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            observe(
+                "pathfinder_http_request_seconds",
+                time.perf_counter() - t0,
+                # the route template, not the path, so ids do not multiply the series
+                (("method", scope["method"]), ("route", getattr(route, "path", "unmatched")), ("status", str(status))),
+            )
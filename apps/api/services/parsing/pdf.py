@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, UploadFile
+
+from services.observability.metrics import timed
+
+# 0 parses inline on the event loop (the old behaviour); only useful for debugging and benchmarks
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", "30"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+# a fresh worker has to start an interpreter and import fitz before its first job
+PDF_WORKER_START_SECONDS = 60
+
+_pool: PdfWorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+class PdfExtractionError(Exception):
+    pass
+
+
+class PdfTimeoutError(PdfExtractionError):
+    pass
+
+
+def _extract_text(pdf_bytes: bytes, max_pages: int, timeout: float) -> str:
+    # runs inside a worker process: fitz is imported there, not in the API process
+    import fitz
+
+    started = time.monotonic()
+    parts = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for i, page in enumerate(doc):
+            if i >= max_pages:
+                break
+            if time.monotonic() - started > timeout:
+                raise PdfTimeoutError(f"PDF parsing exceeded {timeout:.0f}s after {i} pages")
+            parts.append(page.get_text("text"))
+    return "\n".join(parts).strip()
+
+
+def _worker_main(conn):
+    import fitz  # noqa: F401  (paid once per worker, before it reports ready)
+
+    conn.send(("ready", None))
+    while True:
+        try:
+            pdf_bytes, max_pages, timeout = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send(("ok", _extract_text(pdf_bytes, max_pages, timeout)))
+        except PdfTimeoutError as e:
+            conn.send(("timeout", str(e)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class PdfWorker:
+    """One parsing process fed one job at a time over a pipe, so a stuck job can be killed alone."""
+
+    def __init__(self, ctx):
+        self._ctx = ctx
+        self._lock = threading.Lock()
+        self.closed = False
+        self._spawn()
+
+    def _spawn(self):
+        self.conn, child = self._ctx.Pipe()
+        self.proc = self._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.proc.start()
+        child.close()
+        self.ready = False
+
+    def _kill(self):
+        self.proc.terminate()
+        self.proc.join(5)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+        self.conn.close()
+
+    def kill(self):
+        """Stop the process for good: a thread still waiting on it fails without respawning it."""
+        with self._lock:
+            self.closed = True
+            self._kill()
+
+    def respawn(self):
+        with self._lock:
+            if self.closed:
+                # the pool is shutting down and nothing would reap a new process
+                return
+            self._kill()
+            self._spawn()
+
+    def wait_ready(self):
+        if not self.ready:
+            if not self.conn.poll(PDF_WORKER_START_SECONDS):
+                self.respawn()
+                raise PdfExtractionError("PDF worker did not start")
+            self.conn.recv()
+            self.ready = True
+
+    def run(self, pdf_bytes: bytes, max_pages: int, timeout: float, hard_timeout: float) -> str:
+        """Blocking, called from a thread. A job past hard_timeout, or a crash, respawns this worker only."""
+        try:
+            self.wait_ready()
+            self.conn.send((pdf_bytes, max_pages, timeout))
+            # the worker checks the deadline between pages; this is the backstop for a single slow page
+            if not self.conn.poll(hard_timeout):
+                self.respawn()
+                raise PdfTimeoutError(f"PDF parsing exceeded {timeout:.0f}s")
+            status, payload = self.conn.recv()
+        except (EOFError, OSError):
+            self.respawn()
+            raise PdfExtractionError("PDF worker crashed")
+        if status == "timeout":
+            raise PdfTimeoutError(payload)
+        if status == "error":
+            raise PdfExtractionError(payload)
+        return payload
+
+
+class PdfWorkerPool:
+    """A fixed set of PdfWorker processes. Each job takes an idle worker and a thread that waits on its pipe."""
+
+    def __init__(self, size: int):
+        # spawn: forking a process that already runs uvicorn/torch threads is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = [PdfWorker(ctx) for _ in range(size)]
+        self._idle = list(self.workers)
+        self._slots = asyncio.Semaphore(size)
+        self._threads = ThreadPoolExecutor(max_workers=size, thread_name_prefix="pdf")
+
+    async def extract(self, pdf_bytes: bytes) -> str:
+        await self._slots.acquire()
+        worker = self._idle.pop()
+        loop = asyncio.get_running_loop()
+        job = self._threads.submit(worker.run, pdf_bytes, PDF_MAX_PAGES, PDF_TIMEOUT_SECONDS, PDF_TIMEOUT_SECONDS + 5)
+        # the worker goes back to the idle list when its job really ends, even if this request is cancelled first
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, worker))
+        return await asyncio.wrap_future(job)
+
+    def _release(self, worker: PdfWorker):
+        self._idle.append(worker)
+        self._slots.release()
+
+    def warm_up(self):
+        for w in self.workers:
+            w.wait_ready()
+
+    def shutdown(self):
+        # queued jobs are dropped before the workers go; running ones fail on their closed worker
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        for w in self.workers:
+            w.kill()
+
+
+def get_pool() -> PdfWorkerPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PdfWorkerPool(PDF_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def start_pool():
+    if PDF_WORKERS > 0:
+        # spawning workers costs an interpreter start each; pay it at startup, not on the first upload
+        get_pool().warm_up()
+
+
+async def extract_pdf_text(pdf_bytes: bytes) -> str:
+    if PDF_WORKERS <= 0:
+        return _extract_text(pdf_bytes, PDF_MAX_PAGES, PDF_TIMEOUT_SECONDS)
+    return await get_pool().extract(pdf_bytes)
+
+
+async def extract_upload_text(file: UploadFile) -> str:
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Please upload a PDF file.")
+
+    pdf_bytes = await file.read()
+    if not pdf_bytes:
+        raise HTTPException(status_code=400, detail="Empty file.")
+
+    try:
+        with timed("pdf_parse"):
+            text = await extract_pdf_text(pdf_bytes)
+    except PdfTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"PDF parsing failed: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PDF parsing failed: {str(e)}")
+
+    if not text:
+        raise HTTPException(status_code=422, detail="No extractable text found in the PDF.")
+    return text
@@ -1,6 +1,8 @@
 import re
-from typing import List
+from typing import List, Optional
 from models.profile import Profile, ExperienceItem
+from services.parsing.sections import section_of
+from services.parsing.skills import extract_skills
 
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 PHONE_RE = re.compile(r"(\+?\d[\d\s\-\(\)]{7,}\d)")
@@ -8,6 +10,36 @@ LOCATION_RE = re.compile(
     r"([A-Za-zÀ-ÖØ-öø-ÿ'\- ]+)\s*(\d{5}),\s*([A-Za-zÀ-ÖØ-öø-ÿ'\- ]+)",
     flags=re.IGNORECASE
 )
+# LOCATION_RE backtracks on every line; only lines with its postal code are worth trying
+_POSTAL_RE = re.compile(r"\d{5},")
+TECH_RE = re.compile(r"Technologies?\s*:\s*(.+)", flags=re.IGNORECASE)
+_TECH_SPLIT_RE = re.compile(r"[,•\|]")
+
+_BULLET_RE = re.compile(r"^(?:[-•*·▪◦●○–—➢►✓]|\d{1,2}[.)])\s+")
+
+_MONTH = (
+    r"(?:janv(?:ier)?|f[ée]v(?:rier)?|mars|avr(?:il)?|mai|juin|juil(?:let)?|ao[uû]t|sept(?:embre)?|oct(?:obre)?"
+    r"|nov(?:embre)?|d[ée]c(?:embre)?|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sep(?:tember)?|october|november|december)\.?"
+)
+_DATE = rf"(?:{_MONTH}\s+(?:19|20)\d{{2}}|\d{{1,2}}/(?:19|20)\d{{2}}|(?:19|20)\d{{2}})"
+_NOW = r"(?:present|pr[ée]sent|aujourd.hui|ce jour|now|today|current(?:ly)?|actuel(?:lement)?|en cours|to date)"
+_DATE_RANGE_RE = re.compile(
+    rf"(?<!\w)(?:(?:de|du|from)\s+)?(?P<start>{_DATE})\s*(?:[-–—→]|\bà\b|\bau\b|\bto\b|\buntil\b|\bjusqu.(?:à|a|au)\b)\s*"
+    rf"(?P<end>{_DATE}|{_NOW})(?!\w)"
+    rf"|(?<!\w)(?:depuis|since)\s+(?P<since>{_DATE})(?!\w)",
+    flags=re.IGNORECASE,
+)
+_YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+_TITLE_SPLIT_RE = re.compile(r"\s*[|–—•,]\s*|\s+-\s+|\s*\(|\)")
+_EMPLOYER_RE = re.compile(r"\s+(?:chez|at|@)\s+", flags=re.IGNORECASE)
+_ROLE_RE = re.compile(
+    r"\b(?:engineer|ing[ée]nieure?|developer|d[ée]veloppeur|d[ée]veloppeuse|analyst|analyste|scientist|manager"
+    r"|consultante?|lead|head|chef|director|directeur|directrice|architecte?|intern|stagiaire|alternante?"
+    r"|apprentie?|responsable|charg[ée]e?|officer|specialist|sp[ée]cialiste|actuaire|actuary|owner|scrum master"
+    r"|devops|administrat(?:or|eur|rice)|technicien(?:ne)?|coordinat(?:or|eur|rice)|cto|ceo)\b",
+    flags=re.IGNORECASE,
+)
 
 
 def _clean_lines(text: str) -> List[str]:
@@ -15,65 +47,133 @@ def _clean_lines(text: str) -> List[str]:
     lines = [l for l in lines if l]
     return lines
 
-def extract_profile_from_text(text: str) -> Profile:
-    lines = _clean_lines(text)
 
-    full_name = lines[0] if lines else None
+def _apply_title(item: ExperienceItem, text: str):
+    """Fill role, company and location from a title line ("Data Engineer chez Acme, Paris", "ACME | Analyst")."""
+    employer = _EMPLOYER_RE.split(text, maxsplit=1)
+    if len(employer) == 2:
+        if item.role is None:
+            item.role = employer[0].strip(" |–—-,:") or None
+        parts = [p for p in _TITLE_SPLIT_RE.split(employer[1]) if p]
+        if parts and item.company is None:
+            item.company = parts[0]
+        if len(parts) > 1 and item.location is None:
+            item.location = parts[1]
+        return
 
-    email = None
-    m = EMAIL_RE.search(text)
-    if m:
-        email = m.group(0)
+    for part in _TITLE_SPLIT_RE.split(text):
+        part = part.strip(" -:")
+        if not part:
+            continue
+        if item.role is None and _ROLE_RE.search(part):
+            item.role = part
+        elif item.company is None:
+            item.company = part
+        elif item.location is None:
+            item.location = part
 
-    phone = None
-    m = PHONE_RE.search(text)
-    if m:
-        phone = m.group(0).strip()
 
-    location = None
-    for l in lines[:15]:  
-        m = LOCATION_RE.search(l)
-        if m:
-            city = m.group(1).strip()
-            postal = m.group(2).strip()
-            region = m.group(3).strip()
-            location = f"{city} {postal}, {region}"
-            break
-
-    linkedin = None
-    github = None
-    for l in lines:
-        low = l.lower()
+def extract_profile_from_text(text: str) -> Profile:
+    """Contact fields, summary, technologies and experiences in one pass over the lines.
+
+    In the experience section a line is a bullet, the continuation of a
+    hard-wrapped bullet, or a title line carrying dates, role, company or
+    location. After bullets, only a line with a date range, a role or an
+    employer ("chez Acme", "at Acme") opens the next experience; any other
+    line joins the current one's bullets. A second date range also opens
+    the next experience. Skills come from the gazetteer's own linear scan.
+    """
+    full_name = headline = email = phone = location = linkedin = github = None
+    summary: List[str] = []
+    technologies: List[str] = []
+    seen_tech = set()
+    experiences: List[ExperienceItem] = []
+    section = None
+    current: Optional[ExperienceItem] = None
+    after_bullet = False
+
+    for n, line in enumerate(_clean_lines(text)):
+        if n == 0:
+            full_name = line
+        elif n == 1:
+            headline = line
+
+        if email is None:
+            m = EMAIL_RE.search(line)
+            if m:
+                email = m.group(0)
+        if phone is None:
+            m = PHONE_RE.search(line)
+            if m:
+                phone = m.group(0).strip()
+        if location is None and n < 15 and _POSTAL_RE.search(line):
+            m = LOCATION_RE.search(line)
+            if m:
+                location = f"{m.group(1).strip()} {m.group(2).strip()}, {m.group(3).strip()}"
+        low = line.lower()
         if "linkedin.com/" in low:
-            linkedin = l
+            linkedin = line
         if "github.com/" in low:
-            github = l
-
-    headline = lines[1] if len(lines) > 1 else None
-
-    summary = None
-    t = text
-    prof_match = re.search(r"\bPROFIL\b", t, flags=re.IGNORECASE)
-    exp_match = re.search(r"\bEXP[ÉE]RIENCES\b", t, flags=re.IGNORECASE)
-    if prof_match and exp_match and exp_match.start() > prof_match.end():
-        summary = t[prof_match.end():exp_match.start()].strip()
-        summary = re.sub(r"\s+\n", "\n", summary)
-
-    technologies = []
-    tech_match = re.findall(r"Technologies?\s*:\s*(.+)", text, flags=re.IGNORECASE)
-    for grp in tech_match:
-        parts = re.split(r"[,•\|\n]", grp)
-        technologies.extend([p.strip() for p in parts if p.strip()])
-
-    seen = set()
-    technologies_clean = []
-    for x in technologies:
-        key = x.lower()
-        if key not in seen:
-            seen.add(key)
-            technologies_clean.append(x)
-
-    profile = Profile(
+            github = line
+
+        m = TECH_RE.search(line)
+        if m:
+            for p in _TECH_SPLIT_RE.split(m.group(1)):
+                p = p.strip()
+                if p and p.lower() not in seen_tech:
+                    seen_tech.add(p.lower())
+                    technologies.append(p)
+            # part of an experience's body, like its bullets
+            after_bullet = current is not None
+            continue
+
+        kind = section_of(line)
+        # job posting headers ("Missions") are sub-headings inside an experience here
+        if kind and kind != "posting":
+            section, current, after_bullet = kind, None, False
+            continue
+        if section == "summary":
+            summary.append(line)
+            continue
+        if section != "experience":
+            continue
+
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            if current is None:
+                current = ExperienceItem()
+                experiences.append(current)
+            current.bullets.append(line[bullet.end():])
+            after_bullet = True
+            continue
+        if after_bullet and line[0].islower() and current.bullets:
+            current.bullets[-1] += " " + line
+            continue
+
+        dates = _DATE_RANGE_RE.search(line) if _YEAR_RE.search(line) else None
+        if after_bullet and not (dates or _ROLE_RE.search(line) or _EMPLOYER_RE.search(line)):
+            # a description line under the bullets ("Stack : ...", "Projet phare : ..."), not a new title
+            current.bullets.append(line)
+            continue
+        if current is None or after_bullet or (dates and current.start is not None):
+            current = ExperienceItem()
+            experiences.append(current)
+        after_bullet = False
+        if dates:
+            current.start = dates.group("start") or dates.group("since")
+            current.end = dates.group("end") or "present"
+            line = (line[:dates.start()] + " " + line[dates.end():]).strip(" |–—-,:()")
+            if not line:
+                continue
+        if current.role is None or current.company is None:
+            _apply_title(current, line)
+        elif current.location is None and len(line.split()) <= 4:
+            current.location = line
+        else:
+            # a description paragraph under the title
+            current.bullets.append(line)
+
+    return Profile(
         full_name=full_name,
         headline=headline,
         email=email,
@@ -81,9 +181,8 @@ def extract_profile_from_text(text: str) -> Profile:
         location=location,
         linkedin=linkedin,
         github=github,
-        summary=summary,
-        technologies=technologies_clean,
-        skills=[],
-        experiences=[],
+        summary="\n".join(summary) or None,
+        technologies=technologies,
+        skills=extract_skills(text),
+        experiences=[e for e in experiences if e.role or e.company or e.bullets],
     )
-    return profile
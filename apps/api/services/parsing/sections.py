@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+
+# section headers, lowercased and accent-folded; the name of the group that matched is the section.
+# "posting" holds the headers of job descriptions, which never open a resume section.
+_HEADER_RE = re.compile(
+    r"(?:(?P<summary>profil(?: professionnel)?|profile|(?:professional )?summary|resume|a propos(?: de moi)?"
+    r"|about(?: me)?|objecti(?:f|ve)s?)"
+    r"|(?P<experience>experiences?(?: professionnelles?)?|(?:professional|work) experiences?"
+    r"|employment(?: history)?|parcours professionnel|emplois?|work history)"
+    r"|(?P<education>formations?|education|etudes|diplomes?|academic background|cursus)"
+    r"|(?P<skills>(?:technical )?skills|competences(?: techniques)?|outils|tools)"
+    r"|(?P<other>projets?(?: personnels)?|(?:personal )?projects?|certifications?|langues|languages"
+    r"|centres? d.interets?|loisirs|interests|hobbies|references|publications|benevolat|volunteering)"
+    r"|(?P<posting>responsibilities|(?:vos |your )?missions|requirements|qualifications|profil recherche"
+    r"|(?:about )?the role|about us|what you.ll do|nice to have|benefits|avantages|(?:tech )?stack"
+    r"|le poste|description du poste))(?!\w)"
+)
+_COMBINING_RE = re.compile(r"[\u0300-\u036f]")
+_BULLET_RE = re.compile(r"^\s*(?:[-•*·▪◦●○–—➢►✓]|\d{1,2}[.)])\s+")
+
+
+def section_of(line: str) -> str | None:
+    """Kind of section a header line opens ("experience", "skills", ..., "posting"), or None.
+
+    The whole normalised line has to be the header: "Experience with Spark"
+    or "Skills: Python, SQL" are content. The one exception is an all-caps
+    banner that starts with a header ("EXPERIENCES PROFESSIONNELLES 2015-2024").
+    """
+    line = line.strip()
+    if len(line) > 60 or _BULLET_RE.match(line):
+        return None
+    key = _COMBINING_RE.sub("", unicodedata.normalize("NFKD", line.lower())).strip(" :-–—#*")
+    m = _HEADER_RE.fullmatch(key)
+    if m:
+        return m.lastgroup
+    m = _HEADER_RE.match(key)
+    letters = [c for c in line if c.isalpha()]
+    if m and len(line.split()) <= 6 and all(c.isupper() for c in letters):
+        return m.lastgroup
+    return None
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+SKILLS_GAZETTEER = os.getenv("SKILLS_GAZETTEER", os.path.join(os.path.dirname(__file__), "skills.txt"))
+
+# "+", "#" and inner dots keep c++, c#, node.js and .net whole; "-", "/", "_" and spaces separate tokens
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*|\.[a-z0-9]+")
+
+
+def _fold_table() -> dict[int, str]:
+    table = {}
+    for cp in range(0x80, 0x250):
+        c = chr(cp)
+        folded = "".join(x for x in unicodedata.normalize("NFKD", c) if not unicodedata.combining(x))
+        if folded != c:
+            table[cp] = folded
+    table.update({ord("œ"): "oe", ord("æ"): "ae", ord("ß"): "ss", ord("’"): "'"})
+    return table
+
+
+# str.translate folds accents at C speed; NFKD per character would dominate a scan
+_FOLD = _fold_table()
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower().translate(_FOLD))
+
+
+class SkillGazetteer:
+    """Canonical skills and their aliases compiled into a token-level Aho-Corasick automaton.
+
+    The automaton's alphabet is tokens rather than characters: the text is
+    tokenized by one regex pass, then each token costs a dict lookup plus
+    failure transitions, so a scan is linear in the text whatever the number
+    of aliases. Overlapping matches resolve leftmost-longest, so "PL/SQL" is
+    not also "SQL".
+    """
+
+    def __init__(self, entries: list[tuple[str, list[str]]]):
+        self.aliases: dict[tuple[str, ...], str] = {}
+        joined: dict[tuple[str, ...], str] = {}
+        for canonical, names in entries:
+            for name in names:
+                tokens = tuple(tokenize(name))
+                # one-letter tokens ("c", "r") are too ambiguous on their own
+                if not tokens or (len(tokens) == 1 and len(tokens[0]) < 2):
+                    continue
+                self.aliases.setdefault(tokens, canonical)
+                if 1 < len(tokens) <= 3:
+                    # "power bi" is also written "powerbi"; a listed alias wins over a joined one
+                    joined.setdefault(("".join(tokens),), canonical)
+        for tokens, canonical in joined.items():
+            self.aliases.setdefault(tokens, canonical)
+        self.skills = sorted({c for c, _ in entries})
+        self._build()
+
+    def _build(self):
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[tuple[int, str], ...]] = [()]
+        for tokens, canonical in self.aliases.items():
+            node = 0
+            for tok in tokens:
+                nxt = goto[node].get(tok)
+                if nxt is None:
+                    nxt = goto[node][tok] = len(goto)
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] = ((len(tokens), canonical),)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for tok, child in goto[node].items():
+                f = fail[node]
+                while f and tok not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(tok, 0)
+                # an alias ending here also ends every alias that is a suffix of it
+                out[child] = out[child] + out[fail[child]]
+                queue.append(child)
+
+        self._goto, self._fail, self._out = goto, fail, out
+
+    @property
+    def size(self) -> int:
+        return len(self.aliases)
+
+    def scan(self, tokens: list[str]) -> list[tuple[int, int, str]]:
+        """(start, end, canonical) token spans, leftmost-longest and non-overlapping."""
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        hits = []
+        node = 0
+        for i, tok in enumerate(tokens):
+            while node and tok not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(tok, 0) if node else root.get(tok, 0)
+            for length, canonical in out[node]:
+                hits.append((i + 1 - length, i + 1, canonical))
+
+        hits.sort(key=lambda h: (h[0], -h[1]))
+        spans, end = [], 0
+        for h in hits:
+            if h[0] >= end:
+                spans.append(h)
+                end = h[1]
+        return spans
+
+    def extract(self, text: str) -> list[str]:
+        """Canonical skills mentioned in text, in order of first mention."""
+        return list(dict.fromkeys(c for _, _, c in self.scan(tokenize(text))))
+
+    def canonical(self, name: str) -> str | None:
+        return self.aliases.get(tuple(tokenize(name)))
+
+
+def load_entries(path: str) -> list[tuple[str, list[str]]]:
+    """(canonical, names to match) per line; a leading "~" keeps the canonical name out of the matched names."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            names = [n.strip() for n in line.lstrip("~").split("|") if n.strip()]
+            entries.append((names[0], names[1:] if line.startswith("~") else names))
+    return entries
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> SkillGazetteer:
+    return SkillGazetteer(load_entries(SKILLS_GAZETTEER))
+
+
+def canonical_skill(name: str) -> str | None:
+    return get_gazetteer().canonical(name)
+
+
+def extract_skills(text: str) -> list[str]:
+    return get_gazetteer().extract(text)
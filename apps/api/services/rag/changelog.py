@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+
+# entries kept across all collections; a reader further behind than this rebuilds from the store
+VECTOR_CHANGELOG_KEEP = int(os.getenv("VECTOR_CHANGELOG_KEEP", "20000"))
+_PRUNE_EVERY = 256
+
+
+class VectorChangeLog:
+    """Append-only log of the ids each vector store write touched, shared by every worker through SQLite.
+
+    The sequence number is a version that survives restarts and is the same
+    in every process, so in-memory views of a collection (the ranking
+    matrices) can tell they are stale and replay only the ids that changed.
+    """
+
+    def __init__(self, path: str, keep: int):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._appends = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, op TEXT NOT NULL, ids TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS changes_collection ON changes(collection, seq)")
+        # highest seq pruned away: readers behind it cannot replay
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pruned (id INTEGER PRIMARY KEY CHECK (id = 0), seq INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO pruned (id, seq) VALUES (0, 0)")
+
+    def append(self, collection: str, op: str, ids: list[str]):
+        if not ids:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO changes (collection, op, ids) VALUES (?, ?, ?)", (collection, op, json.dumps(list(ids)))
+            )
+            self._appends += 1
+            if self._appends % _PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self):
+        latest = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        cutoff = latest - self.keep
+        if cutoff > 0:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM changes WHERE seq <= ?", (cutoff,))
+            self._conn.execute("UPDATE pruned SET seq = MAX(seq, ?) WHERE id = 0", (cutoff,))
+            self._conn.execute("COMMIT")
+
+    def latest(self, collection: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM changes WHERE collection = ?", (collection,)).fetchone()
+            if row[0] is not None:
+                return row[0]
+            # every entry of this collection was pruned: any seq above what a reader saw still means "changed"
+            return self._conn.execute("SELECT seq FROM pruned WHERE id = 0").fetchone()[0]
+
+    def since(self, collection: str, seq: int) -> list[tuple[int, str, list[str]]] | None:
+        """Changes after seq in order, or None when some were pruned and the reader must rebuild."""
+        with self._lock:
+            if seq < self._conn.execute("SELECT seq FROM pruned WHERE id = 0").fetchone()[0]:
+                return None
+            rows = self._conn.execute(
+                "SELECT seq, op, ids FROM changes WHERE collection = ? AND seq > ? ORDER BY seq", (collection, seq)
+            ).fetchall()
+        return [(s, op, json.loads(ids)) for s, op, ids in rows]
@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import os
+import re
+import time
+
+from services.observability.metrics import record
+from services.parsing.sections import section_of
+from services.rag.tokens import count_tokens, truncate_tokens
+
+# the local MiniLM model truncates at 256 word pieces; stay under it with room for the section heading
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+# sentences/bullets repeated at the start of the next chunk of the same section
+CHUNK_OVERLAP_SENTENCES = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "1"))
+
+_BULLET_RE = re.compile(r"^\s*(?:[-•*·▪◦●○–—➢►✓]|\d{1,2}[.)])\s+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+(?=[A-ZÀ-Ý0-9\"“(])")
+
+
 def chunk_text(text: str, max_chars: int = 900, overlap: int = 150) -> list[str]:
     text = (text or "").strip()
     if not text:
         return []
-    
+
     text = text.replace("\r\n", "\n").replace("\r", "\n")
 
     chunks: list[str] = []
@@ -27,3 +44,121 @@ def chunk_text(text: str, max_chars: int = 900, overlap: int = 150) -> list[str]
             start = end
 
     return chunks
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 60 or _BULLET_RE.match(line):
+        return False
+    # the same header detector as the resume parser: the whole line must be the header
+    if section_of(line):
+        return True
+    words = line.split()
+    letters = [c for c in line if c.isalpha()]
+    # all-caps banners ("EXPERIENCES PROFESSIONNELLES"), not acronyms or skill lists ("SQL", "AWS, GCP")
+    if len(words) <= 6 and len(letters) >= 5 and "," not in line and all(c.isupper() for c in letters):
+        return True
+    return len(words) <= 6 and line.endswith(":")
+
+
+def _sections(text: str) -> list[tuple[str | None, list[str]]]:
+    """(heading, units) per section; units are bullets and sentences, hard-wrapped lines rejoined."""
+    sections: list[tuple[str | None, list[str]]] = [(None, [])]
+    paragraph: list[str] = []
+
+    def end_paragraph():
+        if paragraph:
+            sections[-1][1].extend(s for s in _SENTENCE_RE.split(" ".join(paragraph)) if s)
+            paragraph.clear()
+
+    for raw in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = raw.strip()
+        if not line:
+            end_paragraph()
+        elif _is_heading(line):
+            end_paragraph()
+            sections.append((line, []))
+        elif _BULLET_RE.match(line):
+            end_paragraph()
+            paragraph.append(line)
+        else:
+            paragraph.append(line)
+    end_paragraph()
+    return [(h, units) for h, units in sections if h or units]
+
+
+def _split_word(word: str, max_tokens: int) -> list[tuple[str, int]]:
+    # a URL, base64 blob or table pasted without spaces: cut it at token boundaries
+    out = []
+    while word:
+        part = truncate_tokens(word, max_tokens) or word[:1]
+        out.append((part, count_tokens(part)))
+        word = word[len(part):]
+    return out
+
+
+def _split_oversized(unit: str, max_tokens: int) -> list[tuple[str, int]]:
+    words, out, buf, buf_tokens = unit.split(), [], [], 0
+    for w in words:
+        t = count_tokens(w)
+        if t > max_tokens:
+            if buf:
+                out.append((" ".join(buf), buf_tokens))
+                buf, buf_tokens = [], 0
+            *parts, (w, t) = _split_word(w, max_tokens)
+            out.extend(parts)
+        if buf and buf_tokens + t > max_tokens:
+            out.append((" ".join(buf), buf_tokens))
+            buf, buf_tokens = [], 0
+        buf.append(w)
+        buf_tokens += t
+    if buf:
+        out.append((" ".join(buf), buf_tokens))
+    return out
+
+
+def chunk_document(text: str, max_tokens: int | None = None, overlap_sentences: int | None = None) -> list[str]:
+    """Section-aware chunks of at most max_tokens model tokens.
+
+    Whole sections are packed together while they fit; a section that does
+    not fit starts a new chunk and is split on bullets/sentences, each of its
+    chunks repeating the heading and the last overlap_sentences units of the
+    previous one. Overlap never crosses a section boundary. Linear in the
+    length of the text: every unit is tokenized once.
+    """
+    t0 = time.perf_counter()
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    overlap = CHUNK_OVERLAP_SENTENCES if overlap_sentences is None else overlap_sentences
+
+    chunks: list[str] = []
+    buf: list[tuple[str, int, int, bool]] = []  # (text, tokens, section index, is heading)
+    buf_tokens = 0
+
+    for si, (heading, units) in enumerate(_sections(text or "")):
+        sized = []
+        for u in units:
+            t = count_tokens(u)
+            sized.extend(_split_oversized(u, max_tokens) if t > max_tokens else [(u, t)])
+        head = (heading, count_tokens(heading), si, True) if heading else None
+        items = ([head] if head else []) + [(u, t, si, False) for u, t in sized]
+
+        if buf and buf_tokens + sum(i[1] for i in items) > max_tokens:
+            chunks.append("\n".join(i[0] for i in buf))
+            buf, buf_tokens = [], 0
+
+        for item in items:
+            if buf and buf_tokens + item[1] > max_tokens:
+                chunks.append("\n".join(i[0] for i in buf))
+                carry = [i for i in buf[max(0, len(buf) - overlap):] if i[2] == si and not i[3]] if overlap else []
+                buf = ([head] if head and head[1] + item[1] <= max_tokens else []) + carry
+                buf_tokens = sum(i[1] for i in buf)
+                while carry and buf_tokens + item[1] > max_tokens:
+                    dropped = carry.pop(0)
+                    buf.remove(dropped)
+                    buf_tokens -= dropped[1]
+            buf.append(item)
+            buf_tokens += item[1]
+
+    if buf:
+        chunks.append("\n".join(i[0] for i in buf))
+    record("chunking", time.perf_counter() - t0)
+    return chunks
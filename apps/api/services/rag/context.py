@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import re
+
+import numpy as np
+
+from services.rag.tokens import count_tokens, truncate_tokens
+
+# prompt-side budgets, in the same token estimate as the chunker; with the
+# instructions and the reply (num_predict) they must fit in OLLAMA_NUM_CTX
+PROMPT_JOB_TOKENS = int(os.getenv("PROMPT_JOB_TOKENS", "900"))
+PROMPT_RESUME_TOKENS = int(os.getenv("PROMPT_RESUME_TOKENS", "1200"))
+PROMPT_ANSWER_TOKENS = int(os.getenv("PROMPT_ANSWER_TOKENS", "1500"))
+# the "[RESUME_CHUNK 3]" label and separator in front of every block
+_LABEL_TOKENS = 8
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _line_key(line: str) -> str:
+    return " ".join(line.lower().split())
+
+
+def cut_to_tokens(text: str, budget: int) -> tuple[str, int]:
+    """The longest prefix of text within budget tokens, ending at a sentence boundary when one fits, else a word.
+
+    When not even the first word fits (a run of characters with no spaces),
+    the text is cut at a token boundary, so the budget is still filled.
+    """
+    for pieces, sep in ((_SENTENCE_END_RE.split(text), " "), (text.split(), " ")):
+        kept, used = [], 0
+        for piece in pieces:
+            t = count_tokens(piece)
+            if used + t > budget:
+                break
+            kept.append(piece)
+            used += t
+        if kept:
+            out = sep.join(kept).strip()
+            return out, count_tokens(out)
+    out = truncate_tokens(text, budget).strip()
+    return out, count_tokens(out)
+
+
+def pack_chunks(texts: list[str], budget: int, order: list[int] | None = None) -> tuple[list[tuple[int, str]], int]:
+    """(index, text) of the chunks that fit in budget tokens, and the tokens used.
+
+    Chunks are taken in order (default: as given). Lines already packed are
+    dropped, which removes the sentences chunk overlap repeats and the
+    headings repeated on every chunk of a section; the chunk that crosses the
+    budget is cut at a line boundary and packing stops there. The line that
+    crosses it is cut at a sentence or word boundary, so one long line (a
+    posting pasted without line breaks) still fills the budget.
+    """
+    seen: set[str] = set()
+    packed, used = [], 0
+    for k in order if order is not None else range(len(texts)):
+        if used + _LABEL_TOKENS >= budget:
+            break
+        lines, size, full = [], _LABEL_TOKENS, True
+        for line in texts[k].split("\n"):
+            key = _line_key(line)
+            if not key or key in seen:
+                continue
+            t = count_tokens(line)
+            if used + size + t > budget:
+                full = False
+                part, t = cut_to_tokens(line.strip(), budget - used - size)
+                if part:
+                    lines.append(part)
+                    size += t
+                break
+            seen.add(key)
+            lines.append(line.strip())
+            size += t
+        if lines:
+            packed.append((k, "\n".join(lines)))
+            used += size
+        if not full:
+            break
+    return packed, used
+
+
+def central_order(embeddings) -> list[int]:
+    """Chunk indexes by similarity to the chunks' centroid: requirements first, boilerplate last."""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    return [int(i) for i in np.argsort(-(vectors @ vectors.mean(axis=0)), kind="stable")]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+
+from services.embeddings.provider import embed_texts, get_model_name
+from services.rag.vectorstore import delete_documents, get_documents, upsert_documents
+
+
+def content_hash(text: str) -> str:
+    # the model is part of the hash: switching EMBEDDINGS_PROVIDER re-embeds everything once
+    return hashlib.sha256(f"{get_model_name()}\n{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_ids(prefix: str, chunks: list[str]) -> tuple[list[str], list[str]]:
+    """Content-addressed ids ({prefix}::chunk::{hash}) and hashes; repeated chunks get a -n suffix."""
+    ids, hashes, seen = [], [], {}
+    for chunk in chunks:
+        h = content_hash(chunk)
+        n = seen[h] = seen.get(h, 0) + 1
+        ids.append(f"{prefix}::chunk::{h}" if n == 1 else f"{prefix}::chunk::{h}-{n}")
+        hashes.append(h)
+    return ids, hashes
+
+
+def plan_sync(collection: str, ids: list[str], documents: list[str], metadatas: list[dict], where: dict | None) -> dict:
+    """Diff one document's chunks against what is stored under where.
+
+    metadatas must carry each chunk's content_hash. Chunks whose id and hash
+    are already stored keep their embedding (re-written only if their metadata
+    moved, e.g. a new chunk_index); the rest are embedded; stored chunks that
+    are no longer produced are stale. Stored chunks whose metadata lost a
+    field (a company or location cleared) are replaced: Chroma's upsert
+    merges metadata and would keep the old value. where=None means a new
+    document with nothing stored yet.
+    """
+    existing = get_documents(collection, where=where, include=["metadatas"]) if where else {}
+    stored = dict(zip(existing.get("ids") or [], existing.get("metadatas") or []))
+
+    current = set(ids)
+    plan = {"embed": [], "reuse": [], "replace": [], "unchanged": 0, "stale": [i for i in stored if i not in current]}
+    for item in zip(ids, documents, metadatas):
+        old = stored.get(item[0])
+        if old is not None and old.keys() - item[2].keys():
+            plan["replace"].append(item[0])
+        if old is None or old.get("content_hash") != item[2]["content_hash"]:
+            plan["embed"].append(item)
+        elif old != item[2]:
+            plan["reuse"].append(item)
+        else:
+            plan["unchanged"] += 1
+    return plan
+
+
+def apply_sync(collection: str, plans: list[dict]) -> list[dict]:
+    """One embedding call and one upsert for every plan, then the stale chunks are deleted.
+
+    New chunks are written before old ones go, so a reader never sees a
+    document with neither version; only chunks to replace are deleted just
+    before their own upsert, so both backends end with the same metadata.
+    Returns per-plan counts.
+    """
+    by_id = {}
+    reuse = [item for p in plans for item in p["reuse"]]
+    if reuse:
+        res = get_documents(collection, ids=[i for i, _, _ in reuse], include=["embeddings"])
+        by_id = dict(zip(res["ids"], res["embeddings"]))
+        for p in plans:
+            # deleted since plan_sync (a concurrent re-upload of the same document): embed those again
+            p["embed"] = p["embed"] + [item for item in p["reuse"] if item[0] not in by_id]
+            p["reuse"] = [item for item in p["reuse"] if item[0] in by_id]
+
+    embed = [item for p in plans for item in p["embed"]]
+    reuse = [item for p in plans for item in p["reuse"]]
+    replace = [i for p in plans for i in p["replace"]]
+    stale = [i for p in plans for i in p["stale"]]
+
+    vectors = list(embed_texts([doc for _, doc, _ in embed])) if embed else []
+    vectors += [by_id[i] for i, _, _ in reuse]
+    if replace:
+        delete_documents(collection, ids=replace)
+
+    items = embed + reuse
+    if items:
+        upsert_documents(
+            collection_name=collection,
+            ids=[i for i, _, _ in items],
+            documents=[doc for _, doc, _ in items],
+            embeddings=[list(v) for v in vectors],
+            metadatas=[meta for _, _, meta in items],
+        )
+    if stale:
+        delete_documents(collection, ids=stale)
+
+    return [
+        {
+            "embedded": len(p["embed"]),
+            "unchanged": p["unchanged"] + len(p["reuse"]),
+            "deleted": len(p["stale"]),
+            "changed": bool(p["embed"] or p["reuse"] or p["stale"]),
+        }
+        for p in plans
+    ]
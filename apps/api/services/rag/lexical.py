@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+
+from services.rag.mmap_store import where_to_sql
+
+LEXICAL_INDEX_ENABLED = os.getenv("LEXICAL_INDEX_ENABLED", "1") == "1"
+# derived from the vector store's documents and rebuilt from them when missing
+LEXICAL_INDEX_PATH = os.path.abspath(os.getenv(
+    "LEXICAL_INDEX_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", ".cache", "lexical.sqlite"),
+))
+# long queries (a whole job description) keep only their rarest terms
+LEXICAL_MAX_QUERY_TERMS = int(os.getenv("LEXICAL_MAX_QUERY_TERMS", "32"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# letters/digits plus the symbols that make tool names distinct: c++, c#, .net, node.js
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*|\.net\b")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the to was were will with "
+    "au aux avec ce ces dans de des du en est et il la le les leur nous ou par pas pour qui sa se ses "
+    "son sur un une vous".split()
+)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list[str]:
+    # accents folded so "Solvabilité" and "solvabilite" are the same term
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+class LexicalIndex:
+    """BM25 inverted index in SQLite, one namespace per vector store collection.
+
+    docs keeps each chunk's length and metadata (so Chroma-style where filters
+    apply here too); postings holds term frequencies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: dict[str, tuple[int, float]] = {}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " collection TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " PRIMARY KEY (collection, id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " collection TEXT NOT NULL,"
+            " term TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " tf INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_term ON postings(collection, term)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_id ON postings(collection, id)")
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs WHERE collection = ?", (collection,)).fetchone()[0]
+
+    def upsert(self, collection: str, ids: list[str], documents: list[str], metadatas: list[dict] | None = None):
+        metadatas = metadatas or [{}] * len(ids)
+        docs, postings = [], []
+        for id_, doc, meta in zip(ids, documents, metadatas):
+            terms = Counter(tokenize(doc))
+            docs.append((collection, id_, sum(terms.values()), json.dumps(meta or {}, ensure_ascii=False)))
+            postings.extend((collection, term, id_, tf) for term, tf in terms.items())
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_ids(collection, ids)
+                self._conn.executemany("INSERT INTO docs (collection, id, length, metadata) VALUES (?, ?, ?, ?)", docs)
+                self._conn.executemany("INSERT INTO postings (collection, term, id, tf) VALUES (?, ?, ?, ?)", postings)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._stats.pop(collection, None)
+
+    def delete(self, collection: str, ids: list[str] | None = None, where: dict | None = None):
+        with self._lock:
+            if ids is None:
+                if not where:
+                    return
+                sql, params = where_to_sql(where)
+                ids = [i for (i,) in self._conn.execute(
+                    f"SELECT id FROM docs WHERE collection = ? AND {sql}", [collection] + params
+                )]
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_ids(collection, ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._stats.pop(collection, None)
+
+    def clear(self, collection: str):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM docs WHERE collection = ?", (collection,))
+            self._conn.execute("DELETE FROM postings WHERE collection = ?", (collection,))
+            self._conn.execute("COMMIT")
+            self._stats.pop(collection, None)
+
+    def _delete_ids(self, collection: str, ids: list[str]):
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            marks = ",".join("?" * len(part))
+            self._conn.execute(f"DELETE FROM docs WHERE collection = ? AND id IN ({marks})", [collection] + part)
+            self._conn.execute(f"DELETE FROM postings WHERE collection = ? AND id IN ({marks})", [collection] + part)
+
+    def _collection_stats(self, collection: str) -> tuple[int, float]:
+        if collection not in self._stats:
+            n, avg = self._conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM docs WHERE collection = ?", (collection,)
+            ).fetchone()
+            self._stats[collection] = (n, avg or 0.0)
+        return self._stats[collection]
+
+    def search(self, collection: str, query: str, k: int = 10, where: dict | None = None) -> list[tuple[str, float]]:
+        """Top-k (id, bm25 score) for query, optionally restricted by a metadata filter."""
+        terms = Counter(tokenize(query))
+        if not terms or k <= 0:
+            return []
+
+        with self._lock:
+            n_docs, avg_len = self._collection_stats(collection)
+            if n_docs == 0:
+                return []
+
+            marks = ",".join("?" * len(terms))
+            df = dict(self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE collection = ? AND term IN ({marks}) GROUP BY term",
+                [collection] + list(terms),
+            ).fetchall())
+            if not df:
+                return []
+            # rarest terms carry the evidence (tool names, certifications); common ones only cost postings scans
+            keep = sorted(df, key=df.__getitem__)[:LEXICAL_MAX_QUERY_TERMS]
+
+            sql, params = where_to_sql(where, column="d.metadata")
+            marks = ",".join("?" * len(keep))
+            rows = self._conn.execute(
+                "SELECT p.id, p.term, p.tf, d.length FROM postings p"
+                " JOIN docs d ON d.collection = p.collection AND d.id = p.id"
+                f" WHERE p.collection = ? AND p.term IN ({marks}) AND {sql}",
+                [collection] + keep + params,
+            ).fetchall()
+
+        scores: dict[str, float] = {}
+        for id_, term, tf, length in rows:
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (avg_len or 1)))
+            scores[id_] = scores.get(id_, 0.0) + idf * norm * terms[term]
+        return sorted(scores.items(), key=lambda kv: -kv[1])[:k]
+
+
+def get_lexical_index() -> LexicalIndex | None:
+    global _index
+    if not LEXICAL_INDEX_ENABLED:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex(LEXICAL_INDEX_PATH)
+    return _index
@@ -0,0 +1,559 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+# rows per matrix-vector product; bounds the temporary (and, when quantized, the upcast) block
+QUERY_BLOCK_ROWS = int(os.getenv("MMAP_QUERY_BLOCK_ROWS", "32768"))
+UPCAST_ROWS = 1024
+# storage of the scanned copy for new collections: float32, float16 or int8
+MMAP_VECTOR_DTYPE = os.getenv("MMAP_VECTOR_DTYPE", "float32").lower()
+# quantized scans keep k * factor candidates and re-score them in float32; 0 returns the approximate order
+MMAP_RESCORE_FACTOR = int(os.getenv("MMAP_RESCORE_FACTOR", "4"))
+# rewrite the files once dead rows pass this share of them (and MMAP_COMPACT_MIN_DEAD); 0 only compacts on request
+MMAP_COMPACT_DEAD_RATIO = float(os.getenv("MMAP_COMPACT_DEAD_RATIO", "0.25"))
+MMAP_COMPACT_MIN_DEAD = 1024
+
+_OPS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _json_path(field: str) -> str:
+    return '$."' + field.replace('"', '\\"') + '"'
+
+
+def where_fields(where: dict | None) -> set[str]:
+    fields = set()
+    for key, cond in (where or {}).items():
+        if key in ("$and", "$or"):
+            for c in cond:
+                fields |= where_fields(c)
+        else:
+            fields.add(key)
+    return fields
+
+
+def where_to_sql(where: dict | None, column: str = "metadata") -> tuple[str, list]:
+    """Chroma-style metadata filter -> SQL over the JSON metadata column."""
+    if not where:
+        return "1", []
+
+    clauses, params = [], []
+    for key, cond in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(c, column) for c in cond]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, p in parts:
+                params.extend(p)
+            continue
+
+        field = f"json_extract({column}, '{_json_path(key)}')"
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, value in cond.items():
+            if op in ("$in", "$nin"):
+                marks = ",".join("?" * len(value)) or "NULL"
+                clauses.append(f"{field} {'IN' if op == '$in' else 'NOT IN'} ({marks})")
+                params.extend(value)
+            elif op in _OPS:
+                clauses.append(f"{field} {_OPS[op]} ?")
+                params.append(value)
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+    return " AND ".join(clauses) or "1", params
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """Compact scan copy of float32 rows: float16, or symmetric int8 with one float32 scale per row."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _upcast_dot(block: np.ndarray, q: np.ndarray) -> np.ndarray:
+    # upcast through a small reused buffer that stays in cache; a whole-block astype is 2-3x slower
+    out = np.empty(len(block), dtype=np.float32)
+    buf = np.empty((min(UPCAST_ROWS, len(block)), block.shape[1]), dtype=np.float32)
+    for start in range(0, len(block), len(buf)):
+        n = min(len(buf), len(block) - start)
+        np.copyto(buf[:n], block[start:start + n], casting="unsafe")
+        out[start:start + n] = buf[:n] @ q
+    return out
+
+
+class MmapCollection:
+    """Exact-search collection: row-aligned files read through np.memmap plus a SQLite sidecar.
+
+    {name}.f32    float32 vectors, one row per chunk, appended and never moved
+    {name}.norms  squared L2 norm per row; +inf marks a row that is not live
+    {name}.f16 / {name}.i8 + {name}.scales
+                  compact copy scanned by queries when the collection is quantized
+    {name}.sqlite id -> row, document and JSON metadata
+
+    Readers only stat and map the files, so every uvicorn worker shares the
+    same page cache; writers serialize on the SQLite write lock. With a
+    quantized collection only the compact file is scanned; the float32 file
+    is read for the few rows being re-scored and for get(include=embeddings).
+
+    Rows are never rewritten in place: an upsert appends new rows with a +inf
+    norm and only gives them their real norm once the sidecar points at them,
+    then tombstones the rows they replace. compact() copies the live rows to
+    a new generation of files ({name}@{n}.f32, ...) and renumbers the sidecar
+    in the same transaction that publishes the generation.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        self.base = os.path.join(directory, name)
+
+        self._conn = sqlite3.connect(self.base + ".sqlite", check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, document TEXT, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # one connection per collection; the lock keeps a reader from interleaving with a write transaction
+        self._lock = threading.RLock()
+        self._dim = None
+        self._dtype = None
+        self._maps: dict[str, np.ndarray] = {}
+        self._mapped_key = None
+        self._indexed_fields: set[str] = set()
+        self._recover()
+
+    def _ensure_indexes(self, where: dict | None):
+        # expression index per filtered metadata field, created on first use so filters
+        # like {"candidate_id": ...} are index lookups instead of a JSON scan of every row
+        for field in where_fields(where) - self._indexed_fields:
+            if field.replace("_", "").isalnum():
+                with self._lock:
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS rows_meta_{field} ON rows(json_extract(metadata, '{_json_path(field)}'))"
+                    )
+            self._indexed_fields.add(field)
+
+    def _load_meta(self):
+        if self._dim is None:
+            with self._lock:
+                meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+            if "dim" in meta:
+                self._dim = int(meta["dim"])
+                # collections created before quantization existed have no dtype entry
+                self._dtype = meta.get("dtype", "float32")
+
+    def _generation(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _files(self, generation: int) -> dict[str, tuple[str, type, int]]:
+        """Row-aligned files of one generation: name -> (path, dtype, values per row)."""
+        # "@" cannot appear in a collection name, so generations never collide with another collection
+        base = self.base if generation == 0 else f"{self.base}@{generation}"
+        files = {
+            "vectors": (base + ".f32", np.float32, self._dim),
+            "norms": (base + ".norms", np.float32, 1),
+        }
+        if self._dtype == "float16":
+            files["codes"] = (base + ".f16", np.float16, self._dim)
+        elif self._dtype == "int8":
+            files["codes"] = (base + ".i8", np.int8, self._dim)
+            files["scales"] = (base + ".scales", np.float32, 1)
+        return files
+
+    def _row_count(self, generation: int) -> int:
+        files = self._files(generation)
+        if not all(os.path.exists(path) for path, _, _ in files.values()):
+            return 0
+        # a writer appends to each file in turn; only rows present in all of them are visible
+        return min(os.path.getsize(path) // (np.dtype(dt).itemsize * width) for path, dt, width in files.values())
+
+    def _mapped(self, generation: int) -> dict[str, np.ndarray]:
+        """Current views of every row file; remapped when another writer grew them or compacted.
+
+        Raises FileNotFoundError when the generation was already removed by a
+        later compaction; callers read the generation again and retry.
+        """
+        self._load_meta()
+        if self._dim is None:
+            return {"vectors": np.zeros((0, 1), np.float32), "norms": np.zeros(0, np.float32)}
+
+        if generation and not os.path.exists(self._files(generation)["norms"][0]):
+            raise FileNotFoundError(f"{self.name} generation {generation} was compacted away")
+        rows = self._row_count(generation)
+        if (generation, rows) != self._mapped_key:
+            maps = {}
+            for key, (path, dt, width) in self._files(generation).items():
+                shape = (rows,) if key in ("norms", "scales") else (rows, width)
+                maps[key] = np.memmap(path, dtype=dt, mode="r", shape=shape) if rows else np.zeros(shape, dt)
+            self._maps, self._mapped_key = maps, (generation, rows)
+        return self._maps
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def upsert(self, ids: list[str], embeddings, documents: list[str] | None = None, metadatas: list[dict] | None = None):
+        if not ids:
+            return
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._load_meta()
+                dim = self._dim
+                if dim is None:
+                    if MMAP_VECTOR_DTYPE not in ("float32", "float16", "int8"):
+                        raise ValueError(f"Unsupported MMAP_VECTOR_DTYPE={MMAP_VECTOR_DTYPE}")
+                    dim, self._dtype = vectors.shape[1], MMAP_VECTOR_DTYPE
+                    self._conn.executemany(
+                        "INSERT INTO meta (key, value) VALUES (?, ?)",
+                        [("dim", str(dim)), ("dtype", self._dtype)],
+                    )
+                    self._dim = dim
+                    # rows left by a first upsert that rolled back; no reader maps files before dim exists
+                    for path, _, _ in self._files(0).values():
+                        open(path, "wb").close()
+                if vectors.shape[1] != dim:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension {dim}")
+
+                # every id gets a fresh row at the end of the files, invisible to searches until committed
+                generation = self._generation()
+                replaced = self._rows_for_ids(ids)
+                first = self._row_count(generation)
+                rows = list(range(first, first + len(ids)))
+                norms = np.einsum("ij,ij->i", vectors, vectors).astype(np.float32)
+                arrays = {"vectors": vectors, "norms": np.full(len(ids), np.inf, dtype=np.float32)}
+                if self._dtype != "float32":
+                    arrays["codes"], scales = quantize(vectors, self._dtype)
+                    if scales is not None:
+                        arrays["scales"] = scales
+                self._write_rows(generation, rows, arrays)
+
+                # an id repeated in one call keeps its last row, like a second upsert would
+                final = {id_: i for i, id_ in enumerate(ids)}
+                live = sorted(final.values())
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [(rows[i], ids[i], documents[i], json.dumps(metadatas[i] or {}, ensure_ascii=False)) for i in live],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._dim = self._dtype = None
+                raise
+
+            # a crash between here and the commit above is repaired by _recover on the next open
+            self._write_rows(generation, [rows[i] for i in live], {"norms": norms[live]})
+            self._tombstone(generation, sorted(replaced.values()))
+        self._maybe_compact()
+
+    def _write_rows(self, generation: int, rows: list[int], arrays: dict[str, np.ndarray]):
+        """Write the given files (a subset of _files) at the given rows."""
+        # runs of consecutive rows (the common append case) become one write per file
+        runs, start = [], 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                runs.append((rows[start], start, i))
+                start = i
+
+        for key, (path, dt, width) in self._files(generation).items():
+            if key not in arrays:
+                continue
+            data = np.ascontiguousarray(arrays[key], dtype=dt)
+            row_bytes = np.dtype(dt).itemsize * width
+            with open(path, "ab"):
+                pass
+            with open(path, "r+b") as f:
+                for first, lo, hi in runs:
+                    f.seek(first * row_bytes)
+                    f.write(data[lo:hi].tobytes())
+
+    def _tombstone(self, generation: int, rows: list[int]):
+        # the vector row stays until the next compaction; an infinite norm keeps it out of every search
+        if rows:
+            self._write_rows(generation, rows, {"norms": np.full(len(rows), np.inf, dtype=np.float32)})
+
+    def _rows_for_ids(self, ids: list[str]) -> dict[str, int]:
+        out = {}
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            marks = ",".join("?" * len(part))
+            out.update(self._conn.execute(f"SELECT id, row FROM rows WHERE id IN ({marks})", part).fetchall())
+        return out
+
+    def _select(self, columns: str, ids: list[str] | None, where: dict | None) -> list[tuple]:
+        self._ensure_indexes(where)
+        sql, params = where_to_sql(where)
+        if ids is None:
+            with self._lock:
+                return self._conn.execute(f"SELECT {columns} FROM rows WHERE {sql} ORDER BY row", params).fetchall()
+
+        found = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                marks = ",".join("?" * len(part))
+                for r in self._conn.execute(f"SELECT {columns} FROM rows WHERE id IN ({marks}) AND {sql}", part + params):
+                    found[r[1]] = r
+        # same order as the ids that were asked for
+        return [found[i] for i in ids if i in found]
+
+    def _snapshot(self, fn):
+        """(generation, fn()) read in one transaction, so row numbers match that generation's files."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                return self._generation(), fn()
+            finally:
+                self._conn.execute("COMMIT")
+
+    def get(self, ids: list[str] | None = None, where: dict | None = None, include: list[str] | None = None) -> dict:
+        include = include if include is not None else ["documents", "metadatas"]
+        self._ensure_indexes(where)
+        while True:
+            generation, rows = self._snapshot(lambda: self._select("row, id, document, metadata", ids, where))
+            out = {"ids": [r[1] for r in rows], "embeddings": None, "documents": None, "metadatas": None}
+            if "documents" in include:
+                out["documents"] = [r[2] for r in rows]
+            if "metadatas" in include:
+                out["metadatas"] = [json.loads(r[3]) for r in rows]
+            if "embeddings" in include:
+                try:
+                    vectors = self._mapped(generation)["vectors"]
+                except FileNotFoundError:
+                    continue
+                out["embeddings"] = np.array(vectors[[r[0] for r in rows]]) if rows else np.zeros((0, vectors.shape[1]), np.float32)
+            return out
+
+    def query(self, query_embeddings, n_results: int = 10, where: dict | None = None, include: list[str] | None = None) -> dict:
+        include = include if include is not None else ["documents", "metadatas", "distances"]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        self._ensure_indexes(where)
+
+        while True:
+            generation, candidates = self._snapshot(
+                lambda: np.fromiter((r for (r,) in self._select("row", None, where)), dtype=np.int64) if where else None
+            )
+            try:
+                maps = self._mapped(generation)
+            except FileNotFoundError:
+                continue
+            if candidates is not None:
+                candidates = candidates[candidates < len(maps["norms"])]
+            searched = [self._search(maps, q, n_results, candidates) for q in queries]
+
+            def lookup():
+                out = []
+                for rows, _ in searched:
+                    if not len(rows):
+                        out.append({})
+                        continue
+                    out.append({r[0]: r for r in self._conn.execute(
+                        f"SELECT row, id, document, metadata FROM rows WHERE row IN ({','.join('?' * len(rows))})",
+                        rows.tolist(),
+                    )})
+                return out
+
+            # a compaction between the search and the lookup renumbered the rows; search again
+            current, found = self._snapshot(lookup)
+            if current == generation:
+                break
+
+        out = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        for (rows, dists), by_row in zip(searched, found):
+            # a row can vanish between the search and this lookup when another worker deletes it
+            hits = [(by_row[r], d) for r, d in zip(rows.tolist(), dists.tolist()) if r in by_row]
+            out["ids"].append([h[1] for h, _ in hits])
+            out["distances"].append([d for _, d in hits])
+            out["documents"].append([h[2] for h, _ in hits])
+            out["metadatas"].append([json.loads(h[3]) for h, _ in hits])
+
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                out[key] = None
+        return out
+
+    def _search(self, maps: dict[str, np.ndarray], q: np.ndarray, k: int, candidates: np.ndarray | None):
+        """Squared-L2 top-k (Chroma's default distance) over all rows or a candidate subset.
+
+        Quantized collections scan the compact codes for k * MMAP_RESCORE_FACTOR
+        rows, then re-score those against the float32 vectors.
+        """
+        norms = maps["norms"]
+        total = len(norms) if candidates is None else len(candidates)
+        if total == 0 or k <= 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+
+        quantized = "codes" in maps
+        scan = maps["codes"] if quantized else maps["vectors"]
+        scales = maps.get("scales")
+        keep_k = k * MMAP_RESCORE_FACTOR if quantized and MMAP_RESCORE_FACTOR > 0 else k
+
+        q_norm = float(q @ q)
+        best_rows = np.zeros(0, np.int64)
+        best_dists = np.zeros(0, np.float32)
+        for start in range(0, total, QUERY_BLOCK_ROWS):
+            end = min(start + QUERY_BLOCK_ROWS, total)
+            rows = np.arange(start, end) if candidates is None else candidates[start:end]
+            block = scan[start:end] if candidates is None else scan[rows]
+            dots = _upcast_dot(block, q) if quantized else block @ q
+            if scales is not None:
+                dots *= scales[start:end] if candidates is None else scales[rows]
+            dists = (norms[start:end] if candidates is None else norms[rows]) + q_norm - 2.0 * dots
+
+            # deleted rows carry an infinite norm
+            live = np.isfinite(dists)
+            rows, dists = np.concatenate([best_rows, rows[live]]), np.concatenate([best_dists, dists[live]])
+            if len(dists) > keep_k:
+                keep = np.argpartition(dists, keep_k - 1)[:keep_k]
+                rows, dists = rows[keep], dists[keep]
+            best_rows, best_dists = rows, dists
+
+        if keep_k > k:
+            exact = maps["vectors"][np.sort(best_rows)]
+            best_rows = np.sort(best_rows)
+            best_dists = norms[best_rows] + q_norm - 2.0 * (exact @ q)
+
+        order = np.argsort(best_dists, kind="stable")[:k]
+        return best_rows[order], np.maximum(best_dists[order], 0.0)
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None):
+        if ids is None and not where:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                generation = self._generation()
+                rows = [r[0] for r in self._select("row, id", ids, where)]
+                for i in range(0, len(rows), 500):
+                    part = rows[i:i + 500]
+                    self._conn.execute(f"DELETE FROM rows WHERE row IN ({','.join('?' * len(part))})", part)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            # rows no longer in the sidecar are already dropped by query(); the tombstone frees their top-k slots
+            if rows:
+                self._load_meta()
+                self._tombstone(generation, rows)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if MMAP_COMPACT_DEAD_RATIO <= 0:
+            return
+        self._load_meta()
+        if self._dim is None:
+            return
+        total = self._row_count(self._generation())
+        dead = total - self.count()
+        if dead >= MMAP_COMPACT_MIN_DEAD and dead > MMAP_COMPACT_DEAD_RATIO * total:
+            self.compact()
+
+    def compact(self) -> int:
+        """Rewrite the live rows into a new generation of files and renumber the sidecar; returns rows dropped.
+
+        Holds the SQLite write lock throughout, so writers wait; readers keep
+        using the previous generation until the commit, and re-run a query
+        whose rows were renumbered under it.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._load_meta()
+                generation = self._generation()
+                live = np.fromiter((r for (r,) in self._conn.execute("SELECT row FROM rows ORDER BY row")), dtype=np.int64)
+                total = self._row_count(generation) if self._dim is not None else 0
+                if len(live) == total:
+                    self._conn.execute("COMMIT")
+                    return 0
+
+                src = {
+                    key: np.memmap(path, dtype=dt, mode="r", shape=(total,) if key in ("norms", "scales") else (total, width))
+                    for key, (path, dt, width) in self._files(generation).items()
+                }
+                outs = {key: open(path, "wb") for key, (path, _, _) in self._files(generation + 1).items()}
+                try:
+                    for start in range(0, len(live), QUERY_BLOCK_ROWS):
+                        part = live[start:start + QUERY_BLOCK_ROWS]
+                        block = np.asarray(src["vectors"][part])
+                        # norms are recomputed, not copied: this also revives rows a crashed upsert left at +inf
+                        outs["norms"].write(np.einsum("ij,ij->i", block, block).astype(np.float32).tobytes())
+                        outs["vectors"].write(block.tobytes())
+                        for key in ("codes", "scales"):
+                            if key in src:
+                                outs[key].write(np.ascontiguousarray(src[key][part]).tobytes())
+                finally:
+                    for f in outs.values():
+                        f.close()
+
+                # ascending order never collides: every live row moves down to a slot already vacated
+                self._conn.executemany(
+                    "UPDATE rows SET row = ? WHERE row = ?",
+                    [(new, int(old)) for new, old in enumerate(live) if new != old],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(generation + 1),)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        # the generation just replaced stays for readers that mapped it a moment ago; the one before goes
+        if generation > 0:
+            for path, _, _ in self._files(generation - 1).values():
+                if os.path.exists(path):
+                    os.remove(path)
+        return total - len(live)
+
+    def _recover(self):
+        """Bring norms in line with the sidecar after a writer died between its commit and the norm writes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._load_meta()
+                if self._dim is None:
+                    return
+                generation = self._generation()
+                total = self._row_count(generation)
+                if total == 0:
+                    return
+                is_live = np.zeros(total, dtype=bool)
+                live = np.fromiter((r for (r,) in self._conn.execute("SELECT row FROM rows")), dtype=np.int64)
+                is_live[live[live < total]] = True
+                norms = np.fromfile(self._files(generation)["norms"][0], dtype=np.float32, count=total)
+
+                revive = np.flatnonzero(is_live & ~np.isfinite(norms))
+                if len(revive):
+                    path = self._files(generation)["vectors"][0]
+                    block = np.asarray(np.memmap(path, dtype=np.float32, mode="r", shape=(total, self._dim))[revive])
+                    self._write_rows(generation, revive.tolist(), {"norms": np.einsum("ij,ij->i", block, block)})
+                self._tombstone(generation, np.flatnonzero(~is_live & np.isfinite(norms)).tolist())
+            finally:
+                self._conn.execute("COMMIT")
+
+
+class MmapClient:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._collections: dict[str, MmapCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name: str) -> MmapCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MmapCollection(self.path, name)
+            return self._collections[name]
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.embeddings.provider import embed_texts
+from services.rag.vectorstore import query_collection, get_documents, count_documents
+from services.rag.lexical import get_lexical_index
+from services.rag.context import PROMPT_JOB_TOKENS, PROMPT_RESUME_TOKENS, central_order, pack_chunks
+from services.rag.tokens import count_tokens
+
+JOB_COLLECTION = "jobs"
+RESUME_COLLECTION = "resumes"
+
+# vector: dense only; hybrid: BM25 and dense rankings fused with RRF;
+# prefilter: dense scoring restricted to the BM25 candidates, then fused
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+RRF_K = int(os.getenv("RRF_K", "60"))
+# depth of each ranking fed into the fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "30"))
+
+_lexical_checked: set[str] = set()
+
+
+def ms_since(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+def clean_candidate_id(candidate_id: str | None) -> str:
+    candidate_id = (candidate_id or "").strip()
+    if not candidate_id:
+        raise HTTPException(status_code=400, detail="candidate_id is required.")
+    if "::" in candidate_id:
+        raise HTTPException(status_code=400, detail="candidate_id must not contain '::'.")
+    return candidate_id
+
+
+def candidate_where(candidate_id: str | None) -> dict | None:
+    # every resume read is scoped to one candidate when a candidate_id is given
+    return {"candidate_id": candidate_id} if candidate_id else None
+
+
+def _ensure_lexical(lexical, collection: str):
+    # collections indexed before the lexical index existed (or with a deleted .cache) are rebuilt once
+    if collection in _lexical_checked:
+        return
+    if lexical.count(collection) != count_documents(collection):
+        res = get_documents(collection)
+        lexical.clear(collection)
+        lexical.upsert(collection, res["ids"], res["documents"], res["metadatas"])
+    _lexical_checked.add(collection)
+
+
+def _vector_hits(collection: str, embedding, k: int, where: dict | None) -> list[dict]:
+    res = query_collection(collection, embedding, top_k=k, where=where)
+    return [
+        {"id": id_, "document": doc, "metadata": meta, "distance": dist}
+        for id_, doc, meta, dist in zip(
+            res.get("ids", [[]])[0],
+            res.get("documents", [[]])[0],
+            res.get("metadatas", [[]])[0],
+            res.get("distances", [[]])[0],
+        )
+    ]
+
+
+def _score_ids(collection: str, ids: list[str], embedding) -> list[dict]:
+    """Dense ranking of just these ids, squared L2 like Chroma's default space."""
+    res = get_documents(collection, ids=ids, include=["documents", "metadatas", "embeddings"])
+    vectors = np.asarray(res.get("embeddings"), dtype=np.float32)
+    if not len(vectors):
+        return []
+    dists = ((vectors - np.asarray(embedding, dtype=np.float32)) ** 2).sum(axis=1)
+    hits = [
+        {"id": id_, "document": doc, "metadata": meta, "distance": float(d)}
+        for id_, doc, meta, d in zip(res["ids"], res["documents"], res["metadatas"], dists)
+    ]
+    return sorted(hits, key=lambda h: h["distance"])
+
+
+def search_chunks(collection: str, text: str, embedding, top_k: int, where: dict | None = None) -> list[dict]:
+    """Top-k chunks as {id, document, metadata, distance, score, vector_rank, lexical_rank}.
+
+    distance is None for chunks only the lexical ranking found.
+    """
+    lexical = get_lexical_index() if RETRIEVAL_MODE != "vector" else None
+    if lexical is None:
+        return _vector_hits(collection, embedding, top_k, where)
+
+    _ensure_lexical(lexical, collection)
+    depth = max(top_k, HYBRID_CANDIDATES)
+    lexical_hits = lexical.search(collection, text, k=depth, where=where)
+
+    if RETRIEVAL_MODE == "prefilter" and len(lexical_hits) >= top_k:
+        dense = _score_ids(collection, [id_ for id_, _ in lexical_hits], embedding)
+    else:
+        # too few lexical candidates to stand in for the dense search
+        dense = _vector_hits(collection, embedding, depth, where)
+
+    hits = {h["id"]: h for h in dense}
+    scores: dict[str, float] = {}
+    for rank, h in enumerate(dense, start=1):
+        h["vector_rank"] = rank
+        scores[h["id"]] = 1.0 / (RRF_K + rank)
+    for rank, (id_, _) in enumerate(lexical_hits, start=1):
+        hits.setdefault(id_, {"id": id_, "distance": None})["lexical_rank"] = rank
+        scores[id_] = scores.get(id_, 0.0) + 1.0 / (RRF_K + rank)
+
+    top = sorted(scores, key=lambda i: -scores[i])[:top_k]
+    missing = [i for i in top if "document" not in hits[i]]
+    if missing:
+        res = get_documents(collection, ids=missing)
+        for id_, doc, meta in zip(res["ids"], res["documents"], res["metadatas"]):
+            hits[id_].update(document=doc, metadata=meta)
+
+    out = []
+    for id_ in top:
+        h = hits[id_]
+        if "document" not in h:
+            # deleted between the lexical search and the lookup
+            continue
+        h["score"] = round(scores[id_], 5)
+        h.setdefault("vector_rank", None)
+        h.setdefault("lexical_rank", None)
+        out.append(h)
+    return out
+
+
+def load_job(job_id: str, with_embedding: bool = False) -> dict | None:
+    include = ["documents", "metadatas", "embeddings"] if with_embedding else None
+    res = get_documents(JOB_COLLECTION, ids=[f"{job_id}::main"], include=include)
+    docs = res.get("documents") or []
+    metas = res.get("metadatas") or []
+    if not docs:
+        return None
+
+    meta = dict(metas[0] or {})
+    chunk_ids = meta.pop("chunk_ids", None)
+    if chunk_ids is not None:
+        chunk_ids = json.loads(chunk_ids)
+    elif meta.get("chunk_count") is not None:
+        # jobs uploaded before chunk ids were content hashes
+        chunk_ids = [f"{job_id}::chunk::{i}" for i in range(meta["chunk_count"])]
+    else:
+        # jobs uploaded before chunk_count was stored on the main document
+        chunks = get_documents(
+            JOB_COLLECTION,
+            where={"$and": [{"job_id": job_id}, {"is_main": False}]},
+            include=["metadatas"],
+        )
+        order = sorted(zip(chunks.get("metadatas") or [], chunks.get("ids") or []), key=lambda x: x[0].get("chunk_index", 0))
+        chunk_ids = [i for _, i in order]
+
+    job = {
+        "job_id": job_id,
+        "description": docs[0],
+        "metadata": meta,
+        "chunk_ids": chunk_ids,
+    }
+    if with_embedding:
+        # the main document is stored with the embedding of the full description
+        embeddings = res.get("embeddings")
+        job["embedding"] = list(embeddings[0]) if embeddings is not None and len(embeddings) else None
+    return job
+
+
+def retrieve_match_context(job_id: str, top_k_resume: int, candidate_id: str) -> dict:
+    """Job description + one candidate's resume chunks closest to it, shared by match and apply-kit."""
+    job_id = (job_id or "").strip()
+    if not job_id:
+        raise HTTPException(status_code=400, detail="job_id is required.")
+    candidate_id = clean_candidate_id(candidate_id)
+
+    t_total = time.perf_counter()
+    timings = {}
+
+    t0 = time.perf_counter()
+    job = load_job(job_id, with_embedding=True)
+    timings["load_job_ms"] = ms_since(t0)
+    if not job or not job["description"]:
+        raise HTTPException(status_code=404, detail="Job not found. Upload the job first via /job/upload_text or /job/upload.")
+    job_full = job["description"]
+
+    t0 = time.perf_counter()
+    resume_q_emb = job["embedding"]
+    timings["embedding_reused"] = resume_q_emb is not None
+    if resume_q_emb is None:
+        resume_q_emb = embed_texts([job_full])[0]
+    timings["embed_ms"] = ms_since(t0)
+
+    t0 = time.perf_counter()
+    hits = search_chunks(RESUME_COLLECTION, job_full, resume_q_emb, top_k_resume, where=candidate_where(candidate_id))
+    timings["resume_query_ms"] = ms_since(t0)
+    timings["retrieval_mode"] = RETRIEVAL_MODE
+
+    if not hits:
+        raise HTTPException(status_code=400, detail="No resume indexed for this candidate. Please index a resume first using /rag/index_resume.")
+
+    t0 = time.perf_counter()
+    job_block, job_tokens = _job_context(job)
+    packed, resume_tokens = pack_chunks([h["document"] for h in hits], PROMPT_RESUME_TOKENS)
+    resume_blocks = [f"[RESUME_CHUNK {n}]\n{text}" for n, (_, text) in enumerate(packed, start=1)]
+    timings["context_ms"] = ms_since(t0)
+
+    return {
+        "job_id": job_id,
+        "candidate_id": candidate_id,
+        "job_block": job_block,
+        "resume_blocks": resume_blocks,
+        "context_tokens": {"job": job_tokens, "resume": resume_tokens},
+        "timings": timings,
+        "started_at": t_total,
+    }
+
+
+def _job_context(job: dict) -> tuple[str, int]:
+    """The whole posting when it fits in PROMPT_JOB_TOKENS, else its most central chunks in posting order."""
+    description = job["description"]
+    tokens = count_tokens(description)
+    if tokens <= PROMPT_JOB_TOKENS:
+        return f"[JOB_MAIN]\n{description}", tokens
+
+    documents, embeddings = load_job_chunks(job)
+    if not documents:
+        # jobs stored without chunks: cut the posting itself, inside a line if it has to
+        packed, tokens = pack_chunks([description], PROMPT_JOB_TOKENS)
+        return f"[JOB_MAIN]\n{packed[0][1]}" if packed else "[JOB_MAIN]", tokens
+
+    packed, tokens = pack_chunks(documents, PROMPT_JOB_TOKENS, order=central_order(embeddings))
+    return "\n\n".join(f"[JOB_CHUNK {k + 1}]\n{text}" for k, text in sorted(packed)), tokens
+
+
+def load_job_chunks(job: dict) -> tuple[list[str], list]:
+    """Documents and embeddings of a job's chunks, in posting order."""
+    if not job["chunk_ids"]:
+        return [], []
+    res = get_documents(JOB_COLLECTION, ids=job["chunk_ids"], include=["documents", "embeddings"])
+    by_id = {id_: (doc, emb) for id_, doc, emb in zip(res["ids"], res["documents"], res["embeddings"])}
+    found = [by_id[i] for i in job["chunk_ids"] if i in by_id]
+    return [doc for doc, _ in found], [emb for _, emb in found]
+
+
+def load_job_chunk_embeddings(job: dict) -> list:
+    if not job["chunk_ids"]:
+        return []
+    res = get_documents(JOB_COLLECTION, ids=job["chunk_ids"], include=["embeddings"])
+    embeddings = res.get("embeddings")
+    return [] if embeddings is None else list(embeddings)
+
+
+def load_resume_embeddings(where: dict) -> list:
+    res = get_documents(RESUME_COLLECTION, where=where, include=["embeddings"])
+    embeddings = res.get("embeddings")
+    return [] if embeddings is None else list(embeddings)
+
+
+def load_resume_chunks(where: dict) -> tuple[list[str], list]:
+    """Documents and embeddings of the resume chunks under where, in resume order."""
+    res = get_documents(RESUME_COLLECTION, where=where, include=["documents", "metadatas", "embeddings"])
+    if not res["ids"]:
+        return [], []
+    order = sorted(range(len(res["ids"])), key=lambda i: (res["metadatas"][i] or {}).get("chunk_index", 0))
+    return [res["documents"][i] for i in order], [res["embeddings"][i] for i in order]
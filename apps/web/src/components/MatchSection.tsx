@@ -11,6 +11,7 @@ interface MatchSectionProps {
   jobId: string;
   setJobId: (id: string) => void;
   topK: number;
+  candidateId: string;
   isResumeIndexed: boolean;
 }
 
@@ -19,6 +20,7 @@ export const MatchSection = ({
   jobId,
   setJobId,
   topK,
+  candidateId,
   isResumeIndexed,
 }: MatchSectionProps) => {
   const [isMatching, setIsMatching] = useState(false);
@@ -38,6 +40,7 @@ export const MatchSection = ({
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           job_id: jobId.trim(),
+          candidate_id: candidateId,
           top_k_resume: topK,
         }),
       });
@@ -7,11 +7,12 @@ import { toast } from "sonner";
 
 interface ResumeSectionProps {
   apiBase: string;
-  onIndexed: () => void;
+  candidateId: string;
+  onIndexed: (candidateId: string) => void;
   isIndexed: boolean;
 }
 
-export const ResumeSection = ({ apiBase, onIndexed, isIndexed }: ResumeSectionProps) => {
+export const ResumeSection = ({ apiBase, candidateId, onIndexed, isIndexed }: ResumeSectionProps) => {
   const [file, setFile] = useState<File | null>(null);
   const [isIndexing, setIsIndexing] = useState(false);
   const [isParsing, setIsParsing] = useState(false);
@@ -24,6 +25,10 @@ export const ResumeSection = ({ apiBase, onIndexed, isIndexed }: ResumeSectionPr
     try {
       const formData = new FormData();
       formData.append("file", file);
+      if (candidateId) {
+        // re-indexing replaces this candidate's resume instead of creating a new one
+        formData.append("candidate_id", candidateId);
+      }
 
       const response = await fetch(`${apiBase}/rag/index_resume`, {
         method: "POST",
@@ -34,8 +39,9 @@ export const ResumeSection = ({ apiBase, onIndexed, isIndexed }: ResumeSectionPr
         throw new Error(await response.text());
       }
 
+      const data = await response.json();
       toast.success("Resume indexed successfully!");
-      onIndexed();
+      onIndexed(data.candidate_id);
     } catch (error) {
       toast.error(`Failed to index resume: ${error}`);
     } finally {
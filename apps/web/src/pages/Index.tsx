@@ -12,6 +12,7 @@ const Index = () => {
   const [topK, setTopK] = useState(6);
   const [isSettingsOpen, setIsSettingsOpen] = useState(false);
   const [isResumeIndexed, setIsResumeIndexed] = useState(false);
+  const [candidateId, setCandidateId] = useState("");
   const [jobId, setJobId] = useState("");
 
   return (
@@ -60,7 +61,11 @@ const Index = () => {
           <div className="glass-card p-6 md:p-8 animate-slide-up">
             <ResumeSection
               apiBase={apiBase}
-              onIndexed={() => setIsResumeIndexed(true)}
+              candidateId={candidateId}
+              onIndexed={(id) => {
+                setCandidateId(id);
+                setIsResumeIndexed(true);
+              }}
               isIndexed={isResumeIndexed}
             />
           </div>
@@ -81,6 +86,7 @@ const Index = () => {
               jobId={jobId}
               setJobId={setJobId}
               topK={topK}
+              candidateId={candidateId}
               isResumeIndexed={isResumeIndexed}
             />
           </div>
@@ -1,3 +1,5 @@
+import json
+
 import streamlit as st
 import requests
  
@@ -9,10 +11,10 @@ st.title("🧭 PathFinder — CV ↔ Job Matching (RAG + LLM)")
 st.caption("Upload your resume, paste a job offer, and get an explainable match score with evidence.")
 
 
-def post_file(endpoint: str, file_bytes: bytes, filename: str, mime: str = "application/pdf"):
+def post_file(endpoint: str, file_bytes: bytes, filename: str, mime: str = "application/pdf", data: dict | None = None):
     url = f"{API_BASE}{endpoint}"
     files = {"file": (filename, file_bytes, mime)}
-    r = requests.post(url, files=files, timeout=120)
+    r = requests.post(url, files=files, data=data, timeout=120)
     r.raise_for_status()
     return r.json()
 
@@ -22,16 +24,109 @@ def post_json(endpoint: str, payload: dict):
     r.raise_for_status()
     return r.json()
 
+def stream_sse(endpoint: str, payload: dict):
+    url = f"{API_BASE}{endpoint}"
+    with requests.post(url, json=payload, stream=True, timeout=(10, 300)) as r:
+        r.raise_for_status()
+        event, data = "message", []
+        for line in r.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if line == "":
+                if data:
+                    yield event, json.loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].strip())
+
+def run_task(endpoint: str, payload: dict, status):
+    """Submit a background task and long-poll it, so no request stays open for the whole generation."""
+    task = post_json(endpoint, payload)
+    while task["status"] in ("queued", "running"):
+        if task["status"] == "queued":
+            status.info(f"Queued ({task.get('queue_position', 0)} ahead)...")
+        else:
+            status.info("Matching job ↔ resume (RAG + LLM)...")
+        r = requests.get(f"{API_BASE}/tasks/{task['task_id']}", params={"wait": 20}, timeout=60)
+        r.raise_for_status()
+        task = r.json()
+    status.empty()
+    if task["status"] != "done":
+        raise RuntimeError(task.get("error") or f"Task {task['status']}.")
+    return task["result"]
+
 def post_form(endpoint: str, data: dict):
     url = f"{API_BASE}{endpoint}"
     r = requests.post(url, data=data, timeout=180)
     r.raise_for_status()
     return r.json()
 
+def render_match(out: dict):
+    result = out.get("result")
+    if result:
+        # Pretty metrics
+        score = result.get("match_score", 0)
+        st.metric("Match score", f"{score}/100")
+
+        cA, cB = st.columns(2)
+        with cA:
+            st.write("✅ Strong matches")
+            st.write(result.get("strong_matches", []))
+        with cB:
+            st.write("⚠️ Missing skills")
+            st.write(result.get("missing_skills", []))
+
+        st.write("🛠️ Recommended actions")
+        st.write(result.get("recommended_actions", []))
+
+        st.write("📌 Evidence")
+        st.json(result.get("evidence", {}))
+
+        st.write("📝 Notes")
+        st.write(result.get("notes", ""))
+
+        with st.expander("See raw API payload (debug)"):
+            st.json(out)
+    else:
+        st.warning("LLM output could not be parsed as JSON. Showing raw output:")
+        st.code(out.get("raw_llm", ""))
+        with st.expander("See raw API payload (debug)"):
+            st.json(out)
+
+def run_match_stream(payload: dict):
+    status = st.empty()
+    status.info("Retrieving evidence...")
+    live = st.empty()
+    text = ""
+
+    for event, data in stream_sse("/job/match/stream", payload):
+        if event == "evidence":
+            status.info(f"Generating analysis from {len(data.get('resume_context_used', []))} resume chunks...")
+            with st.expander("Evidence sent to the LLM"):
+                st.code(data.get("job_context_used", ""))
+                for block in data.get("resume_context_used", []):
+                    st.code(block)
+        elif event == "token":
+            text += data.get("text", "")
+            live.code(text, language="json")
+        elif event == "result":
+            status.empty()
+            live.empty()
+            return data
+        elif event == "error":
+            status.error(data.get("detail", "Streaming failed."))
+            return None
+
+    status.error("Stream ended before a result was received.")
+    return None
+
 st.sidebar.header("Settings")
 API_BASE = st.sidebar.text_input("API Base URL", API_BASE)
 
 top_k_resume = st.sidebar.slider("Top K resume chunks", 3, 10, 6)
+stream_output = st.sidebar.checkbox("Stream LLM output", value=True)
 
 st.sidebar.markdown("---")
 st.sidebar.write("✅ Make sure the API is running:")
@@ -48,9 +143,12 @@ with col1:
         try:
             with st.spinner("Indexing resume into vector store..."):
                 pdf_bytes = resume_file.getvalue()
-                out = post_file("/rag/index_resume", pdf_bytes, resume_file.name)
+                # re-indexing under the same candidate_id replaces that resume
+                form = {"candidate_id": st.session_state["candidate_id"]} if st.session_state.get("candidate_id") else None
+                out = post_file("/rag/index_resume", pdf_bytes, resume_file.name, data=form)
             st.success("Resume indexed successfully ✅")
             st.session_state["resume_indexed"] = True
+            st.session_state["candidate_id"] = out["candidate_id"]
             st.json(out)
         except requests.HTTPError as e:
             st.error(f"API error: {e.response.text}")
@@ -104,45 +202,19 @@ with col2:
     st.markdown("---")
     st.subheader("3) Match")
     job_id = st.text_input("Job ID", value=st.session_state.get("job_id", ""))
+    candidate_id = st.text_input("Candidate ID", value=st.session_state.get("candidate_id", ""))
 
-    if st.button("Run Match", type="primary", disabled=(not job_id.strip())):
+    if st.button("Run Match", type="primary", disabled=(not job_id.strip() or not candidate_id.strip())):
         try:
-            with st.spinner("Matching job ↔ resume (RAG + LLM)..."):
-                payload = {"job_id": job_id.strip(), "top_k_resume": top_k_resume}
-                out = post_json("/job/match", payload)
-
-            st.success("Match completed ✅")
-
-            result = out.get("result")
-            if result:
-                # Pretty metrics
-                score = result.get("match_score", 0)
-                st.metric("Match score", f"{score}/100")
-
-                cA, cB = st.columns(2)
-                with cA:
-                    st.write("✅ Strong matches")
-                    st.write(result.get("strong_matches", []))
-                with cB:
-                    st.write("⚠️ Missing skills")
-                    st.write(result.get("missing_skills", []))
-
-                st.write("🛠️ Recommended actions")
-                st.write(result.get("recommended_actions", []))
-
-                st.write("📌 Evidence")
-                st.json(result.get("evidence", {}))
-
-                st.write("📝 Notes")
-                st.write(result.get("notes", ""))
-
-                with st.expander("See raw API payload (debug)"):
-                    st.json(out)
+            payload = {"job_id": job_id.strip(), "candidate_id": candidate_id.strip(), "top_k_resume": top_k_resume}
+            if stream_output:
+                out = run_match_stream(payload)
             else:
-                st.warning("LLM output could not be parsed as JSON. Showing raw output:")
-                st.code(out.get("raw_llm", ""))
-                with st.expander("See raw API payload (debug)"):
-                    st.json(out)
+                out = run_task("/tasks/match", payload, st.empty())
+
+            if out is not None:
+                st.success("Match completed ✅")
+                render_match(out)
 
         except requests.HTTPError as e:
             st.error(f"API error: {e.response.text}")